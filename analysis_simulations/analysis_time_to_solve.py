@@ -1,7 +1,6 @@
-import os
-
 import numpy as np
-import pickle
+
+from src.results_store import ResultsStore
 
 folder = "with_noise_same_computer/"
 folder_HTC = folder + "HTC"
@@ -10,10 +9,12 @@ folder_FREE = folder + "NTC"
 
 time_to_solve = np.zeros((20, 3))
 for config, (folder, str_suffix) in enumerate(zip([folder_KTC, folder_HTC, folder_FREE], ["KTC", "HTC", "NTC"])):
-    n_files = len([name for name in os.listdir(folder) if name.endswith("_CVG.pkl")])
-    for i in range(0, n_files):
-        data = pickle.load(open(folder + f"/sol_{i}_CVG.pkl", "rb"))
-        time_to_solve[i, config] = data["real_time_to_optimize"]
+    # The pickles are converted to the columnar store on the first run, then only the index is read
+    index = ResultsStore.from_pickles(folder).index()
+    converged = index["converged"]
+    order = np.argsort(index["seed"][converged].astype(int))
+    n_files = len(order)
+    time_to_solve[:n_files, config] = index["real_time_to_optimize"][converged][order]
 
 print(time_to_solve)
 print(np.mean(time_to_solve, axis=0))
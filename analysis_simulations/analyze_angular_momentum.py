@@ -1,50 +1,9 @@
 import numpy as np
-import pandas as pd
 import biorbd
 import pickle
 
-from analysis_simulations.analyze_data_simu import model_adjusted
-
-
-def adjust_q_with_full_floating_base(q: np.ndarray) -> np.ndarray:
-    """
-    Adjust the q vector to take into account the full floating base
-
-    Parameters
-    ----------
-    q: np.ndarray
-        The q vector to adjust
-
-    Returns
-    -------
-    The adjusted q vector
-    """
-    q_adjusted = np.zeros((q.shape[0] + 3, q.shape[1]))
-    q_adjusted[1:4, :] = q[0:3, :]
-    q_adjusted[6:, :] = q[3:, :]
-    return q_adjusted
-
-
-def get_created_data_from_pickle(file: str):
-    """
-    This code is used to open a pickle document and exploit its data_CL.
-
-    Parameters
-    ----------
-    file: path of the pickle document
-
-    Returns
-    -------
-    data_CL: All the data_CL of the pickle document
-    """
-    with open(file, "rb") as f:
-        while True:
-            try:
-                data_tmp = pickle.load(f)
-            except:
-                break
-
-    return data_tmp
+from src.campaign_index import CampaignIndex
+from src.solution_record import SolutionRecord
 
 
 def plot_vertical_time_lines(time_end_phase_CL, time_end_phase_without, ax, color, linestyle, linewidth):
@@ -70,45 +29,29 @@ path_model = "../models/Model2D_7Dof_3C_5M_CL_V3_V3D.bioMod"
 model = biorbd.Model(path_model)
 
 CONSIDER_ONLY_CONVERGED = True
-if CONSIDER_ONLY_CONVERGED:
-    end_file = "CVG.pkl"
-else:
-    end_file = ".pkl"
-
-min_cost_without = np.inf
-for file in os.listdir(path_without):
-    if file.endswith(end_file):
-        data = pd.read_pickle(path_without + file)
-        if data["cost"] < min_cost_without:
-            min_cost_without = data["cost"]
-            sol_without = path_without + file
+
+index_without = CampaignIndex.from_pickles(os.path.dirname(os.path.normpath(path_without)))
+best_without = index_without.require_best("KTC", converged_only=CONSIDER_ONLY_CONVERGED)
+min_cost_without, sol_without = best_without["cost"], index_without.path(best_without)
 print("Min cost without: ", min_cost_without)
 
-min_cost_CL = np.inf
-for file in os.listdir(path_CL):
-    if file.endswith(end_file):
-        data = pd.read_pickle(path_CL + file)
-        if data["cost"] < min_cost_CL:
-            min_cost_CL = data["cost"]
-            sol_CL = path_CL + file
+index_CL = CampaignIndex.from_pickles(os.path.dirname(os.path.normpath(path_CL)))
+best_CL = index_CL.require_best("HTC", converged_only=CONSIDER_ONLY_CONVERGED)
+min_cost_CL, sol_CL = best_CL["cost"], index_CL.path(best_CL)
 print("Min cost CL: ", min_cost_CL)
 
-data_CL = pd.read_pickle(sol_CL)
-data_without = pd.read_pickle(sol_without)
+data_CL = SolutionRecord(sol_CL)
+data_without = SolutionRecord(sol_without)
 
 # Angular momentum
-ang_mom_CL = np.zeros((data_CL["q_all"].shape[1], 3))
-ang_mom_without = np.zeros((data_without["q_all"].shape[1], 3))
-
-adjusted_q = adjust_q_with_full_floating_base(data_without["q_all"])
-adjusted_qdot = adjust_q_with_full_floating_base(data_without["qdot_all"])
+ang_mom_CL = data_CL.angular_momentum
+ang_mom_without = data_without.angular_momentum
 
-adjusted_q_CL = adjust_q_with_full_floating_base(data_CL["q_all"])
-adjusted_qdot_CL = adjust_q_with_full_floating_base(data_CL["qdot_all"])
+adjusted_q = data_without.q_full_floating_base
+adjusted_qdot = data_without.qdot_full_floating_base
 
-for i in range(data_CL["q_all"].shape[1]):
-    ang_mom_CL[i, :] = model_adjusted.angularMomentum(adjusted_q[:, i], adjusted_qdot[:, i], True).to_array()
-    ang_mom_without[i, :] = model_adjusted.angularMomentum(adjusted_q_CL[:, i], adjusted_qdot_CL[:, i], True).to_array()
+adjusted_q_CL = data_CL.q_full_floating_base
+adjusted_qdot_CL = data_CL.qdot_full_floating_base
 
 import plotly.graph_objects as go
 
@@ -1,6 +1,4 @@
-import os
 import numpy as np
-import pandas as pd
 import biorbd
 import matplotlib.pyplot as plt
 import pickle
@@ -8,8 +6,9 @@ import pickle
 from matplotlib import rcParams
 
 from examples.somersault_taudot import prepare_ocp as prepare_ocp_without
-from src.actuators import Joint, actuator_function
-from src.actuator_constants import ACTUATORS
+from src.campaign_index import CampaignIndex
+from src.solution_record import SolutionRecord
+from src.actuator_constants import ACTUATOR_TABLE
 from src.constants import (
     PATH_MODEL_1_CONTACT,
     PATH_MODEL,
@@ -19,28 +18,6 @@ rcParams["font.family"] = "DeJavu Serif"  # Use serif font
 rcParams["font.serif"] = ["Times New Roman"]  # Specify Times New Roman or Times
 
 
-def get_created_data_from_pickle(file: str):
-    """
-    This code is used to open a pickle document and exploit its data_CL.
-
-    Parameters
-    ----------
-    file: path of the pickle document
-
-    Returns
-    -------
-    data_CL: All the data_CL of the pickle document
-    """
-    with open(file, "rb") as f:
-        while True:
-            try:
-                data_tmp = pickle.load(f)
-            except:
-                break
-
-    return data_tmp
-
-
 def plot_vertical_time_lines(
     time_end_phase_CL, time_end_phase_without, time_end_phase_free, ax, color, linestyle, linewidth
 ):
@@ -54,6 +31,23 @@ def plot_vertical_time_lines(
     return
 
 
+# The knee is plotted in flexion, its envelopes are mirrored
+MIRRORED_JOINTS = np.array([False, False, False, True, False])[:, np.newaxis]
+
+
+def torque_bounds(q_rad: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """The minimal and maximal torques of the actuated joints at each node, computed for all the nodes at once"""
+    q_joints = np.where(MIRRORED_JOINTS, -q_rad[3:8], q_rad[3:8])
+    max_plus = ACTUATOR_TABLE.max_torque(q_joints, 1)
+    max_minus = ACTUATOR_TABLE.max_torque(q_joints, -1)
+    return np.where(MIRRORED_JOINTS, -max_plus, -max_minus), np.where(MIRRORED_JOINTS, max_minus, max_plus)
+
+
+def torque_ratios(tau: np.ndarray, min_bound: np.ndarray, max_bound: np.ndarray) -> np.ndarray:
+    """The ratios between the torques and the bound of their sign"""
+    return np.where(tau > 0, tau / max_bound, np.abs(tau / min_bound))
+
+
 def plot_all_lines(time_end_phase_CL, time_end_phase_without, time_end_phase_free, ax):
     plot_vertical_time_lines(
         time_end_phase_CL[0],
@@ -94,25 +88,6 @@ def plot_all_lines(time_end_phase_CL, time_end_phase_without, time_end_phase_fre
     return
 
 
-def adjust_q_with_full_floating_base(q: np.ndarray) -> np.ndarray:
-    """
-    Adjust the q vector to take into account the full floating base
-
-    Parameters
-    ----------
-    q: np.ndarray
-        The q vector to adjust
-
-    Returns
-    -------
-    The adjusted q vector
-    """
-    q_adjusted = np.zeros((q.shape[0] + 3, q.shape[1]))
-    q_adjusted[1:4, :] = q[0:3, :]
-    q_adjusted[6:, :] = q[3:, :]
-    return q_adjusted
-
-
 # Solution with and without holonomic constraints
 common_path = "../results/with_noise/"
 path_without = common_path + "KTC/"
@@ -125,50 +100,32 @@ path_model_adjusted = "../models/Model2D_7Dof_3C_5M_CL_V3_V3D.bioMod"
 model_adjusted = biorbd.Model(path_model_adjusted)
 
 CONSIDER_ONLY_CONVERGED = True
-if CONSIDER_ONLY_CONVERGED:
-    end_file = "CVG.pkl"
-else:
-    end_file = ".pkl"
 
 biorbd_model_path = (PATH_MODEL_1_CONTACT, PATH_MODEL, PATH_MODEL, PATH_MODEL, PATH_MODEL_1_CONTACT)
 phase_time = (0.2, 0.2, 0.3, 0.3, 0.3)
 n_shooting = (20, 20, 30, 30, 30)
 
-min_cost_without = np.inf
-for file in os.listdir(path_without):
-    if file.endswith(end_file):
-        data = pd.read_pickle(path_without + file)
-        if data["cost"] < min_cost_without:
-            min_cost_without = data["cost"]
-            sol_without = path_without + file
-            # bioptim_sol_path = path_without + file.replace(".pkl", "_sol.pkl")
-            # with open(bioptim_sol_path, "rb") as f:
-            #     bioptim_sol_without = pickle.load(f)
-            # bioptim_sol_without.ocp = prepare_ocp_without(biorbd_model_path, phase_time, n_shooting, False, 0)
-            # bioptim_sol_without.detailed_cost()
+campaign_index = CampaignIndex.from_pickles(common_path)
+best_without = campaign_index.require_best("KTC", converged_only=CONSIDER_ONLY_CONVERGED)
+min_cost_without, sol_without = best_without["cost"], campaign_index.path(best_without)
+# bioptim_sol_path = sol_without.replace(".pkl", "_sol.pkl")
+# with open(bioptim_sol_path, "rb") as f:
+#     bioptim_sol_without = pickle.load(f)
+# bioptim_sol_without.ocp = prepare_ocp_without(biorbd_model_path, phase_time, n_shooting, False, 0)
+# bioptim_sol_without.detailed_cost()
 print("Min cost without: ", min_cost_without)
 
-min_cost_CL = np.inf
-for file in os.listdir(path_CL):
-    if file.endswith(end_file):
-        data = pd.read_pickle(path_CL + file)
-        if data["cost"] < min_cost_CL:
-            min_cost_CL = data["cost"]
-            sol_CL = path_CL + file
+best_CL = campaign_index.require_best("HTC", converged_only=CONSIDER_ONLY_CONVERGED)
+min_cost_CL, sol_CL = best_CL["cost"], campaign_index.path(best_CL)
 print("Min cost CL: ", min_cost_CL)
 
-min_cost_free = np.inf
-for file in os.listdir(path_free):
-    if file.endswith(end_file):
-        data = pd.read_pickle(path_free + file)
-        if data["cost"] < min_cost_free:
-            min_cost_free = data["cost"]
-            sol_free = path_free + file
+best_free = campaign_index.require_best("NTC", converged_only=CONSIDER_ONLY_CONVERGED)
+min_cost_free, sol_free = best_free["cost"], campaign_index.path(best_free)
 print("Min cost free: ", min_cost_free)
 
-data_CL = pd.read_pickle(sol_CL)
-data_without = pd.read_pickle(sol_without)
-data_free = pd.read_pickle(sol_free)
+data_CL = SolutionRecord(sol_CL)
+data_without = SolutionRecord(sol_without)
+data_free = SolutionRecord(sol_free)
 
 print("Computational time without: ", data_without["real_time_to_optimize"] / 60, "min")
 print("Computational time CL: ", data_CL["real_time_to_optimize"] / 60, "min")
@@ -643,94 +600,9 @@ if PLOT_TAU_FLAG:
     fig.savefig("qdot" + "." + format_graph, format=format_graph, dpi=300)
 
     # Figure tau
-    tau_CL_min_bound = np.zeros((5, tau_CL.shape[1]))
-    tau_CL_max_bound = np.zeros((5, tau_CL.shape[1]))
-    tau_without_min_bound = np.zeros((5, tau_without.shape[1]))
-    tau_without_max_bound = np.zeros((5, tau_without.shape[1]))
-    tau_free_min_bound = np.zeros((5, tau_free.shape[1]))
-    tau_free_max_bound = np.zeros((5, tau_free.shape[1]))
-    for i_dof, key in enumerate(ACTUATORS.keys()):
-        # Change the sign of the theta_opt for the knee
-        if i_dof == 3:
-            true_min_CL = -actuator_function(
-                ACTUATORS[key].tau_max_minus,
-                ACTUATORS[key].theta_opt_minus,
-                ACTUATORS[key].r_minus,
-                -q_CL_rad[i_dof + 3],
-            )
-            true_max_CL = actuator_function(
-                ACTUATORS[key].tau_max_plus,
-                ACTUATORS[key].theta_opt_plus,
-                ACTUATORS[key].r_plus,
-                -q_CL_rad[i_dof + 3],
-            )
-            true_min_without = -actuator_function(
-                ACTUATORS[key].tau_max_minus,
-                ACTUATORS[key].theta_opt_minus,
-                ACTUATORS[key].r_minus,
-                -q_without_rad[i_dof + 3],
-            )
-            true_max_without = actuator_function(
-                ACTUATORS[key].tau_max_plus,
-                ACTUATORS[key].theta_opt_plus,
-                ACTUATORS[key].r_plus,
-                -q_without_rad[i_dof + 3],
-            )
-            true_min_free = -actuator_function(
-                ACTUATORS[key].tau_max_minus,
-                ACTUATORS[key].theta_opt_minus,
-                ACTUATORS[key].r_minus,
-                -q_free_rad[i_dof + 3],
-            )
-            true_max_free = actuator_function(
-                ACTUATORS[key].tau_max_plus,
-                ACTUATORS[key].theta_opt_plus,
-                ACTUATORS[key].r_plus,
-                -q_free_rad[i_dof + 3],
-            )
-            tau_CL_min_bound[i_dof, :] = -true_max_CL
-            tau_CL_max_bound[i_dof, :] = -true_min_CL
-            tau_without_min_bound[i_dof, :] = -true_max_without
-            tau_without_max_bound[i_dof, :] = -true_min_without
-            tau_free_min_bound[i_dof, :] = -true_max_free
-            tau_free_max_bound[i_dof, :] = -true_min_free
-        else:
-            tau_CL_min_bound[i_dof, :] = -actuator_function(
-                ACTUATORS[key].tau_max_minus,
-                ACTUATORS[key].theta_opt_minus,
-                ACTUATORS[key].r_minus,
-                q_CL_rad[i_dof + 3],
-            )
-            tau_CL_max_bound[i_dof, :] = actuator_function(
-                ACTUATORS[key].tau_max_plus,
-                ACTUATORS[key].theta_opt_plus,
-                ACTUATORS[key].r_plus,
-                q_CL_rad[i_dof + 3],
-            )
-            tau_without_min_bound[i_dof, :] = -actuator_function(
-                ACTUATORS[key].tau_max_minus,
-                ACTUATORS[key].theta_opt_minus,
-                ACTUATORS[key].r_minus,
-                q_without_rad[i_dof + 3],
-            )
-            tau_without_max_bound[i_dof, :] = actuator_function(
-                ACTUATORS[key].tau_max_plus,
-                ACTUATORS[key].theta_opt_plus,
-                ACTUATORS[key].r_plus,
-                q_without_rad[i_dof + 3],
-            )
-            tau_free_min_bound[i_dof, :] = -actuator_function(
-                ACTUATORS[key].tau_max_minus,
-                ACTUATORS[key].theta_opt_minus,
-                ACTUATORS[key].r_minus,
-                q_free_rad[i_dof + 3],
-            )
-            tau_free_max_bound[i_dof, :] = actuator_function(
-                ACTUATORS[key].tau_max_plus,
-                ACTUATORS[key].theta_opt_plus,
-                ACTUATORS[key].r_plus,
-                q_free_rad[i_dof + 3],
-            )
+    tau_CL_min_bound, tau_CL_max_bound = torque_bounds(q_CL_rad)
+    tau_without_min_bound, tau_without_max_bound = torque_bounds(q_without_rad)
+    tau_free_min_bound, tau_free_max_bound = torque_bounds(q_free_rad)
 
     # Figure tau
     fig, axs = plt.subplots(2, 3, figsize=(10, 4))
@@ -902,9 +774,9 @@ if PLOT_TAU_FLAG:
     fig.savefig("tau" + "." + format_graph, format=format_graph, dpi=300)
 
     # Tau ratio all phases
-    tau_CL_ratio_all = np.zeros(tau_CL.shape)
-    tau_without_ratio_all = np.zeros(tau_without.shape)
-    tau_free_ratio_all = np.zeros(tau_free.shape)
+    tau_CL_ratio_all = torque_ratios(tau_CL, tau_CL_min_bound, tau_CL_max_bound)
+    tau_without_ratio_all = torque_ratios(tau_without, tau_without_min_bound, tau_without_max_bound)
+    tau_free_ratio_all = torque_ratios(tau_free, tau_free_min_bound, tau_free_max_bound)
 
     fig, axs = plt.subplots(2, 2, figsize=(10, 4))
     axs[0, 0].plot(
@@ -954,23 +826,6 @@ if PLOT_TAU_FLAG:
     )
     plot_all_lines(time_end_phase_CL, time_end_phase_without, time_end_phase_free, axs[0, 0])
 
-    for i_dof in range(5):
-        for i_node in range(tau_CL.shape[1]):
-            if tau_CL[i_dof, i_node] > 0:
-                tau_CL_ratio_all[i_dof, i_node] = tau_CL[i_dof, i_node] / tau_CL_max_bound[i_dof, i_node]
-            else:
-                tau_CL_ratio_all[i_dof, i_node] = np.abs(tau_CL[i_dof, i_node] / tau_CL_min_bound[i_dof, i_node])
-            if tau_without[i_dof, i_node] > 0:
-                tau_without_ratio_all[i_dof, i_node] = tau_without[i_dof, i_node] / tau_without_max_bound[i_dof, i_node]
-            else:
-                tau_without_ratio_all[i_dof, i_node] = np.abs(
-                    tau_without[i_dof, i_node] / tau_without_min_bound[i_dof, i_node]
-                )
-            if tau_free[i_dof, i_node] > 0:
-                tau_free_ratio_all[i_dof, i_node] = tau_free[i_dof, i_node] / tau_free_max_bound[i_dof, i_node]
-            else:
-                tau_free_ratio_all[i_dof, i_node] = np.abs(tau_free[i_dof, i_node] / tau_free_min_bound[i_dof, i_node])
-
     axs[1, 0].plot(
         time_vector_free,
         np.sum(np.abs(tau_free_ratio_all), axis=0),
@@ -1076,23 +931,6 @@ if PLOT_TAU_FLAG:
 
     fig, axs = plt.subplots(1, 1, figsize=(10, 4))
 
-    for i_dof in range(5):
-        for i_node in range(tau_CL.shape[1]):
-            if tau_CL[i_dof, i_node] > 0:
-                tau_CL_ratio_all[i_dof, i_node] = tau_CL[i_dof, i_node] / tau_CL_max_bound[i_dof, i_node]
-            else:
-                tau_CL_ratio_all[i_dof, i_node] = np.abs(tau_CL[i_dof, i_node] / tau_CL_min_bound[i_dof, i_node])
-            if tau_without[i_dof, i_node] > 0:
-                tau_without_ratio_all[i_dof, i_node] = tau_without[i_dof, i_node] / tau_without_max_bound[i_dof, i_node]
-            else:
-                tau_without_ratio_all[i_dof, i_node] = np.abs(
-                    tau_without[i_dof, i_node] / tau_without_min_bound[i_dof, i_node]
-                )
-            if tau_free[i_dof, i_node] > 0:
-                tau_free_ratio_all[i_dof, i_node] = tau_free[i_dof, i_node] / tau_free_max_bound[i_dof, i_node]
-            else:
-                tau_free_ratio_all[i_dof, i_node] = np.abs(tau_free[i_dof, i_node] / tau_free_min_bound[i_dof, i_node])
-
     axs.plot(
         time_vector_free,
         np.abs(tau_free_ratio_all[3, :]),
@@ -1266,18 +1104,14 @@ if PLOT_TAU_FLAG:
 
 
 if PLOT_INERTIA_FLAG:
-    data_CL = pd.read_pickle(sol_CL)
-    data_without = pd.read_pickle(sol_without)
-    data_free = pd.read_pickle(sol_free)
+    data_CL = SolutionRecord(sol_CL)
+    data_without = SolutionRecord(sol_without)
+    data_free = SolutionRecord(sol_free)
 
     # Inertia
-    inertia_CL = np.zeros((data_CL["q_all"].shape[1], 3))
-    inertia_without = np.zeros((data_without["q_all"].shape[1], 3))
-    inertia_free = np.zeros((data_free["q_all"].shape[1], 3))
-    for i in range(data_CL["q_all"].shape[1]):
-        inertia_CL[i, :] = np.diagonal(model.bodyInertia(data_CL["q_all"][:, i]).to_array()).T
-        inertia_without[i, :] = np.diagonal(model.bodyInertia(data_without["q_all"][:, i]).to_array()).T
-        inertia_free[i, :] = np.diagonal(model.bodyInertia(data_free["q_all"][:, i]).to_array()).T
+    inertia_CL = data_CL.inertia
+    inertia_without = data_without.inertia
+    inertia_free = data_free.inertia
 
     fig, ax = plt.subplots(4, 1, figsize=(8, 9))
     ax[0].plot(
@@ -1333,26 +1167,10 @@ if PLOT_INERTIA_FLAG:
     ax[0].legend(bbox_to_anchor=(1.1, 1.45), ncol=3)
 
     # Angular momentum
-    # Adjust the DoFs to add a free floating base to work around a bug in biornd
-    ang_mom_CL = np.zeros((data_CL["q_all"].shape[1], 3))
-    ang_mom_without = np.zeros((data_without["q_all"].shape[1], 3))
-    ang_mom_free = np.zeros((data_free["q_all"].shape[1], 3))
-
-    adjusted_q_without = adjust_q_with_full_floating_base(data_without["q_all"])
-    adjusted_qdot_without = adjust_q_with_full_floating_base(data_without["qdot_all"])
-    adjusted_q_CL = adjust_q_with_full_floating_base(data_CL["q_all"])
-    adjusted_qdot_CL = adjust_q_with_full_floating_base(data_CL["qdot_all"])
-    adjusted_q_free = adjust_q_with_full_floating_base(data_free["q_all"])
-    adjusted_qdot_free = adjust_q_with_full_floating_base(data_free["qdot_all"])
-
-    for i in range(data_CL["q_all"].shape[1]):
-        ang_mom_CL[i, :] = model_adjusted.angularMomentum(adjusted_q_CL[:, i], adjusted_qdot_CL[:, i], True).to_array()
-        ang_mom_without[i, :] = model_adjusted.angularMomentum(
-            adjusted_q_without[:, i], adjusted_qdot_without[:, i], True
-        ).to_array()
-        ang_mom_free[i, :] = model_adjusted.angularMomentum(
-            adjusted_q_free[:, i], adjusted_qdot_free[:, i], True
-        ).to_array()
+    # The DoFs are adjusted to add a free floating base to work around a bug in biorbd (see SolutionRecord)
+    ang_mom_CL = data_CL.angular_momentum
+    ang_mom_without = data_without.angular_momentum
+    ang_mom_free = data_free.angular_momentum
 
     ax[1].plot(
         time_vector_free,
@@ -1547,15 +1365,12 @@ if PLOT_INERTIA_FLAG:
     print("Max centrifugal pseudo-force free: ", np.max(centricugal_free))
 
 if PLOT_ENERY_FLAG:
-    power_without = np.abs(tau_without * qdot_without_rad[3:, :])
-    power_free = np.abs(tau_free * qdot_free_rad[3:, :])
-    power_CL = np.abs(tau_CL * qdot_CL_rad[3:, :])
-    power_total_without = np.sum(power_without, axis=0)
-    power_total_free = np.sum(power_free, axis=0)
-    power_total_CL = np.sum(power_CL, axis=0)
-    energy_without = np.trapezoid(power_total_without, time_vector_without)
-    energy_free = np.trapezoid(power_total_free, time_vector_free)
-    energy_CL = np.trapezoid(power_total_CL, time_vector_CL)
+    power_total_without = np.sum(data_without.power, axis=0)
+    power_total_free = np.sum(data_free.power, axis=0)
+    power_total_CL = np.sum(data_CL.power, axis=0)
+    energy_without = data_without.energy
+    energy_free = data_free.energy
+    energy_CL = data_CL.energy
 
     print("Energy CL : ", energy_CL, "J")
     print("Energy without : ", energy_without, "J")
@@ -1,64 +1,41 @@
 from contextlib import redirect_stdout
 import os
 
-import numpy as np
 import pickle
 
 from examples.somersault_taudot import prepare_ocp as prepare_ocp_free
 from examples.somersault_htc_taudot import prepare_ocp as prepare_ocp_HTC
 from examples.somersault_ktc_taudot import prepare_ocp as prepare_ocp_KTC
+from src.campaign_index import CampaignIndex
 from src.constants import PATH_MODEL, PATH_MODEL_1_CONTACT
+from src.slim_solution import load_slim_solution, save_slim_solution, print_detailed_cost
 
 biorbd_model_path = (PATH_MODEL_1_CONTACT, PATH_MODEL, PATH_MODEL, PATH_MODEL, PATH_MODEL_1_CONTACT)
 phase_time = (0.2, 0.2, 0.3, 0.3, 0.3)
 n_shooting = (20, 20, 30, 30, 30)
 
 folder = "with_noise_same_computer/"
-folder_HTC = folder + "HTC"
-folder_KTC = folder + "KTC"
-folder_FREE = folder + "NTC"
 
-file_idx = []
-for config, (folder, str_suffix) in enumerate(zip([folder_KTC, folder_FREE, folder_HTC], ["KTC", "NTC", "HTC"])):
-    n_files = len([name for name in os.listdir(folder) if name.endswith("_CVG.pkl")])
-    smallest_idx, smallest_value = 0, np.inf
-    for i in range(0, n_files):
-        data = pickle.load(open(folder + f"/sol_{i}_CVG.pkl", "rb"))
-        if data["cost"] < smallest_value:
-            smallest_value = data["cost"]
-            smallest_idx = i
-            print(f"New smallest value of {str_suffix} : {smallest_value} at index {smallest_idx}")
-    file_idx.append(smallest_idx)
-
-zipped = zip(
-    [folder_KTC, folder_FREE, folder_HTC],
-    ["KTC", "NTC", "HTC"],
-    [prepare_ocp_KTC, prepare_ocp_free, prepare_ocp_HTC],
-    file_idx,
-)
-
-data = pickle.load(open(folder_KTC + f"/sol_{file_idx[0]}_CVG.pkl", "rb"))
-sol = pickle.load(open(folder_KTC + f"/sol_{file_idx[0]}_CVG_sol.pkl", "rb"))
-sol.ocp = prepare_ocp_KTC(biorbd_model_path, phase_time, n_shooting, WITH_MULTI_START=False)
-
-sol.print_cost()
-with open(f"best_objectives_and_constraints_KTC.txt", "w") as f:
-    with redirect_stdout(f):
-        sol.print_cost()
-
-
-data = pickle.load(open(folder_FREE + f"/sol_{file_idx[1]}_CVG.pkl", "rb"))
-sol = pickle.load(open(folder_FREE + f"/sol_{file_idx[1]}_CVG_sol.pkl", "rb"))
-sol.ocp = prepare_ocp_free(biorbd_model_path, phase_time, n_shooting, WITH_MULTI_START=False)
-
-with open(f"best_objectives_and_constraints_NTC.txt", "w") as f:
-    with redirect_stdout(f):
-        sol.print_cost()
-
-data = pickle.load(open(folder_HTC + f"/sol_{file_idx[1]}_CVG.pkl", "rb"))
-sol = pickle.load(open(folder_HTC + f"/sol_{file_idx[1]}_CVG_sol.pkl", "rb"))
-sol.ocp = prepare_ocp_HTC(biorbd_model_path, phase_time, n_shooting, WITH_MULTI_START=False)
-
-with open(f"best_objectives_and_constraints_HTC.txt", "w") as f:
-    with redirect_stdout(f):
-        sol.print_cost()
+campaign_index = CampaignIndex.from_pickles(folder)
+for str_suffix, prepare_ocp in zip(["KTC", "NTC", "HTC"], [prepare_ocp_KTC, prepare_ocp_free, prepare_ocp_HTC]):
+    best = campaign_index.best(str_suffix)
+    if best is None:
+        print(f"No converged solution of {str_suffix} in {folder}")
+        continue
+    print(f"Smallest value of {str_suffix} : {best['cost']} at index {best['seed']}")
+
+    # The compact solution is always saved next to the pickles, even for the entries of the columnar store
+    file_path = os.path.join(folder, str_suffix, f"sol_{best['seed']}_{'CVG' if best['status'] == 0 else 'DVG'}.pkl")
+    slim_path = file_path.replace(".pkl", "_slim.pkl")
+    if os.path.exists(slim_path):
+        slim = load_slim_solution(slim_path)
+    else:
+        # Campaigns saved with the whole Solution: the ocp is rebuilt once and the compact solution is saved
+        sol = pickle.load(open(file_path.replace(".pkl", "_sol.pkl"), "rb"))
+        sol.ocp = prepare_ocp(biorbd_model_path, phase_time, n_shooting, WITH_MULTI_START=False)
+        slim = save_slim_solution(sol, slim_path)
+
+    print_detailed_cost(slim)
+    with open(f"best_objectives_and_constraints_{str_suffix}.txt", "w") as f:
+        with redirect_stdout(f):
+            print_detailed_cost(slim)
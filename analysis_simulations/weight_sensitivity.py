@@ -0,0 +1,80 @@
+"""
+This script sweeps the weights of the objectives of each condition (NTC, KTC, HTC) on the same latin hypercube (or grid)
+of scale factors of the nominal WEIGHTS, each sample being warm started from the nominal solution of its condition.
+It writes one row per condition and sample to weight_sensitivity.csv and prints, for each sample, the HTC / KTC
+ratios of the cost and of the energy of the actuators, to check if the advantage of the HTC holds away from the nominal
+weights.
+"""
+
+import numpy as np
+from bioptim import Solver
+
+from examples.somersault_htc_taudot import prepare_ocp as prepare_ocp_htc
+from examples.somersault_ktc_taudot import prepare_ocp as prepare_ocp_ktc
+from examples.somersault_taudot import prepare_ocp as prepare_ocp_ntc
+from src.constants import PATH_MODEL, PATH_MODEL_1_CONTACT
+from src.weight_sensitivity import weight_grid, weight_latin_hypercube, weight_sweep, write_table
+
+CONDITIONS = {"NTC": prepare_ocp_ntc, "KTC": prepare_ocp_ktc, "HTC": prepare_ocp_htc}
+BIORBD_MODEL_PATH = (PATH_MODEL_1_CONTACT, PATH_MODEL, PATH_MODEL, PATH_MODEL, PATH_MODEL_1_CONTACT)
+PHASE_TIME = (0.2, 0.2, 0.3, 0.3, 0.3)
+N_SHOOTING = (20, 20, 30, 30, 30)
+
+# Scale factors of the nominal weights: (low, high) for the latin hypercube, the values of each axis for the grid
+FACTOR_BOUNDS = {
+    "0_TIME": (0.1, 10),
+    "2_TORQUE_RATIO": (0.1, 10),
+    "4_STATE": (0.1, 10),
+    "TAUDOT": (0.1, 10),
+}
+GRID_FACTORS = None  # e.g. {"TAUDOT": (0.1, 1, 10), "2_TORQUE_RATIO": (0.1, 1, 10)}, None for the latin hypercube
+N_SAMPLES = 16
+SAMPLING_SEED = 0
+N_WORKERS = 4
+N_THREADS = 8
+RESULTS_FILE = "weight_sensitivity.csv"
+
+
+def main():
+    solver = Solver.IPOPT(_linear_solver="MA57", show_online_optim=False)
+    solver.set_maximum_iterations(10000)
+    solver.set_bound_frac(1e-8)
+    solver.set_bound_push(1e-8)
+    solver.set_tol(1e-6)
+    solver.set_print_level(0)
+
+    if GRID_FACTORS is not None:
+        overrides = weight_grid(GRID_FACTORS)
+    else:
+        overrides = weight_latin_hypercube(FACTOR_BOUNDS, N_SAMPLES, SAMPLING_SEED)
+
+    rows = []
+    for condition, prepare_ocp in CONDITIONS.items():
+        combinatorial_parameters = (BIORBD_MODEL_PATH, PHASE_TIME, N_SHOOTING, False)
+        sweep = weight_sweep(prepare_ocp, combinatorial_parameters, overrides, solver, N_WORKERS, n_threads=N_THREADS)
+        rows += [{"condition": condition} | row for row in sweep]
+    write_table(rows, RESULTS_FILE)
+
+    by_sample = {(row["condition"], row["sample"]): row for row in rows}
+    print(f"{'sample':>7}{'HTC CVG':>9}{'KTC CVG':>9}{'cost HTC/KTC':>14}{'energy HTC/KTC':>16}")
+    ratios = []
+    for sample in range(-1, len(overrides)):
+        htc, ktc = by_sample[("HTC", sample)], by_sample[("KTC", sample)]
+        cost_ratio = htc["cost"] / ktc["cost"]
+        energy_ratio = htc["energy"] / ktc["energy"]
+        if htc["converged"] and ktc["converged"]:
+            ratios.append((cost_ratio, energy_ratio))
+        print(
+            f"{'nominal' if sample == -1 else sample:>7}{htc['converged']:>9}{ktc['converged']:>9}"
+            f"{cost_ratio:>14.3f}{energy_ratio:>16.3f}"
+        )
+
+    if ratios:
+        ratios = np.array(ratios)
+        print(f"Samples where both converged: {len(ratios)}")
+        print(f"HTC cost lower than KTC: {np.mean(ratios[:, 0] < 1):.0%}")
+        print(f"HTC energy lower than KTC: {np.mean(ratios[:, 1] < 1):.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+This script runs a small multi-start campaign of each condition (NTC, KTC, HTC) with each envelope of the actuator
+torque-ratio objectives (the non-smooth switch and the smooth tanh and softplus envelopes).
+It reports, for each condition and envelope, the convergence rate of the seeds and their number of IPOPT iterations.
+"""
+
+import numpy as np
+from bioptim import Solver
+
+from examples.somersault_htc_taudot import prepare_ocp as prepare_ocp_htc
+from examples.somersault_ktc_taudot import prepare_ocp as prepare_ocp_ktc
+from examples.somersault_taudot import prepare_ocp as prepare_ocp_ntc
+from src.constants import PATH_MODEL, PATH_MODEL_1_CONTACT
+from src.objectives import ACTUATOR_ENVELOPES
+
+CONDITIONS = {"NTC": prepare_ocp_ntc, "KTC": prepare_ocp_ktc, "HTC": prepare_ocp_htc}
+SEEDS = list(range(10))
+
+
+def benchmark(prepare_ocp, envelope: str, solver: Solver.IPOPT) -> dict:
+    biorbd_model_path = (PATH_MODEL_1_CONTACT, PATH_MODEL, PATH_MODEL, PATH_MODEL, PATH_MODEL_1_CONTACT)
+    phase_time = (0.2, 0.2, 0.3, 0.3, 0.3)
+    n_shooting = (20, 20, 30, 30, 30)
+
+    status = []
+    iterations = []
+    solve_time = []
+    for seed in SEEDS:
+        ocp = prepare_ocp(biorbd_model_path, phase_time, n_shooting, True, seed, envelope=envelope)
+        sol = ocp.solve(solver)
+        status.append(sol.status)
+        iterations.append(sol.iterations)
+        solve_time.append(sol.real_time_to_optimize)
+
+    converged = np.array(status) == 0
+    iterations = np.array(iterations)
+    return {
+        "convergence_rate": float(np.mean(converged)),
+        "mean_iterations": float(np.mean(iterations)),
+        "median_iterations": float(np.median(iterations)),
+        "mean_iterations_converged": float(np.mean(iterations[converged])) if np.any(converged) else np.nan,
+        "mean_solve_time": float(np.mean(solve_time)),
+    }
+
+
+def main():
+    solver = Solver.IPOPT(_linear_solver="MA57", show_online_optim=False)
+    solver.set_maximum_iterations(10000)
+    solver.set_bound_frac(1e-8)
+    solver.set_bound_push(1e-8)
+    solver.set_tol(1e-6)
+    solver.set_print_level(0)
+
+    print(
+        f"{'condition':<11}{'envelope':<10}{'CVG rate':>10}{'mean iter':>11}"
+        f"{'median iter':>13}{'mean iter CVG':>15}{'mean solve [s]':>16}"
+    )
+    for condition, prepare_ocp in CONDITIONS.items():
+        for envelope in ACTUATOR_ENVELOPES:
+            result = benchmark(prepare_ocp, envelope, solver)
+            print(
+                f"{condition:<11}"
+                f"{envelope:<10}"
+                f"{result['convergence_rate']:>10.0%}"
+                f"{result['mean_iterations']:>11.1f}"
+                f"{result['median_iterations']:>13.1f}"
+                f"{result['mean_iterations_converged']:>15.1f}"
+                f"{result['mean_solve_time']:>16.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+This script compares the implementations of the actuator torque-ratio objective: the former loop over the joints
+(one if_else and two envelopes per joint) and the vectorized objective with each envelope (switch, tanh, softplus).
+It reports the time to build the objective over all the nodes of a phase with its hessian (as done for the NLP),
+the size of the graph and the evaluation time of the hessian.
+"""
+
+import time
+import timeit
+
+import casadi as cas
+import numpy as np
+
+from src.actuator_constants import ACTUATORS
+from src.actuators import actuator_function
+from src.constants import POSE_TUCKING_START
+from src.objectives import ACTUATOR_ENVELOPES, actuator_torque_ratios_squared
+
+N_NODES = 150
+N_EVALUATIONS = 100
+SHARPNESS = 1.0
+
+
+def loop_torque_ratios_squared(q_joints: cas.MX, tau: cas.MX, actuators) -> cas.MX:
+    """The former implementation, one if_else per joint"""
+    out = 0
+    for i, key in enumerate(actuators.keys()):
+        current_max_tau = cas.if_else(
+            tau[i] > 0,
+            actuator_function(
+                actuators[key].tau_max_plus, actuators[key].theta_opt_plus, actuators[key].r_plus, q_joints[i]
+            ),
+            actuator_function(
+                actuators[key].tau_max_minus, actuators[key].theta_opt_minus, actuators[key].r_minus, q_joints[i]
+            ),
+        )
+        out += (tau[i] / current_max_tau) ** 2
+    return cas.sum1(out)
+
+
+IMPLEMENTATIONS = {"loop": loop_torque_ratios_squared} | {
+    envelope: lambda q, tau, actuators, envelope=envelope: actuator_torque_ratios_squared(
+        q, tau, actuators, envelope, SHARPNESS
+    )
+    for envelope in ACTUATOR_ENVELOPES
+}
+
+
+def benchmark(torque_ratios_squared) -> dict:
+    n_actuators = len(ACTUATORS)
+    q = cas.MX.sym("q", n_actuators, N_NODES)
+    tau = cas.MX.sym("tau", n_actuators, N_NODES)
+    x = cas.vertcat(cas.vec(q), cas.vec(tau))
+
+    tic = time.perf_counter()
+    # Squared again, as the objective is declared with quadratic=True
+    objective = sum(torque_ratios_squared(q[:, node], tau[:, node], ACTUATORS) ** 2 for node in range(N_NODES))
+    hessian_function = cas.Function("hessian", [x], [cas.hessian(objective, x)[0]]).expand()
+    build_time = time.perf_counter() - tic
+
+    q_num = np.tile(np.array(POSE_TUCKING_START)[3:, np.newaxis], (1, N_NODES))
+    tau_num = np.linspace(-50, 50, n_actuators * N_NODES).reshape(n_actuators, N_NODES)
+    x_num = np.concatenate([q_num.flatten(order="F"), tau_num.flatten(order="F")])
+
+    return {
+        "build_time": build_time,
+        "n_instructions": hessian_function.n_instructions(),
+        "hessian_nnz": hessian_function.sparsity_out(0).nnz(),
+        "hessian_time": timeit.timeit(lambda: hessian_function(x_num), number=N_EVALUATIONS) / N_EVALUATIONS,
+        "objective": float(cas.Function("objective", [x], [objective])(x_num)),
+    }
+
+
+def main():
+    results = {name: benchmark(implementation) for name, implementation in IMPLEMENTATIONS.items()}
+
+    print(
+        f"{'implementation':<18}{'build [s]':>11}{'instructions':>14}"
+        f"{'hessian nnz':>13}{'hessian [us]':>14}{'objective':>14}"
+    )
+    for name, result in results.items():
+        print(
+            f"{name:<18}"
+            f"{result['build_time']:>11.3f}"
+            f"{result['n_instructions']:>14}"
+            f"{result['hessian_nnz']:>13}"
+            f"{result['hessian_time'] * 1e6:>14.2f}"
+            f"{result['objective']:>14.6f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+This script compares the two formulations of the tucked phase of the HTC problem:
+- the dependent joints q_v computed from the independent joints q_u inside the dynamics (explicit, default)
+- the dependent joints q_v as states integrated with qdot_v = B_vu qdot_u, the holonomic constraints being enforced as
+  path constraints at the nodes
+It reports the number of IPOPT iterations, the total time and the time per iteration of each formulation.
+"""
+
+import time
+
+from bioptim import Solver
+
+from examples.somersault_htc_taudot import prepare_ocp
+from src.constants import PATH_MODEL, PATH_MODEL_1_CONTACT
+
+FORMULATIONS = {"explicit q_v": False, "algebraic q_v": True}
+
+
+def benchmark(algebraic_q_v: bool, solver: Solver.IPOPT) -> dict:
+    biorbd_model_path = (PATH_MODEL_1_CONTACT, PATH_MODEL, PATH_MODEL, PATH_MODEL, PATH_MODEL_1_CONTACT)
+    phase_time = (0.2, 0.2, 0.3, 0.3, 0.3)
+    n_shooting = (20, 20, 30, 30, 30)
+
+    tic = time.perf_counter()
+    ocp = prepare_ocp(biorbd_model_path, phase_time, n_shooting, WITH_MULTI_START=False, algebraic_q_v=algebraic_q_v)
+    preparation_time = time.perf_counter() - tic
+
+    sol = ocp.solve(solver)
+
+    return {
+        "status": sol.status,
+        "cost": float(sol.cost),
+        "iterations": sol.iterations,
+        "preparation_time": preparation_time,
+        "solve_time": sol.real_time_to_optimize,
+        "time_per_iteration": sol.real_time_to_optimize / max(sol.iterations, 1),
+    }
+
+
+def main():
+    solver = Solver.IPOPT(_linear_solver="MA57", show_online_optim=False)
+    solver.set_maximum_iterations(10000)
+    solver.set_bound_frac(1e-8)
+    solver.set_bound_push(1e-8)
+    solver.set_tol(1e-6)
+    solver.set_print_level(0)
+
+    results = {name: benchmark(algebraic_q_v, solver) for name, algebraic_q_v in FORMULATIONS.items()}
+
+    print(
+        f"{'formulation':<16}{'status':>8}{'cost':>14}{'iterations':>12}"
+        f"{'prepare [s]':>13}{'solve [s]':>12}{'per iter [ms]':>15}"
+    )
+    for name, result in results.items():
+        print(
+            f"{name:<16}"
+            f"{result['status']:>8}"
+            f"{result['cost']:>14.4f}"
+            f"{result['iterations']:>12}"
+            f"{result['preparation_time']:>13.2f}"
+            f"{result['solve_time']:>12.2f}"
+            f"{result['time_per_iteration'] * 1e3:>15.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
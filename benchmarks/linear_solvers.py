@@ -0,0 +1,95 @@
+"""
+This script compares the linear solvers of the holonomic model (explicit inverse, symbolic QR, structured solves)
+on the partitioned forward dynamics of the tucked phase: size of the expanded graph, evaluation time and hessian time.
+"""
+
+import timeit
+
+import numpy as np
+from bioptim import HolonomicConstraintsList, HolonomicConstraintsFcn
+from casadi import MX, Function, dot, hessian, vertcat
+
+from src.biorbd_model_holonomic_updated import BiorbdModelCustomHolonomic
+from src.constants import PATH_MODEL, POSE_TUCKING_START
+from src.linear_algebra import LINEAR_SOLVERS
+
+N_EVALUATIONS = 1000
+
+
+def holonomic_model(linear_solver: str) -> BiorbdModelCustomHolonomic:
+    """The model of the tucked phase of the HTC problem, with the selected linear solver"""
+    bio_model = BiorbdModelCustomHolonomic(PATH_MODEL)
+    holonomic_constraints = HolonomicConstraintsList()
+    holonomic_constraints.add(
+        "holonomic_constraints",
+        HolonomicConstraintsFcn.superimpose_markers,
+        biorbd_model=bio_model,
+        marker_1="BELOW_KNEE",
+        marker_2="CENTER_HAND",
+        index=slice(1, 3),
+        local_frame_index=11,
+    )
+    bio_model.set_holonomic_configuration(
+        constraints_list=holonomic_constraints,
+        independent_joint_index=[0, 1, 2, 5, 6, 7],
+        dependent_joint_index=[3, 4],
+    )
+    bio_model.set_linear_solver(linear_solver)
+    return bio_model
+
+
+def benchmark(linear_solver: str) -> dict:
+    bio_model = holonomic_model(linear_solver)
+
+    q_u = MX.sym("q_u", bio_model.nb_independent_joints, 1)
+    qdot_u = MX.sym("qdot_u", bio_model.nb_independent_joints, 1)
+    tau = MX.sym("tau", bio_model.nb_tau, 1)
+    multipliers = MX.sym("multipliers", bio_model.nb_independent_joints, 1)
+    x = vertcat(q_u, qdot_u, tau)
+
+    qddot_u = bio_model.partitioned_forward_dynamics(q_u, qdot_u, tau)
+    forward_dynamics = Function("forward_dynamics", [q_u, qdot_u, tau], [qddot_u]).expand()
+    # Hessian of the lagrangian term of the dynamics as seen by IPOPT
+    hessian_dynamics = Function(
+        "hessian_dynamics", [q_u, qdot_u, tau, multipliers], [hessian(dot(multipliers, qddot_u), x)[0]]
+    ).expand()
+
+    q_u_num = np.array(POSE_TUCKING_START)[bio_model.independent_joint_index]
+    qdot_u_num = np.ones(bio_model.nb_independent_joints)
+    tau_num = np.zeros(bio_model.nb_tau)
+    multipliers_num = np.ones(bio_model.nb_independent_joints)
+
+    return {
+        "n_instructions": forward_dynamics.n_instructions(),
+        "n_instructions_hessian": hessian_dynamics.n_instructions(),
+        "evaluation_time": timeit.timeit(lambda: forward_dynamics(q_u_num, qdot_u_num, tau_num), number=N_EVALUATIONS)
+        / N_EVALUATIONS,
+        "hessian_time": timeit.timeit(
+            lambda: hessian_dynamics(q_u_num, qdot_u_num, tau_num, multipliers_num), number=N_EVALUATIONS
+        )
+        / N_EVALUATIONS,
+        "qddot_u": forward_dynamics(q_u_num, qdot_u_num, tau_num).toarray().squeeze(),
+    }
+
+
+def main():
+    results = {linear_solver: benchmark(linear_solver) for linear_solver in LINEAR_SOLVERS}
+
+    print(f"{'linear solver':<15}{'instructions':>15}{'hessian instr.':>17}{'eval [us]':>12}{'hessian [us]':>15}")
+    for linear_solver, result in results.items():
+        print(
+            f"{linear_solver:<15}"
+            f"{result['n_instructions']:>15}"
+            f"{result['n_instructions_hessian']:>17}"
+            f"{result['evaluation_time'] * 1e6:>12.2f}"
+            f"{result['hessian_time'] * 1e6:>15.2f}"
+        )
+
+    # All the solvers must give the same dynamics
+    for linear_solver, result in results.items():
+        error = np.max(np.abs(result["qddot_u"] - results["inv"]["qddot_u"]))
+        print(f"Max difference of qddot_u between {linear_solver} and inv: {error:.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+This script measures the construction of the NLP of each condition (NTC, KTC, HTC) at several mesh sizes, multiples of
+the mesh of the campaigns (N_SHOOTING). Each ocp is built in a fresh process so that its peak resident memory is its
+own.
+It reports the construction time (and the sections of prepare_ocp), the peak RSS, the number of decision variables
+and constraints, and the nonzeros of the constraint jacobian and of the hessian of the lagrangian.
+The results are appended to nlp_build_results.jsonl with the git revision, to track regressions between commits.
+"""
+
+import json
+import multiprocessing
+import platform
+import resource
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import casadi as cas
+from bioptim.interfaces.ipopt_interface import IpoptInterface
+
+from examples.somersault_htc_taudot import prepare_ocp as prepare_ocp_htc
+from examples.somersault_ktc_taudot import prepare_ocp as prepare_ocp_ktc
+from examples.somersault_taudot import prepare_ocp as prepare_ocp_ntc
+from src.constants import PATH_MODEL, PATH_MODEL_1_CONTACT
+
+CONDITIONS = {"NTC": prepare_ocp_ntc, "KTC": prepare_ocp_ktc, "HTC": prepare_ocp_htc}
+BIORBD_MODEL_PATH = (PATH_MODEL_1_CONTACT, PATH_MODEL, PATH_MODEL, PATH_MODEL, PATH_MODEL_1_CONTACT)
+PHASE_TIME = (0.2, 0.2, 0.3, 0.3, 0.3)
+N_SHOOTING = (20, 20, 30, 30, 30)
+MESH_FACTORS = (0.5, 1, 2, 4)
+RESULTS_FILE = "nlp_build_results.jsonl"
+
+
+def scaled_n_shooting(factor: float) -> tuple:
+    return tuple(max(1, round(n * factor)) for n in N_SHOOTING)
+
+
+def peak_rss_mb() -> float:
+    """The peak resident memory of this process (ru_maxrss is in kB on Linux)"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def build(condition: str, factor: float) -> dict:
+    """Build the ocp of a condition on a scaled mesh, run in its own process"""
+    n_shooting = scaled_n_shooting(factor)
+    rss_before = peak_rss_mb()
+
+    tic = time.perf_counter()
+    ocp = CONDITIONS[condition](BIORBD_MODEL_PATH, PHASE_TIME, n_shooting, WITH_MULTI_START=False)
+    construction_time = time.perf_counter() - tic
+    peak_rss = peak_rss_mb()
+
+    # The NLP given to IPOPT
+    interface = IpoptInterface(ocp)
+    x = ocp.variables_vector
+    objective = cas.sum1(interface.dispatch_obj_func())
+    g, _ = interface.dispatch_bounds()
+    lam_g = cas.MX.sym("lam_g", g.shape[0])
+    lagrangian = objective + cas.dot(lam_g, g)
+
+    return {
+        "condition": condition,
+        "mesh_factor": factor,
+        "n_shooting": list(n_shooting),
+        "construction_time": construction_time,
+        "sections": dict(ocp.profiler.timings),
+        "rss_before_mb": rss_before,
+        "peak_rss_mb": peak_rss,
+        "n_variables": x.shape[0],
+        "n_constraints": g.shape[0],
+        "jacobian_nnz": cas.jacobian(g, x).nnz(),
+        "hessian_nnz": cas.hessian(lagrangian, x)[0].nnz(),
+    }
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    revision = git_revision()
+    context = multiprocessing.get_context("spawn")
+
+    results = []
+    for condition in CONDITIONS:
+        for factor in MESH_FACTORS:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                results.append(executor.submit(build, condition, factor).result())
+
+    print(
+        f"{'condition':<11}{'mesh':>6}{'build [s]':>11}{'assembly [s]':>14}{'peak RSS [MB]':>15}"
+        f"{'variables':>11}{'constraints':>13}{'jac nnz':>10}{'hess nnz':>10}"
+    )
+    for result in results:
+        print(
+            f"{result['condition']:<11}"
+            f"{result['mesh_factor']:>6}"
+            f"{result['construction_time']:>11.2f}"
+            f"{result['sections'].get('nlp_assembly', float('nan')):>14.2f}"
+            f"{result['peak_rss_mb']:>15.0f}"
+            f"{result['n_variables']:>11}"
+            f"{result['n_constraints']:>13}"
+            f"{result['jacobian_nnz']:>10}"
+            f"{result['hessian_nnz']:>10}"
+        )
+
+    with open(RESULTS_FILE, "a") as file:
+        for result in results:
+            record = {"revision": revision, "time": time.time(), "machine": platform.node()} | result
+            file.write(json.dumps(record) + "\n")
+
+
+if __name__ == "__main__":
+    main()
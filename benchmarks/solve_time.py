@@ -0,0 +1,159 @@
+"""
+This script solves a fixed set of seeds of each condition (NTC, KTC, HTC) one after the other with a fixed number of
+threads, so that the solve times are comparable between commits and machines.
+For each run it captures the IPOPT statistics: iterations, time in the function evaluations of CasADi versus the time
+left to IPOPT (mostly the linear solver) and the number of iterations in restoration phase (from the IPOPT output).
+It writes a json report (runs and mean/std/median/percentiles of each metric per condition) named after the git
+revision, and compares it with a previous report if COMPARE_WITH is set.
+"""
+
+import json
+import os
+import platform
+import re
+import subprocess
+import time
+
+import numpy as np
+from bioptim import Solver
+
+from examples.somersault_htc_taudot import prepare_ocp as prepare_ocp_htc
+from examples.somersault_ktc_taudot import prepare_ocp as prepare_ocp_ktc
+from examples.somersault_taudot import prepare_ocp as prepare_ocp_ntc
+from src.constants import PATH_MODEL, PATH_MODEL_1_CONTACT
+from src.profiling import ipopt_statistics
+
+CONDITIONS = {"NTC": prepare_ocp_ntc, "KTC": prepare_ocp_ktc, "HTC": prepare_ocp_htc}
+SEEDS = list(range(10))
+N_THREADS = 8
+BIORBD_MODEL_PATH = (PATH_MODEL_1_CONTACT, PATH_MODEL, PATH_MODEL, PATH_MODEL, PATH_MODEL_1_CONTACT)
+PHASE_TIME = (0.2, 0.2, 0.3, 0.3, 0.3)
+N_SHOOTING = (20, 20, 30, 30, 30)
+
+METRICS = (
+    "solve_time",
+    "iterations",
+    "t_wall_function_evaluations",
+    "t_wall_ipopt",
+    "restoration_iterations",
+    "converged",
+)
+PERCENTILES = (10, 25, 75, 90)
+# The report of a previous commit to compare with, None to only write the report of this commit
+COMPARE_WITH = None
+IPOPT_OUTPUT_FILE = "ipopt_output.txt"
+
+
+def restoration_iterations(output_file: str) -> int:
+    """The number of iterations in restoration phase, marked with an r after the iteration number in the IPOPT output"""
+    with open(output_file, "r") as file:
+        return sum(1 for line in file if re.match(r"^\s*\d+r\s", line))
+
+
+def solve(condition: str, seed: int, solver: Solver.IPOPT) -> dict:
+    ocp = CONDITIONS[condition](BIORBD_MODEL_PATH, PHASE_TIME, N_SHOOTING, True, seed, n_threads=N_THREADS)
+    sol = ocp.solve(solver)
+    statistics = ipopt_statistics(sol)
+    return {
+        "condition": condition,
+        "seed": seed,
+        "status": sol.status,
+        "converged": sol.status == 0,
+        "cost": float(sol.cost),
+        "iterations": sol.iterations,
+        "solve_time": sol.real_time_to_optimize,
+        "t_wall_function_evaluations": statistics.get("t_wall_function_evaluations"),
+        "t_wall_ipopt": statistics.get("t_wall_ipopt"),
+        "restoration_iterations": restoration_iterations(IPOPT_OUTPUT_FILE),
+        "ipopt_statistics": statistics,
+    }
+
+
+def summarize(runs: list[dict]) -> dict:
+    """The mean, std, median and percentiles of each metric of the runs"""
+    summary = {}
+    for metric in METRICS:
+        values = np.array([run[metric] for run in runs if run[metric] is not None], dtype=float)
+        if values.size == 0:
+            continue
+        summary[metric] = {
+            "mean": float(np.mean(values)),
+            "std": float(np.std(values)),
+            "median": float(np.median(values)),
+        } | {f"p{percentile}": float(np.percentile(values, percentile)) for percentile in PERCENTILES}
+    return summary
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report: dict, reference: dict):
+    """Print the relative change of the median and percentiles of each metric with respect to a reference report"""
+    print(f"\nComparison with {reference['revision']} (relative change of this revision, {report['revision']})")
+    print(f"{'condition':<11}{'metric':<30}{'median':>10}" + "".join(f"{f'p{p}':>10}" for p in PERCENTILES))
+    for condition, summary in report["summary"].items():
+        for metric, statistics in summary.items():
+            reference_statistics = reference["summary"].get(condition, {}).get(metric)
+            if reference_statistics is None:
+                continue
+            changes = [
+                (statistics[key] - reference_statistics[key]) / reference_statistics[key]
+                if reference_statistics[key]
+                else float("nan")
+                for key in ["median"] + [f"p{percentile}" for percentile in PERCENTILES]
+            ]
+            print(f"{condition:<11}{metric:<30}" + "".join(f"{change:>10.1%}" for change in changes))
+
+
+def main():
+    solver = Solver.IPOPT(_linear_solver="MA57", show_online_optim=False)
+    solver.set_maximum_iterations(10000)
+    solver.set_bound_frac(1e-8)
+    solver.set_bound_push(1e-8)
+    solver.set_tol(1e-6)
+    solver.set_print_level(0)
+    # The iterations are written to a file to count the restoration phases
+    solver.set_option_unsafe(IPOPT_OUTPUT_FILE, "output_file")
+    solver.set_option_unsafe(5, "file_print_level")
+
+    runs = [solve(condition, seed, solver) for condition in CONDITIONS for seed in SEEDS]
+    os.remove(IPOPT_OUTPUT_FILE)
+
+    report = {
+        "revision": git_revision(),
+        "time": time.time(),
+        "machine": platform.node(),
+        "n_threads": N_THREADS,
+        "seeds": SEEDS,
+        "runs": runs,
+        "summary": {
+            condition: summarize([run for run in runs if run["condition"] == condition]) for condition in CONDITIONS
+        },
+    }
+    with open(f"solve_time_{report['revision']}.json", "w") as file:
+        json.dump(report, file, indent=2)
+
+    print(f"{'condition':<11}{'CVG':>6}{'median solve [s]':>18}{'median iter':>13}{'median restoration':>20}")
+    for condition, summary in report["summary"].items():
+        print(
+            f"{condition:<11}"
+            f"{summary['converged']['mean']:>6.0%}"
+            f"{summary['solve_time']['median']:>18.2f}"
+            f"{summary['iterations']['median']:>13.0f}"
+            f"{summary['restoration_iterations']['median']:>20.0f}"
+        )
+    if "HTC" in report["summary"] and "KTC" in report["summary"]:
+        ratio = report["summary"]["HTC"]["solve_time"]["median"] / report["summary"]["KTC"]["solve_time"]["median"]
+        print(f"HTC / KTC median solve time: {ratio:.2f}")
+
+    if COMPARE_WITH is not None:
+        with open(COMPARE_WITH, "r") as file:
+            compare(report, json.load(file))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,9 @@ from bioptim import (
 from src.constants import (
     PATH_MODEL_1_CONTACT,
     PATH_MODEL,
+    MESH_REFINEMENT_FACTORS,
+    FRICTION_CONE_RELAXATIONS,
+    WARM_START_FOLDER,
 )
 
 from somersault_taudot import prepare_ocp as prepare_ocp_ntc
@@ -13,10 +16,23 @@ from somersault_ktc_taudot import prepare_ocp as prepare_ocp_with_ktc
 from src.save_results import save_results_taudot
 from src.save_results import save_results_holonomic_taudot
 
-from src.multistart import prepare_multi_start
-
-
-def main(prepare_ocp: Callable, save_results: Callable, multi_start: bool = False, condition: str = ""):
+from src.homotopy import KtcToHtcPrepareOcp
+from src.mesh_refinement import MeshRefinedPrepareOcp
+from src.multistart import MultiStartScheduler, format_run_summary
+from src.seed_pruning import SeedPruning
+from src.warm_start import WarmStartStore
+
+
+def main(
+    prepare_ocp: Callable,
+    save_results: Callable,
+    multi_start: bool = False,
+    condition: str = "",
+    prune_seeds: bool = False,
+    n_shooting: tuple = (20, 20, 30, 30, 30),
+    mesh_refinement: bool = False,
+    ktc_homotopy: bool = False,
+):
     # --- Parameters --- #
     movement = "backflip"
     version = "post_submission"
@@ -26,7 +42,6 @@ def main(prepare_ocp: Callable, save_results: Callable, multi_start: bool = Fals
 
     biorbd_model_path = (PATH_MODEL_1_CONTACT, PATH_MODEL, PATH_MODEL, PATH_MODEL, PATH_MODEL_1_CONTACT)
     phase_time = (0.2, 0.2, 0.3, 0.3, 0.3)
-    n_shooting = (20, 20, 30, 30, 30)
 
     # Solver options
     solver = Solver.IPOPT(show_options=dict(show_bounds=True), _linear_solver="MA57", show_online_optim=False)
@@ -35,6 +50,19 @@ def main(prepare_ocp: Callable, save_results: Callable, multi_start: bool = Fals
     solver.set_bound_push(1e-8)
     solver.set_tol(1e-6)
 
+    # ktc_homotopy (HTC only): the KTC ocp is solved first and warm starts the HTC ocp, through relaxed friction cones
+    # mesh_refinement: the coarse meshes are solved first and warm start the mesh n_shooting, with ktc_homotopy the
+    # mesh refinement is applied to the KTC stage
+    # The converged coarse meshes are stored, so that the seeds interrupted during their fine solve resume from them
+    store = WarmStartStore(f"{WARM_START_FOLDER}/{condition}") if WARM_START_FOLDER is not None else None
+    if ktc_homotopy:
+        prepare_ocp_ktc = prepare_ocp_with_ktc
+        if mesh_refinement:
+            prepare_ocp_ktc = MeshRefinedPrepareOcp(prepare_ocp_with_ktc, solver, MESH_REFINEMENT_FACTORS, store=store)
+        prepare_ocp = KtcToHtcPrepareOcp(prepare_ocp_ktc, prepare_ocp, solver, FRICTION_CONE_RELAXATIONS)
+    elif mesh_refinement:
+        prepare_ocp = MeshRefinedPrepareOcp(prepare_ocp, solver, MESH_REFINEMENT_FACTORS, store=store)
+
     if WITH_MULTI_START:
 
         combinatorial_parameters = {
@@ -45,16 +73,17 @@ def main(prepare_ocp: Callable, save_results: Callable, multi_start: bool = Fals
             "seed": list(range(0, 20)),
         }
 
-        multi_start = prepare_multi_start(
+        multi_start = MultiStartScheduler(
             prepare_ocp,
             save_results,
             combinatorial_parameters=combinatorial_parameters,
             save_folder=save_folder,
             solver=solver,
-            n_pools=1,
+            pruning=SeedPruning() if prune_seeds else None,
         )
 
-        multi_start.solve()
+        for summary in multi_start.solve():
+            print(format_run_summary(summary))
     else:
         ocp = prepare_ocp(biorbd_model_path, phase_time, n_shooting, WITH_MULTI_START=False)
         # ocp.add_plot_penalty()
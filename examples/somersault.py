@@ -50,7 +50,7 @@ from bioptim import (
     MagnitudeType,
 )
 
-from src.actuator_constants import ACTUATORS, initialize_tau
+from src.actuator_constants import ACTUATOR_TABLE, initialize_tau
 from src.bounds_x import add_x_bounds
 from src.constants import (
     POSE_TUCKING_START,
@@ -59,12 +59,14 @@ from src.constants import (
     JUMP_INIT_PATH,
     PATH_MODEL,
     PATH_MODEL_1_CONTACT,
+    ACTUATOR_ENVELOPE,
+    ACTUATOR_ENVELOPE_SHARPNESS,
 )
 from src.constraints import add_constraints
 from src.multistart import prepare_multi_start
 from src.objectives import minimize_actuator_torques, add_objectives, add_tau_derivative_objectives
 from src.save_results import save_results
-from src.save_load_helpers import get_created_data_from_pickle
+from src.save_load_helpers import get_jump_initial_guess
 
 
 def add_u_bounds(u_bounds, tau_min, tau_max):
@@ -80,7 +82,15 @@ def add_u_bounds(u_bounds, tau_min, tau_max):
 
 
 # --- Prepare ocp --- #
-def prepare_ocp(biorbd_model_path, phase_time, n_shooting, WITH_MULTI_START, seed=0):
+def prepare_ocp(
+    biorbd_model_path,
+    phase_time,
+    n_shooting,
+    WITH_MULTI_START,
+    seed=0,
+    n_threads: int = 32,
+    envelope: str = ACTUATOR_ENVELOPE,
+):
     bio_model = (
         BiorbdModel(biorbd_model_path[0]),
         BiorbdModel(biorbd_model_path[1]),
@@ -93,7 +103,7 @@ def prepare_ocp(biorbd_model_path, phase_time, n_shooting, WITH_MULTI_START, see
     n_qdot = n_q
 
     # Actuators parameters
-    actuators = ACTUATORS
+    actuators = ACTUATOR_TABLE
 
     tau_min, tau_max, tau_init = initialize_tau()
     dof_mapping = BiMappingList()
@@ -102,12 +112,16 @@ def prepare_ocp(biorbd_model_path, phase_time, n_shooting, WITH_MULTI_START, see
     # --- Objectives functions ---#
     # Add objective functions
     objective_functions = ObjectiveList()
-    objective_functions = add_objectives(objective_functions, actuators)
+    objective_functions = add_objectives(
+        objective_functions, actuators, envelope=envelope, envelope_sharpness=ACTUATOR_ENVELOPE_SHARPNESS
+    )
     objective_functions = add_tau_derivative_objectives(objective_functions)
     objective_functions.add(
         minimize_actuator_torques,
         custom_type=ObjectiveFcn.Lagrange,
         actuators=actuators,
+        envelope=envelope,
+        sharpness=ACTUATOR_ENVELOPE_SHARPNESS,
         quadratic=True,
         weight=0.1,
         phase=2,
@@ -138,7 +152,7 @@ def prepare_ocp(biorbd_model_path, phase_time, n_shooting, WITH_MULTI_START, see
         x_bounds.add("qdot", bounds=qdot_bounds[i_phase], phase=i_phase)
 
     # Initial guess
-    sol_salto = get_created_data_from_pickle(JUMP_INIT_PATH)
+    sol_salto = get_jump_initial_guess(JUMP_INIT_PATH, n_shooting)
     x_init = InitialGuessList()
     # Initial guess from Jump
     x_init.add("q", sol_salto["q"][0], interpolation=InterpolationType.EACH_FRAME, phase=0)
@@ -191,7 +205,7 @@ def prepare_ocp(biorbd_model_path, phase_time, n_shooting, WITH_MULTI_START, see
         u_bounds=u_bounds,
         objective_functions=objective_functions,
         constraints=constraints,
-        n_threads=32,
+        n_threads=n_threads,
         phase_transitions=phase_transitions,
         variable_mappings=dof_mapping,
     )
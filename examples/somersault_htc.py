@@ -53,7 +53,7 @@ from bioptim import (
     Bounds,
     MagnitudeType,
 )
-from src.actuator_constants import ACTUATORS, initialize_tau
+from src.actuator_constants import ACTUATOR_TABLE, initialize_tau
 from src.biorbd_model_holonomic_updated import BiorbdModelCustomHolonomic
 from src.constants import (
     JUMP_INIT_PATH,
@@ -62,13 +62,15 @@ from src.constants import (
     POSE_LANDING_START,
     PATH_MODEL_1_CONTACT,
     PATH_MODEL,
+    ACTUATOR_ENVELOPE,
+    ACTUATOR_ENVELOPE_SHARPNESS,
 )
 from src.constraints import add_constraints, add_constraint_tucking_friction_cone
 from src.objectives import add_tau_derivative_objectives
 from src.multistart import prepare_multi_start
 from src.objectives import add_objectives, minimize_actuator_torques_CL
 from src.phase_transitions import custom_phase_transition_pre, custom_phase_transition_post
-from src.save_load_helpers import get_created_data_from_pickle
+from src.save_load_helpers import get_jump_initial_guess
 from src.save_results import save_results_holonomic
 from somersault import (
     add_x_bounds,
@@ -77,7 +79,15 @@ from somersault import (
 
 
 # --- Prepare ocp --- #
-def prepare_ocp(biorbd_model_path, phase_time, n_shooting, WITH_MULTI_START, seed=0):
+def prepare_ocp(
+    biorbd_model_path,
+    phase_time,
+    n_shooting,
+    WITH_MULTI_START,
+    seed=0,
+    n_threads: int = 32,
+    envelope: str = ACTUATOR_ENVELOPE,
+):
     bio_model = (
         BiorbdModel(biorbd_model_path[0]),
         BiorbdModel(biorbd_model_path[1]),
@@ -107,7 +117,7 @@ def prepare_ocp(biorbd_model_path, phase_time, n_shooting, WITH_MULTI_START, see
     n_qdot = n_q
 
     # Actuators parameters
-    actuators = ACTUATORS
+    actuators = ACTUATOR_TABLE
 
     tau_min, tau_max, tau_init = initialize_tau()
 
@@ -121,12 +131,16 @@ def prepare_ocp(biorbd_model_path, phase_time, n_shooting, WITH_MULTI_START, see
     # --- Objectives functions ---#
     # Add objective functions
     objective_functions = ObjectiveList()
-    objective_functions = add_objectives(objective_functions, actuators)
+    objective_functions = add_objectives(
+        objective_functions, actuators, envelope=envelope, envelope_sharpness=ACTUATOR_ENVELOPE_SHARPNESS
+    )
     objective_functions = add_tau_derivative_objectives(objective_functions)
     objective_functions.add(
         minimize_actuator_torques_CL,
         custom_type=ObjectiveFcn.Lagrange,
         actuators=actuators,
+        envelope=envelope,
+        sharpness=ACTUATOR_ENVELOPE_SHARPNESS,
         quadratic=True,
         weight=0.1,
         phase=2,
@@ -174,7 +188,7 @@ def prepare_ocp(biorbd_model_path, phase_time, n_shooting, WITH_MULTI_START, see
             x_bounds.add("qdot", bounds=qdot_bounds[i_phase], phase=i_phase)
 
     # Initial guess
-    sol_salto = get_created_data_from_pickle(JUMP_INIT_PATH)
+    sol_salto = get_jump_initial_guess(JUMP_INIT_PATH, n_shooting)
     x_init = InitialGuessList()
     # Initial guess from jump
     x_init.add("q", sol_salto["q"][0], interpolation=InterpolationType.EACH_FRAME, phase=0)
@@ -230,7 +244,7 @@ def prepare_ocp(biorbd_model_path, phase_time, n_shooting, WITH_MULTI_START, see
         u_bounds=u_bounds,
         objective_functions=objective_functions,
         constraints=constraints,
-        n_threads=32,
+        n_threads=n_threads,
         phase_transitions=phase_transitions,
         variable_mappings=dof_mapping,
     )
@@ -26,10 +26,10 @@ from bioptim import (
     HolonomicConstraintsFcn,
     Bounds,
 )
-from src.actuator_constants import ACTUATORS, initialize_tau
+from src.actuator_constants import ACTUATOR_TABLE, initialize_tau
 from src.biorbd_model_holonomic_updated import BiorbdModelCustomHolonomic
 from src.bounds_x import add_x_bounds
-from src.constraints import add_constraints, add_constraint_tucking_friction_cone
+from src.constraints import add_constraints, add_constraint_tucking_friction_cone, add_constraint_holonomic_algebraic
 from src.constants import (
     JUMP_INIT_PATH,
     POSE_TUCKING_START,
@@ -37,20 +37,41 @@ from src.constants import (
     POSE_LANDING_START,
     PATH_MODEL_1_CONTACT,
     PATH_MODEL,
+    HOLONOMIC_FUNCTION_CACHE_FOLDER,
+    HOLONOMIC_DYNAMICS_COMPILATION,
+    WARM_START_FOLDER,
+    ACTUATOR_ENVELOPE,
+    ACTUATOR_ENVELOPE_SHARPNESS,
 )
 from src.holonomic_torque_derivative_dynamics import (
     configure_holonomic_torque_derivative_driven,
+    configure_holonomic_torque_derivative_driven_algebraic,
     holonomic_torque_derivative_driven,
+    holonomic_torque_derivative_driven_algebraic,
 )
-from src.objectives import add_objectives, minimize_actuator_torques_CL, add_taudot_objectives
-from src.multistart import prepare_multi_start
+from src.objectives import WEIGHTS, add_objectives, minimize_actuator_torques_CL, add_taudot_objectives
+from src.multistart import MultiStartScheduler, format_run_summary
+from src.warm_start import WarmStartStore
 from src.phase_transitions import custom_takeoff, custom_phase_transition_pre, custom_phase_transition_post
-from src.save_load_helpers import get_created_data_from_pickle
+from src.save_load_helpers import get_jump_initial_guess
+from src.profiling import Profiler
 from src.save_results import save_results_holonomic_taudot
 
 
 # --- Prepare ocp --- #
-def prepare_ocp(biorbd_model_path: tuple, phase_time: tuple, n_shooting: tuple, WITH_MULTI_START: bool, seed=0):
+def prepare_ocp(
+    biorbd_model_path: tuple,
+    phase_time: tuple,
+    n_shooting: tuple,
+    WITH_MULTI_START: bool,
+    seed=0,
+    algebraic_q_v: bool = False,
+    n_threads: int = 32,
+    envelope: str = ACTUATOR_ENVELOPE,
+    weights: dict = None,
+    friction_cone_relaxation: float = 0.0,
+):
+    profiler = Profiler()
     bio_model = (
         BiorbdModel(biorbd_model_path[0]),
         BiorbdModel(biorbd_model_path[1]),
@@ -76,12 +97,16 @@ def prepare_ocp(biorbd_model_path: tuple, phase_time: tuple, n_shooting: tuple,
         independent_joint_index=[0, 1, 2, 5, 6, 7],
         dependent_joint_index=[3, 4],
     )
+    if HOLONOMIC_FUNCTION_CACHE_FOLDER is not None:
+        bio_model[2].enable_function_cache(HOLONOMIC_FUNCTION_CACHE_FOLDER)
+
+    profiler.lap("model_loading")
 
     n_q = bio_model[0].nb_q
     n_qdot = n_q
 
     # Actuators parameters
-    actuators = ACTUATORS
+    actuators = ACTUATOR_TABLE
 
     dof_mapping = BiMappingList()
     dof_mapping.add("tau", to_second=[None, None, None, 0, 1, 2, 3, 4], to_first=[3, 4, 5, 6, 7])
@@ -93,15 +118,21 @@ def prepare_ocp(biorbd_model_path: tuple, phase_time: tuple, n_shooting: tuple,
 
     # --- Objectives functions ---#
     # Add objective functions
+    if weights is None:
+        weights = WEIGHTS
     objective_functions = ObjectiveList()
-    objective_functions = add_objectives(objective_functions, actuators)
-    objective_functions = add_taudot_objectives(objective_functions)
+    objective_functions = add_objectives(
+        objective_functions, actuators, weights, envelope=envelope, envelope_sharpness=ACTUATOR_ENVELOPE_SHARPNESS
+    )
+    objective_functions = add_taudot_objectives(objective_functions, weights)
     objective_functions.add(
         minimize_actuator_torques_CL,
         custom_type=ObjectiveFcn.Lagrange,
         actuators=actuators,
+        envelope=envelope,
+        sharpness=ACTUATOR_ENVELOPE_SHARPNESS,
         quadratic=True,
-        weight=0.01,
+        weight=weights["2_TORQUE_RATIO"],
         phase=2,
     )
 
@@ -111,13 +142,25 @@ def prepare_ocp(biorbd_model_path: tuple, phase_time: tuple, n_shooting: tuple,
         DynamicsFcn.TORQUE_DERIVATIVE_DRIVEN, expand_dynamics=True, expand_continuity=False, with_contact=True, phase=0
     )
     dynamics.add(DynamicsFcn.TORQUE_DERIVATIVE_DRIVEN, expand_dynamics=True, expand_continuity=False, phase=1)
-    dynamics.add(
-        configure_holonomic_torque_derivative_driven,
-        dynamic_function=holonomic_torque_derivative_driven,
-        expand_dynamics=True,
-        expand_continuity=False,
-        phase=2,
-    )
+    # algebraic_q_v: the dependent joints are states moving with the independent joints and constrained by the
+    # holonomic constraints at the nodes, instead of being computed from the independent joints inside the dynamics
+    if algebraic_q_v:
+        dynamics.add(
+            configure_holonomic_torque_derivative_driven_algebraic,
+            dynamic_function=holonomic_torque_derivative_driven_algebraic,
+            expand_dynamics=True,
+            expand_continuity=False,
+            phase=2,
+        )
+    else:
+        dynamics.add(
+            configure_holonomic_torque_derivative_driven,
+            dynamic_function=holonomic_torque_derivative_driven,
+            expand_dynamics=HOLONOMIC_DYNAMICS_COMPILATION is None,
+            expand_continuity=False,
+            dynamics_compilation=HOLONOMIC_DYNAMICS_COMPILATION,
+            phase=2,
+        )
     dynamics.add(DynamicsFcn.TORQUE_DERIVATIVE_DRIVEN, expand_dynamics=True, expand_continuity=False, phase=3)
     dynamics.add(
         DynamicsFcn.TORQUE_DERIVATIVE_DRIVEN, expand_dynamics=True, expand_continuity=False, with_contact=True, phase=4
@@ -133,7 +176,12 @@ def prepare_ocp(biorbd_model_path: tuple, phase_time: tuple, n_shooting: tuple,
     # --- Constraints ---#
     constraints = ConstraintList()
     constraints = add_constraints(constraints)
-    constraints = add_constraint_tucking_friction_cone(bio_model[2], constraints)
+    constraints = add_constraint_tucking_friction_cone(bio_model[2], constraints, friction_cone_relaxation)
+    if algebraic_q_v:
+        constraints = add_constraint_holonomic_algebraic(bio_model[2], constraints)
+
+    # The objectives, dynamics and constraints are only declared here, bioptim builds them in nlp_assembly
+    profiler.lap("declaration")
 
     # --- Bounds ---#
     tau_min, tau_max, tau_init = initialize_tau()
@@ -164,7 +212,7 @@ def prepare_ocp(biorbd_model_path: tuple, phase_time: tuple, n_shooting: tuple,
             x_bounds.add("qdot", bounds=qdot_bounds[i_phase], phase=i_phase)
 
     # Initial guess
-    sol_salto = get_created_data_from_pickle(JUMP_INIT_PATH)
+    sol_salto = get_jump_initial_guess(JUMP_INIT_PATH, n_shooting)
     x_init = InitialGuessList()
     # Initial guess from Jump
     x_init.add("q", sol_salto["q"][0], interpolation=InterpolationType.EACH_FRAME, phase=0)
@@ -178,6 +226,21 @@ def prepare_ocp(biorbd_model_path: tuple, phase_time: tuple, n_shooting: tuple,
     x_init.add("q_u", q_2_linear, interpolation=InterpolationType.EACH_FRAME, phase=2)
     x_init.add("qdot_u", [0] * 6, interpolation=InterpolationType.CONSTANT, phase=2)
 
+    if algebraic_q_v:
+        dependent_joint_index = bio_model[2].dependent_joint_index
+        x_bounds.add(
+            "q_v",
+            min_bound=q_bounds[2].min[dependent_joint_index, :],
+            max_bound=q_bounds[2].max[dependent_joint_index, :],
+            phase=2,
+        )
+        x_init.add(
+            "q_v",
+            np.linspace(POSE_TUCKING_START, POSE_TUCKING_END, n_shooting[2] + 1).T[dependent_joint_index, :],
+            interpolation=InterpolationType.EACH_FRAME,
+            phase=2,
+        )
+
     x_init.add("q", np.array([POSE_TUCKING_END, POSE_LANDING_START]).T, interpolation=InterpolationType.LINEAR, phase=3)
     x_init.add("qdot", np.array([[0] * n_qdot, [0] * n_qdot]).T, interpolation=InterpolationType.LINEAR, phase=3)
     x_init.add("q", POSE_LANDING_START, interpolation=InterpolationType.CONSTANT, phase=4)
@@ -225,7 +288,9 @@ def prepare_ocp(biorbd_model_path: tuple, phase_time: tuple, n_shooting: tuple,
             seed=seed,
         )
 
-    return OptimalControlProgram(
+    profiler.lap("bounds_and_initial_guess")
+
+    ocp = OptimalControlProgram(
         bio_model=bio_model,
         dynamics=dynamics,
         n_shooting=n_shooting,
@@ -236,10 +301,14 @@ def prepare_ocp(biorbd_model_path: tuple, phase_time: tuple, n_shooting: tuple,
         u_bounds=u_bounds,
         objective_functions=objective_functions,
         constraints=constraints,
-        n_threads=32,
+        n_threads=n_threads,
         phase_transitions=phase_transitions,
         variable_mappings=dof_mapping,
     )
+    profiler.lap("nlp_assembly")
+    # Read by the save callbacks to write the profiling of the run in its results
+    ocp.profiler = profiler
+    return ocp
 
 
 # --- Load model --- #
@@ -272,16 +341,17 @@ def main():
             "seed": list(range(0, 20)),
         }
 
-        multi_start = prepare_multi_start(
+        multi_start = MultiStartScheduler(
             prepare_ocp,
             save_results_holonomic_taudot,
             combinatorial_parameters=combinatorial_parameters,
             save_folder=save_folder,
             solver=solver,
-            n_pools=1,
+            warm_start_store=WarmStartStore(WARM_START_FOLDER) if WARM_START_FOLDER is not None else None,
         )
 
-        multi_start.solve()
+        for summary in multi_start.solve():
+            print(format_run_summary(summary))
     else:
         ocp = prepare_ocp(biorbd_model_path, phase_time, n_shooting, WITH_MULTI_START=False)
         # ocp.add_plot_penalty()
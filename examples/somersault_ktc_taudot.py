@@ -31,20 +31,33 @@ from src.constants import (
     POSE_LANDING_START,
     PATH_MODEL_1_CONTACT,
     PATH_MODEL,
+    ACTUATOR_ENVELOPE,
+    ACTUATOR_ENVELOPE_SHARPNESS,
 )
-from src.save_load_helpers import get_created_data_from_pickle
+from src.save_load_helpers import get_jump_initial_guess
 from src.bounds_x import add_x_bounds
+from src.profiling import Profiler
 from src.save_results import save_results_taudot
-from src.objectives import add_objectives, minimize_actuator_torques, add_taudot_objectives
+from src.objectives import WEIGHTS, add_objectives, minimize_actuator_torques, add_taudot_objectives
 from src.constraints import add_constraints
 from src.constants import JUMP_INIT_PATH
-from src.actuator_constants import ACTUATORS, initialize_tau
-from src.multistart import prepare_multi_start
+from src.actuator_constants import ACTUATOR_TABLE, initialize_tau
+from src.multistart import MultiStartScheduler, format_run_summary
 from src.phase_transitions import custom_takeoff, continuity_only_q_and_qdot
 
 
 # --- Prepare ocp --- #
-def prepare_ocp(biorbd_model_path, phase_time, n_shooting, WITH_MULTI_START, seed=0):
+def prepare_ocp(
+    biorbd_model_path,
+    phase_time,
+    n_shooting,
+    WITH_MULTI_START,
+    seed=0,
+    n_threads: int = 32,
+    envelope: str = ACTUATOR_ENVELOPE,
+    weights: dict = None,
+):
+    profiler = Profiler()
     bio_model = (
         BiorbdModel(biorbd_model_path[0]),
         BiorbdModel(biorbd_model_path[1]),
@@ -53,11 +66,13 @@ def prepare_ocp(biorbd_model_path, phase_time, n_shooting, WITH_MULTI_START, see
         BiorbdModel(biorbd_model_path[4]),
     )
 
+    profiler.lap("model_loading")
+
     n_q = bio_model[0].nb_q
     n_qdot = n_q
 
     # Actuators parameters
-    actuators = ACTUATORS
+    actuators = ACTUATOR_TABLE
 
     tau_min, tau_max, tau_init = initialize_tau()
     dof_mapping = BiMappingList()
@@ -66,15 +81,21 @@ def prepare_ocp(biorbd_model_path, phase_time, n_shooting, WITH_MULTI_START, see
 
     # --- Objectives functions ---#
     # Add objective functions
+    if weights is None:
+        weights = WEIGHTS
     objective_functions = ObjectiveList()
-    objective_functions = add_objectives(objective_functions, actuators)
-    objective_functions = add_taudot_objectives(objective_functions)
+    objective_functions = add_objectives(
+        objective_functions, actuators, weights, envelope=envelope, envelope_sharpness=ACTUATOR_ENVELOPE_SHARPNESS
+    )
+    objective_functions = add_taudot_objectives(objective_functions, weights)
     objective_functions.add(
         minimize_actuator_torques,
         custom_type=ObjectiveFcn.Lagrange,
         actuators=actuators,
+        envelope=envelope,
+        sharpness=ACTUATOR_ENVELOPE_SHARPNESS,
         quadratic=True,
-        weight=0.01,
+        weight=weights["2_TORQUE_RATIO"],
         phase=2,
     )
 
@@ -109,6 +130,9 @@ def prepare_ocp(biorbd_model_path, phase_time, n_shooting, WITH_MULTI_START, see
         phase=2,
     )
 
+    # The objectives, dynamics and constraints are only declared here, bioptim builds them in nlp_assembly
+    profiler.lap("declaration")
+
     # --- Bounds ---#
     x_bounds = BoundsList()
     q_bounds, qdot_bounds = add_x_bounds(bio_model)
@@ -123,7 +147,7 @@ def prepare_ocp(biorbd_model_path, phase_time, n_shooting, WITH_MULTI_START, see
         )
 
     # Initial guess
-    sol_salto = get_created_data_from_pickle(JUMP_INIT_PATH)
+    sol_salto = get_jump_initial_guess(JUMP_INIT_PATH, n_shooting)
     x_init = InitialGuessList()
     # Initial guess from Jump
     x_init.add("q", sol_salto["q"][0], interpolation=InterpolationType.EACH_FRAME, phase=0)
@@ -179,7 +203,9 @@ def prepare_ocp(biorbd_model_path, phase_time, n_shooting, WITH_MULTI_START, see
             seed=seed,
         )
 
-    return OptimalControlProgram(
+    profiler.lap("bounds_and_initial_guess")
+
+    ocp = OptimalControlProgram(
         bio_model=bio_model,
         dynamics=dynamics,
         n_shooting=n_shooting,
@@ -190,10 +216,14 @@ def prepare_ocp(biorbd_model_path, phase_time, n_shooting, WITH_MULTI_START, see
         u_bounds=u_bounds,
         objective_functions=objective_functions,
         constraints=constraints,
-        n_threads=32,
+        n_threads=n_threads,
         phase_transitions=phase_transitions,
         variable_mappings=dof_mapping,
     )
+    profiler.lap("nlp_assembly")
+    # Read by the save callbacks to write the profiling of the run in its results
+    ocp.profiler = profiler
+    return ocp
 
 
 # --- Load model --- #
@@ -226,16 +256,16 @@ def main():
             "seed": list(range(0, 20)),
         }
 
-        multi_start = prepare_multi_start(
+        multi_start = MultiStartScheduler(
             prepare_ocp,
             save_results_taudot,
             combinatorial_parameters=combinatorial_parameters,
             save_folder=save_folder,
             solver=solver,
-            n_pools=1,
         )
 
-        multi_start.solve()
+        for summary in multi_start.solve():
+            print(format_run_summary(summary))
     else:
         ocp = prepare_ocp(biorbd_model_path, phase_time, n_shooting, WITH_MULTI_START=False)
         ocp.add_plot_penalty()
@@ -1,3 +1,4 @@
+import casadi as cas
 import numpy as np
 
 
@@ -15,3 +16,76 @@ class Joint:
 
 def actuator_function(tau_max, theta_opt, r, x):
     return tau_max * np.exp(-((theta_opt - x) ** 2) / (2 * r**2))
+
+
+ACTUATOR_PARAMETERS = ("tau_max_plus", "theta_opt_plus", "r_plus", "tau_max_minus", "theta_opt_minus", "r_minus")
+ACTUATOR_DTYPE = np.dtype([(parameter, float) for parameter in ACTUATOR_PARAMETERS + ("min_q", "max_q")])
+
+
+class ActuatorTable:
+    """
+    The parameters of the actuators of the joints stored in a structured array, one row per joint, so that the maximal
+    torques of all the joints (and all the nodes) are computed in a single broadcast expression
+    """
+
+    __slots__ = ("names", "parameters")
+
+    def __init__(self, actuators: dict[str, Joint]):
+        """
+        Parameters
+        ----------
+        actuators: dict[str, Joint]
+            The actuators of the joints, the order of the dict is the order of the rows
+        """
+        self.names = tuple(actuators.keys())
+        self.parameters = np.array(
+            [tuple(getattr(joint, field) for field in ACTUATOR_DTYPE.names) for joint in actuators.values()],
+            dtype=ACTUATOR_DTYPE,
+        )
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __getitem__(self, name: str) -> np.void:
+        """The parameters of a joint, e.g. table["Knees"]["tau_max_plus"]"""
+        return self.parameters[self.names.index(name)]
+
+    def _column(self, field: str, q):
+        """A parameter of all the joints, shaped to be broadcast against q"""
+        column = self.parameters[field]
+        if isinstance(q, (cas.MX, cas.SX, cas.DM)):
+            return cas.repmat(cas.DM(column), 1, q.shape[1])
+        return column.reshape((-1,) + (1,) * (np.ndim(q) - 1))
+
+    def _envelope(self, q, direction: str):
+        tau_max = self._column(f"tau_max_{direction}", q)
+        theta_opt = self._column(f"theta_opt_{direction}", q)
+        r = self._column(f"r_{direction}", q)
+        exp = cas.exp if isinstance(q, (cas.MX, cas.SX, cas.DM)) else np.exp
+        return tau_max * exp(-((theta_opt - q) ** 2) / (2 * r**2))
+
+    def max_torque(self, q, sign):
+        """
+        The maximal torque of each joint (the same gaussian envelopes as actuator_function)
+
+        Parameters
+        ----------
+        q: np.ndarray | MX | SX | DM
+            The generalized coordinates of the joints, (n_joints,) or (n_joints, n_nodes)
+        sign:
+            +1 for the envelope of the positive torques, -1 for the envelope of the negative torques, or an array
+            (or casadi expression) of the shape of q, usually the torques, selecting the envelope of each element by
+            its sign
+
+        Returns
+        -------
+        The maximal torques (positive values), of the shape of q
+        """
+        if np.isscalar(sign):
+            return self._envelope(q, "plus" if sign > 0 else "minus")
+
+        max_plus = self._envelope(q, "plus")
+        max_minus = self._envelope(q, "minus")
+        if isinstance(q, (cas.MX, cas.SX, cas.DM)) or isinstance(sign, (cas.MX, cas.SX, cas.DM)):
+            return cas.if_else(sign > 0, max_plus, max_minus)
+        return np.where(np.asarray(sign) > 0, max_plus, max_minus)
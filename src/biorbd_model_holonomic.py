@@ -13,6 +13,8 @@ from casadi import MX, DM, vertcat, horzcat, Function, solve, rootfinder, inv_mi
 from bioptim import BiorbdModel
 import numpy as np
 
+from .linear_algebra import LINEAR_SOLVERS, solve_linear_system
+
 
 class BiorbdModelCustomHolonomic(BiorbdModel):
     """
@@ -29,8 +31,31 @@ class BiorbdModelCustomHolonomic(BiorbdModel):
         self.stabilization = False
         self.alpha = 0.01
         self.beta = 0.01
+        self._linear_solver = "inv"
         self._dependent_joint_index = []
         self._independent_joint_index = [i for i in range(self.nb_q)]
+        self._explicit_v_from_u_functions = {}
+        self._model_eigen = None
+
+    @property
+    def linear_solver(self) -> str:
+        return self._linear_solver
+
+    def set_linear_solver(self, linear_solver: str):
+        """
+        Select how the linear systems of the constrained dynamics are solved
+
+        Parameters
+        ----------
+        linear_solver: str
+            "inv" for explicit inverses (and the symbolic QR of the augmented system in constrained_forward_dynamics),
+            "symbolicqr" for the casadi symbolic QR,
+            "structured" for Cholesky factorizations of the mass matrices and a closed-form (2x2) or LU solve
+            of the dependent part of the constraints jacobian
+        """
+        if linear_solver not in LINEAR_SOLVERS:
+            raise ValueError(f"linear_solver must be one of {LINEAR_SOLVERS}")
+        self._linear_solver = linear_solver
 
     def set_dependencies(self, dependent_joint_index: list, independent_joint_index: list):
         """Set the dependencies between the joints of the model"""
@@ -128,6 +153,11 @@ class BiorbdModelCustomHolonomic(BiorbdModel):
         constraint_jacobian = self.holonomic_constraints_jacobian(q)
         constraint_jacobian_transpose = constraint_jacobian.T
 
+        if self._linear_solver == "structured":
+            return self._constrained_forward_dynamics_schur_complement(
+                q, qdot, tau, mass_matrix, constraint_jacobian, q_biorbd, qdot_biorbd
+            )
+
         # compute the matrix DAE
         mass_matrix_augmented = horzcat(mass_matrix, constraint_jacobian_transpose)
         mass_matrix_augmented = vertcat(
@@ -155,6 +185,43 @@ class BiorbdModelCustomHolonomic(BiorbdModel):
 
         return x[: self.nb_qddot]
 
+    def _constrained_forward_dynamics_schur_complement(
+        self, q, qdot, tau, mass_matrix, constraint_jacobian, q_biorbd, qdot_biorbd
+    ) -> MX:
+        """
+        Solve the augmented system of constrained_forward_dynamics through the Schur complement of the mass matrix,
+        both the mass matrix and J M^-1 J^T being symmetric positive definite they are solved with Cholesky
+        factorizations
+        """
+        tau_minus_non_linear_effect = (
+            tau - self.model.NonLinearEffect(q_biorbd, qdot_biorbd, f_ext=None, f_contacts=None).to_mx()
+        )
+
+        biais = -self.holonomic_constraints_jacobian(qdot) @ qdot
+        if self.stabilization:
+            biais -= self.alpha * self.holonomic_constraints(q) + self.beta * self.holonomic_constraints_derivative(
+                q, qdot
+            )
+
+        # M^-1 [J^T, tau - N]
+        mass_matrix_solve = solve_linear_system(
+            mass_matrix,
+            horzcat(constraint_jacobian.T, tau_minus_non_linear_effect),
+            self._linear_solver,
+            symmetric_positive_definite=True,
+        )
+        mass_matrix_inv_jacobian_transpose = mass_matrix_solve[:, :-1]
+        unconstrained_qddot = mass_matrix_solve[:, -1]
+
+        lambdas = solve_linear_system(
+            constraint_jacobian @ mass_matrix_inv_jacobian_transpose,
+            constraint_jacobian @ unconstrained_qddot - biais,
+            self._linear_solver,
+            symmetric_positive_definite=True,
+        )
+
+        return unconstrained_qddot - mass_matrix_inv_jacobian_transpose @ lambdas
+
     def partitioned_mass_matrix(self, q):
         """
         This function returns the partitioned mass matrix, reordered in function independent and dependent joints
@@ -332,8 +399,11 @@ class BiorbdModelCustomHolonomic(BiorbdModel):
 
         modified_generalized_forces = tau_u + Bvu.T @ tau_v
 
-        uddot = inv(modified_mass_matrix) @ (
-            modified_generalized_forces - second_term @ self.biais_vector(q, qdot) - modified_non_linear_effect
+        uddot = solve_linear_system(
+            modified_mass_matrix,
+            modified_generalized_forces - second_term @ self.biais_vector(q, qdot) - modified_non_linear_effect,
+            self._linear_solver,
+            symmetric_positive_definite=True,
         )
 
         return uddot
@@ -350,11 +420,9 @@ class BiorbdModelCustomHolonomic(BiorbdModel):
 
         J = self.partitioned_constrained_jacobian(q)
         Jv = J[:, self.nb_independent_joints :]
-        Jv_inv = inv(Jv)  # inv_minor otherwise ?
-
         Ju = J[:, : self.nb_independent_joints]
 
-        return -Jv_inv @ Ju
+        return -solve_linear_system(Jv, Ju, self._linear_solver)
 
     def biais_vector(self, q: MX, qdot: MX) -> MX:
         """
@@ -369,9 +437,8 @@ class BiorbdModelCustomHolonomic(BiorbdModel):
         """
         J = self.partitioned_constrained_jacobian(q)
         Jv = J[:, self.nb_independent_joints :]
-        Jv_inv = inv(Jv)  # inv_minor otherwise ?
 
-        return - Jv_inv @ self.holonomic_constraints_jacobian(qdot) @ qdot
+        return -solve_linear_system(Jv, self.holonomic_constraints_jacobian(qdot) @ qdot, self._linear_solver)
 
     def q_from_u_and_v(self, u: MX, v: MX) -> MX:
         """
@@ -399,6 +466,33 @@ class BiorbdModelCustomHolonomic(BiorbdModel):
 
         return q
 
+    @property
+    def model_eigen(self) -> biorbd_eigen.Model:
+        """
+        The biorbd (eigen) version of the model, loaded once from the .bioMod file and reused for numeric evaluations
+        """
+        if self._model_eigen is None:
+            self._model_eigen = biorbd_eigen.Model(self.model.path().absolutePath().to_string())
+        return self._model_eigen
+
+    def compute_v_from_u_explicit_numeric_batch(self, u: np.ndarray) -> np.ndarray:
+        """
+        Compute the dependent joints from the independent joints for all the nodes of a trajectory at once,
+        by mapping the closed-form solution of compute_v_from_u_explicit_symbolic over the nodes
+
+        Parameters
+        ----------
+        u: np.ndarray
+            The generalized coordinates of independent joint, of shape (nb_independent_joints, n_nodes)
+
+        Returns
+        -------
+        The dependent joints, of shape (nb_dependent_joints, n_nodes)
+        """
+        u = np.asarray(u).reshape(self.nb_independent_joints, -1)
+        v_from_u = self._explicit_v_from_u_function_for_partition()
+        return v_from_u.map(u.shape[1])(u).toarray()
+
     def compute_v_from_u_explicit_numeric(self, u: MX):
         """
         Compute the dependent joint from the independent joint,
@@ -417,7 +511,7 @@ class BiorbdModelCustomHolonomic(BiorbdModel):
         theta:
             The angle of the dependente joint
         """
-        model_eigen = biorbd_eigen.Model(self.model.path().absolutePath().to_string())
+        model_eigen = self.model_eigen
 
         index_segment_ref = segment_index(model_eigen, "Arm_location")
         index_forearm = segment_index(model_eigen, "Forearm_location")
@@ -456,25 +550,19 @@ class BiorbdModelCustomHolonomic(BiorbdModel):
 
         return theta
 
-    def compute_v_from_u_explicit_symbolic(self, u: MX):
+    def _explicit_v_from_u_function_for_partition(self) -> Function:
         """
-        Compute the dependent joint from the independent joint,
-        This is done by solving the system of equations given by the holonomic constraints
-        At the end of this step, we get admissible generalized coordinates w.r.t. the holonomic constraints
-
-        !! symbolic version of the function
-
-        Parameters
-        ----------
-        u: MX
-            The generalized coordinates of independent joint
+        Build, once per joint partition, the expanded function giving the dependent joints from the independent
+        joints. The lengths of the arm and forearm are baked in as constants.
 
         Returns
         -------
-        theta:
-            The angle of the dependente joint
-
+        The function q_u -> q_v
         """
+        partition = (tuple(self._independent_joint_index), tuple(self._dependent_joint_index))
+        if partition in self._explicit_v_from_u_functions:
+            return self._explicit_v_from_u_functions[partition]
+
         index_segment_ref = segment_index(self.model, "Arm_location")
         index_forearm = segment_index(self.model, "Forearm_location")
         index_marker_hand = marker_index(self.model, "CENTER_HAND")
@@ -483,9 +571,10 @@ class BiorbdModelCustomHolonomic(BiorbdModel):
         # Find length arm and forearm
         forearm_JCS_trans = self.model.segments()[index_forearm].localJCS().trans().to_mx()
         hand_JCS_trans = self.model.marker(index_marker_hand).to_mx()
-        l1 = cas.sqrt(forearm_JCS_trans[1] ** 2 + forearm_JCS_trans[2] ** 2)
-        l2 = cas.sqrt(hand_JCS_trans[1] ** 2 + hand_JCS_trans[2] ** 2)
+        l1 = float(cas.evalf(cas.sqrt(forearm_JCS_trans[1] ** 2 + forearm_JCS_trans[2] ** 2)))
+        l2 = float(cas.evalf(cas.sqrt(hand_JCS_trans[1] ** 2 + hand_JCS_trans[2] ** 2)))
 
+        u = MX.sym("u", self.nb_independent_joints, 1)
         v = MX.sym("v", self.nb_dependent_joints)
         q = self.q_from_u_and_v(u, v)
 
@@ -494,7 +583,6 @@ class BiorbdModelCustomHolonomic(BiorbdModel):
 
         # Perform the forward kinematics
         markers = self.markers(q)
-        marker_knee_in_g = markers[index_marker_knee]
 
         # Position markers on arm location frame
         R_arm_global = inv(segment_ref_JCS)
@@ -509,7 +597,33 @@ class BiorbdModelCustomHolonomic(BiorbdModel):
             xp=xp,
             yp=yp,
         )
-        return theta
+
+        v_from_u = Function("compute_v_from_u_explicit", [u], [theta], ["u"], ["v"]).expand()
+
+        self._explicit_v_from_u_functions[partition] = v_from_u
+        return v_from_u
+
+    def compute_v_from_u_explicit_symbolic(self, u: MX):
+        """
+        Compute the dependent joint from the independent joint,
+        This is done by solving the system of equations given by the holonomic constraints
+        At the end of this step, we get admissible generalized coordinates w.r.t. the holonomic constraints
+
+        !! symbolic version of the function, the underlying casadi Function is built once per model
+
+        Parameters
+        ----------
+        u: MX
+            The generalized coordinates of independent joint
+
+        Returns
+        -------
+        theta:
+            The angle of the dependente joint
+
+        """
+        v_from_u = self._explicit_v_from_u_function_for_partition()
+        return v_from_u(u)
 
     @staticmethod
     def inverse_kinematics_2d(l1, l2, xp, yp):
@@ -649,7 +763,6 @@ class BiorbdModelCustomHolonomic(BiorbdModel):
 
         J = self.partitioned_constrained_jacobian(q)
         Jv = J[:, self.nb_independent_joints:]
-        Jvt_inv = inv(Jv.T)
 
         partitioned_mass_matrix = self.partitioned_mass_matrix(q)
         m_vu = partitioned_mass_matrix[self.nb_independent_joints:, : self.nb_independent_joints]
@@ -664,13 +777,14 @@ class BiorbdModelCustomHolonomic(BiorbdModel):
         Q = self.partitioned_tau(tau)
         Qv = Q[self.nb_independent_joints:]
 
-        return Jvt_inv @ (m_vu @ qddot_u + m_vv @ qddot_v + non_linear_effect_v - Qv)
+        return solve_linear_system(
+            Jv.T, m_vu @ qddot_u + m_vv @ qddot_v + non_linear_effect_v - Qv, self._linear_solver
+        )
 
     def compute_lagrange_multipliers(self, q, qdot, uddot, tau, f_ext=None, f_contacts=None) -> MX:
 
         J = self.partitioned_constrained_jacobian(q)
         Jv = J[:, self.nb_independent_joints:]
-        Jv_transpose_inv = inv(transpose(Jv))  # inv_minor otherwise ?
 
         partitioned_mass_matrix = self.partitioned_mass_matrix(q)
         m_vu = partitioned_mass_matrix[self.nb_independent_joints:, :self.nb_independent_joints]
@@ -684,6 +798,8 @@ class BiorbdModelCustomHolonomic(BiorbdModel):
         partitioned_tau = self.partitioned_tau(tau)
         tau_v = partitioned_tau[self.nb_independent_joints:]
 
-        lambdas = Jv_transpose_inv @ (m_vu @ uddot + m_vv @ vddot + non_linear_effect_v - tau_v)
+        lambdas = solve_linear_system(
+            transpose(Jv), m_vu @ uddot + m_vv @ vddot + non_linear_effect_v - tau_v, self._linear_solver
+        )
 
         return lambdas
\ No newline at end of file
@@ -13,6 +13,9 @@ from casadi import MX, DM, vertcat, horzcat, Function, solve, inv_minor, inv, fm
 from bioptim import HolonomicBiorbdModel, ConfigureProblem, DynamicsFunctions, SolutionMerge
 import numpy as np
 
+from .function_cache import HolonomicFunctionCache
+from .linear_algebra import LINEAR_SOLVERS, solve_linear_system
+
 
 class BiorbdModelCustomHolonomic(HolonomicBiorbdModel):
     """
@@ -20,6 +23,170 @@ class BiorbdModelCustomHolonomic(HolonomicBiorbdModel):
     """
     def __init__(self, bio_model: str | biorbd.Model):
         super().__init__(bio_model)
+        self._explicit_v_from_u_functions = {}
+        self._model_eigen = None
+        self._function_cache = None
+        self._linear_solver = "inv"
+        self._holonomic_dynamics_bundle_functions = {}
+
+    @property
+    def linear_solver(self) -> str:
+        return self._linear_solver
+
+    def set_linear_solver(self, linear_solver: str):
+        """
+        Select how the linear systems of the partitioned dynamics are solved
+
+        Parameters
+        ----------
+        linear_solver: str
+            "inv" for the explicit inverses of HolonomicBiorbdModel (default),
+            "symbolicqr" for the casadi symbolic QR,
+            "structured" for a Cholesky factorization of the reduced mass matrix and a closed-form (2x2) or LU solve
+            of the dependent part of the constraints jacobian
+        """
+        if linear_solver not in LINEAR_SOLVERS:
+            raise ValueError(f"linear_solver must be one of {LINEAR_SOLVERS}")
+        if self._function_cache is not None:
+            raise RuntimeError("The linear solver must be set before enabling the function cache")
+        self._linear_solver = linear_solver
+
+    def enable_function_cache(self, folder: str, compile_functions: bool = False):
+        """
+        Store the kernels of the holonomic dynamics (partitioned forward dynamics, lagrangian multipliers, coupling
+        matrix and biais vector) on disk, and reload them on the next runs of the same model instead of tracing them
+        again.
+        Must be called after set_holonomic_configuration.
+
+        Parameters
+        ----------
+        folder: str
+            The root folder of the cache
+        compile_functions: bool
+            If the kernels are also generated in C and compiled, the dynamics must then use expand_dynamics=False
+        """
+        if self.nb_dependent_joints == 0:
+            raise RuntimeError("The holonomic configuration must be set before enabling the function cache")
+        self._function_cache = HolonomicFunctionCache(self, folder, compile_functions=compile_functions)
+
+    def _cached_function(self, name: str, build: Callable[[], Function]) -> Function:
+        """
+        Get a kernel from the function cache, the cache is disabled while building it so the kernel is traced
+        from the plain symbolic implementation
+        """
+        function_cache, self._function_cache = self._function_cache, None
+        try:
+            return function_cache.get(name, build)
+        finally:
+            self._function_cache = function_cache
+
+    def _holonomic_symbols(self) -> tuple[MX, MX, MX, MX, MX]:
+        """The symbolic q_u, qdot_u, tau, q and qdot used to trace the kernels"""
+        return (
+            MX.sym("q_u", self.nb_independent_joints, 1),
+            MX.sym("qdot_u", self.nb_independent_joints, 1),
+            MX.sym("tau", self.nb_tau, 1),
+            MX.sym("q", self.nb_q, 1),
+            MX.sym("qdot", self.nb_qdot, 1),
+        )
+
+    def coupling_matrix(self, q: MX) -> MX:
+        """
+        The coupling matrix of HolonomicBiorbdModel, taken from the function cache when it is enabled
+        """
+        if self._function_cache is None:
+            if self._linear_solver == "inv":
+                return super().coupling_matrix(q)
+            J = self.partitioned_constrained_jacobian(q)
+            Jv = J[:, self.nb_independent_joints :]
+            Ju = J[:, : self.nb_independent_joints]
+            return -solve_linear_system(Jv, Ju, self._linear_solver)
+
+        def build():
+            _, _, _, q_sym, _ = self._holonomic_symbols()
+            return Function(
+                "coupling_matrix", [q_sym], [self.coupling_matrix(q_sym)], ["q"], ["coupling_matrix"]
+            ).expand()
+
+        return self._cached_function("coupling_matrix", build)(q)
+
+    def biais_vector(self, q: MX, qdot: MX) -> MX:
+        """
+        The biais vector of HolonomicBiorbdModel, taken from the function cache when it is enabled
+        """
+        if self._function_cache is None:
+            if self._linear_solver == "inv":
+                return super().biais_vector(q, qdot)
+            J = self.partitioned_constrained_jacobian(q)
+            Jv = J[:, self.nb_independent_joints :]
+            return -solve_linear_system(Jv, self.holonomic_constraints_jacobian(qdot) @ qdot, self._linear_solver)
+
+        def build():
+            _, _, _, q_sym, qdot_sym = self._holonomic_symbols()
+            return Function(
+                "biais_vector",
+                [q_sym, qdot_sym],
+                [self.biais_vector(q_sym, qdot_sym)],
+                ["q", "qdot"],
+                ["biais_vector"],
+            ).expand()
+
+        return self._cached_function("biais_vector", build)(q, qdot)
+
+    def compute_the_lagrangian_multipliers(
+        self, q_u: MX, qdot_u: MX, tau: MX, external_forces: MX = None, f_contacts: MX = None
+    ) -> MX:
+        """
+        The lagrangian multipliers of HolonomicBiorbdModel, taken from the function cache when it is enabled
+        """
+        if self._function_cache is None or external_forces is not None or f_contacts is not None:
+            return super().compute_the_lagrangian_multipliers(q_u, qdot_u, tau, external_forces, f_contacts)
+
+        def build():
+            q_u_sym, qdot_u_sym, tau_sym, _, _ = self._holonomic_symbols()
+            return Function(
+                "compute_the_lagrangian_multipliers",
+                [q_u_sym, qdot_u_sym, tau_sym],
+                [self.compute_the_lagrangian_multipliers(q_u_sym, qdot_u_sym, tau_sym)],
+                ["q_u", "qdot_u", "tau"],
+                ["lagrange_multipliers"],
+            ).expand()
+
+        return self._cached_function("compute_the_lagrangian_multipliers", build)(q_u, qdot_u, tau)
+
+    def _compute_the_lagrangian_multipliers(
+        self, q: MX, qdot: MX, qddot: MX, tau: MX, external_forces: MX = None, f_contacts: MX = None
+    ) -> MX:
+        """
+        Sources
+        -------
+        Docquier, N., Poncelet, A., and Fisette, P.:
+        ROBOTRAN: a powerful symbolic gnerator of multibody models, Mech. Sci., 4, 199–219,
+        https://doi.org/10.5194/ms-4-199-2013, 2013.
+        Equation (17) in the paper.
+        """
+        if self._linear_solver == "inv":
+            return super()._compute_the_lagrangian_multipliers(q, qdot, qddot, tau, external_forces, f_contacts)
+
+        J = self.partitioned_constrained_jacobian(q)
+        Jv = J[:, self.nb_independent_joints :]
+
+        partitioned_mass_matrix = self.partitioned_mass_matrix(q)
+        m_vu = partitioned_mass_matrix[self.nb_independent_joints :, : self.nb_independent_joints]
+        m_vv = partitioned_mass_matrix[self.nb_independent_joints :, self.nb_independent_joints :]
+
+        qddot_u = qddot[self._independent_joint_index]
+        qddot_v = qddot[self._dependent_joint_index]
+
+        non_linear_effect = self.partitioned_non_linear_effect(q, qdot, external_forces, f_contacts)
+        non_linear_effect_v = non_linear_effect[self.nb_independent_joints :]
+
+        Q = self.partitioned_tau(tau)
+        Qv = Q[self.nb_independent_joints :]
+
+        return solve_linear_system(
+            Jv.T, m_vu @ qddot_u + m_vv @ qddot_v + non_linear_effect_v - Qv, self._linear_solver
+        )
 
     @staticmethod
     def inverse_kinematics_2d(l1, l2, xp, yp):
@@ -51,25 +218,19 @@ class BiorbdModelCustomHolonomic(HolonomicBiorbdModel):
         )
         return vertcat(theta1, theta2)
 
-    def compute_v_from_u_explicit_symbolic(self, u: MX):
+    def _explicit_v_from_u_function_for_partition(self) -> Function:
         """
-        Compute the dependent joint from the independent joint,
-        This is done by solving the system of equations given by the holonomic constraints
-        At the end of this step, we get admissible generalized coordinates w.r.t. the holonomic constraints
-
-        !! symbolic version of the function
-
-        Parameters
-        ----------
-        u: MX
-            The generalized coordinates of independent joint
+        Build, once per joint partition, the expanded function giving the dependent joints from the independent
+        joints. The lengths of the arm and forearm are baked in as constants.
 
         Returns
         -------
-        theta:
-            The angle of the dependente joint
-
+        The function q_u -> q_v
         """
+        partition = (tuple(self._independent_joint_index), tuple(self._dependent_joint_index))
+        if partition in self._explicit_v_from_u_functions:
+            return self._explicit_v_from_u_functions[partition]
+
         index_segment_ref = segment_index(self.model, "Arm_location")
         index_forearm = segment_index(self.model, "Forearm_location")
         index_marker_hand = marker_index(self.model, "CENTER_HAND")
@@ -78,9 +239,10 @@ class BiorbdModelCustomHolonomic(HolonomicBiorbdModel):
         # Find length arm and forearm
         forearm_JCS_trans = self.model.segments()[index_forearm].localJCS().trans().to_mx()
         hand_JCS_trans = self.model.marker(index_marker_hand).to_mx()
-        l1 = cas.sqrt(forearm_JCS_trans[1] ** 2 + forearm_JCS_trans[2] ** 2)    # TODO: Maybe problem with square ?
-        l2 = cas.sqrt(hand_JCS_trans[1] ** 2 + hand_JCS_trans[2] ** 2)
+        l1 = float(cas.evalf(cas.sqrt(forearm_JCS_trans[1] ** 2 + forearm_JCS_trans[2] ** 2)))
+        l2 = float(cas.evalf(cas.sqrt(hand_JCS_trans[1] ** 2 + hand_JCS_trans[2] ** 2)))
 
+        u = MX.sym("q_u", self.nb_independent_joints, 1)
         v = MX.sym("v", self.nb_dependent_joints)
         q = self.state_from_partition(u, v)
 
@@ -89,7 +251,6 @@ class BiorbdModelCustomHolonomic(HolonomicBiorbdModel):
 
         # Perform the forward kinematics
         markers = self.markers(q)
-        marker_knee_in_g = markers[index_marker_knee]
 
         marker_knee_in_arm = (R_arm_global @ vertcat(markers[index_marker_knee], cas.MX.ones(1)))[:3]
         xp = -marker_knee_in_arm[2]
@@ -102,7 +263,33 @@ class BiorbdModelCustomHolonomic(HolonomicBiorbdModel):
             xp=xp,
             yp=yp,
         )
-        return theta
+
+        v_from_u = Function("compute_v_from_u_explicit", [u], [theta], ["q_u"], ["q_v"]).expand()
+
+        self._explicit_v_from_u_functions[partition] = v_from_u
+        return v_from_u
+
+    def compute_v_from_u_explicit_symbolic(self, u: MX):
+        """
+        Compute the dependent joint from the independent joint,
+        This is done by solving the system of equations given by the holonomic constraints
+        At the end of this step, we get admissible generalized coordinates w.r.t. the holonomic constraints
+
+        !! symbolic version of the function, the underlying casadi Function is built once per model
+
+        Parameters
+        ----------
+        u: MX
+            The generalized coordinates of independent joint
+
+        Returns
+        -------
+        theta:
+            The angle of the dependente joint
+
+        """
+        v_from_u = self._explicit_v_from_u_function_for_partition()
+        return v_from_u(u)
 
     def compute_v_from_u_explicit_numeric(self, u: MX):
         """
@@ -122,7 +309,7 @@ class BiorbdModelCustomHolonomic(HolonomicBiorbdModel):
         theta:
             The angle of the dependente joint
         """
-        model_eigen = biorbd_eigen.Model(self.model.path().absolutePath().to_string())
+        model_eigen = self.model_eigen
 
         index_segment_ref = segment_index(model_eigen, "Arm_location")
         index_forearm = segment_index(model_eigen, "Forearm_location")
@@ -162,6 +349,52 @@ class BiorbdModelCustomHolonomic(HolonomicBiorbdModel):
 
         return theta
 
+    @property
+    def model_eigen(self) -> biorbd_eigen.Model:
+        """
+        The biorbd (eigen) version of the model, loaded once from the .bioMod file and reused for numeric evaluations
+        """
+        if self._model_eigen is None:
+            self._model_eigen = biorbd_eigen.Model(self.model.path().absolutePath().to_string())
+        return self._model_eigen
+
+    def compute_v_from_u_explicit_numeric_batch(self, u: np.ndarray) -> np.ndarray:
+        """
+        Compute the dependent joints from the independent joints for all the nodes of a trajectory at once,
+        by mapping the closed-form solution of compute_v_from_u_explicit_symbolic over the nodes
+
+        Parameters
+        ----------
+        u: np.ndarray
+            The generalized coordinates of independent joint, of shape (nb_independent_joints, n_nodes)
+
+        Returns
+        -------
+        The dependent joints, of shape (nb_dependent_joints, n_nodes)
+        """
+        u = np.asarray(u).reshape(self.nb_independent_joints, -1)
+        v_from_u = self._explicit_v_from_u_function_for_partition()
+        return v_from_u.map(u.shape[1])(u).toarray()
+
+    def compute_q_from_u_explicit_numeric_batch(self, u: np.ndarray) -> np.ndarray:
+        """
+        Compute the generalized coordinates from the independent joints for all the nodes of a trajectory at once
+
+        Parameters
+        ----------
+        u: np.ndarray
+            The generalized coordinates of independent joint, of shape (nb_independent_joints, n_nodes)
+
+        Returns
+        -------
+        The generalized coordinates, of shape (nb_q, n_nodes)
+        """
+        u = np.asarray(u).reshape(self.nb_independent_joints, -1)
+        q = np.zeros((self.nb_q, u.shape[1]))
+        q[self._independent_joint_index, :] = u
+        q[self._dependent_joint_index, :] = self.compute_v_from_u_explicit_numeric_batch(u)
+        return q
+
     @staticmethod
     def holonomic_torque_driven(ocp, nlp, mapping):
         """
@@ -264,6 +497,20 @@ class BiorbdModelCustomHolonomic(HolonomicBiorbdModel):
         if f_contacts is not None:
             raise NotImplementedError("Contact forces are not implemented yet.")
 
+        if self._function_cache is not None and q_v_init is None:
+
+            def build():
+                q_u_sym, qdot_u_sym, tau_sym, _, _ = self._holonomic_symbols()
+                return Function(
+                    "partitioned_forward_dynamics",
+                    [q_u_sym, qdot_u_sym, tau_sym],
+                    [self.partitioned_forward_dynamics(q_u_sym, qdot_u_sym, tau_sym)],
+                    ["q_u", "qdot_u", "tau"],
+                    ["qddot_u"],
+                ).expand()
+
+            return self._cached_function("partitioned_forward_dynamics", build)(q_u, qdot_u, tau)
+
         # compute q and qdot
         q = self.compute_q(q_u, q_v_init=q_v_init)
         qdot = self.compute_qdot(q, qdot_u)
@@ -297,12 +544,153 @@ class BiorbdModelCustomHolonomic(HolonomicBiorbdModel):
 
         modified_generalized_forces = tau_u + coupling_matrix_vu.T @ tau_v
 
-        qddot_u = inv(modified_mass_matrix) @ (
-            modified_generalized_forces - second_term @ self.biais_vector(q, qdot) - modified_non_linear_effect
+        qddot_u = solve_linear_system(
+            modified_mass_matrix,
+            modified_generalized_forces - second_term @ self.biais_vector(q, qdot) - modified_non_linear_effect,
+            self._linear_solver,
+            symmetric_positive_definite=True,
         )
 
         return qddot_u
 
+    HOLONOMIC_DYNAMICS_BUNDLE_OUTPUTS = ("q", "qdot", "qddot_u", "lagrange_multipliers", "coupling_matrix")
+
+    def _holonomic_dynamics_from_q(self, q: MX, qdot_u: MX, tau: MX) -> tuple[MX, MX, MX, MX, MX]:
+        """
+        All the quantities of a node of the holonomic phase from admissible generalized coordinates, the mass matrix,
+        the non-linear effects, the constraints jacobian and the coupling matrix being computed once and shared.
+
+        Returns
+        -------
+        The full q and qdot, qddot_u, the lagrange multipliers and the coupling matrix
+        """
+        coupling_matrix_vu = self.coupling_matrix(q)
+        qdot = self.state_from_partition(qdot_u, coupling_matrix_vu @ qdot_u)
+        biais = self.biais_vector(q, qdot)
+
+        partitioned_mass_matrix = self.partitioned_mass_matrix(q)
+        m_uu = partitioned_mass_matrix[: self.nb_independent_joints, : self.nb_independent_joints]
+        m_uv = partitioned_mass_matrix[: self.nb_independent_joints, self.nb_independent_joints :]
+        m_vu = partitioned_mass_matrix[self.nb_independent_joints :, : self.nb_independent_joints]
+        m_vv = partitioned_mass_matrix[self.nb_independent_joints :, self.nb_independent_joints :]
+
+        modified_mass_matrix = (
+            m_uu
+            + m_uv @ coupling_matrix_vu
+            + coupling_matrix_vu.T @ m_vu
+            + coupling_matrix_vu.T @ m_vv @ coupling_matrix_vu
+        )
+        second_term = m_uv + coupling_matrix_vu.T @ m_vv
+
+        non_linear_effect = self.partitioned_non_linear_effect(q, qdot)
+        non_linear_effect_u = non_linear_effect[: self.nb_independent_joints]
+        non_linear_effect_v = non_linear_effect[self.nb_independent_joints :]
+        modified_non_linear_effect = non_linear_effect_u + coupling_matrix_vu.T @ non_linear_effect_v
+
+        partitioned_tau = self.partitioned_tau(tau)
+        tau_u = partitioned_tau[: self.nb_independent_joints]
+        tau_v = partitioned_tau[self.nb_independent_joints :]
+        modified_generalized_forces = tau_u + coupling_matrix_vu.T @ tau_v
+
+        qddot_u = solve_linear_system(
+            modified_mass_matrix,
+            modified_generalized_forces - second_term @ biais - modified_non_linear_effect,
+            self._linear_solver,
+            symmetric_positive_definite=True,
+        )
+        qddot_v = coupling_matrix_vu @ qddot_u + biais
+
+        # Equation (17) of Docquier et al. 2013
+        J = self.partitioned_constrained_jacobian(q)
+        Jv = J[:, self.nb_independent_joints :]
+        lagrange_multipliers = solve_linear_system(
+            Jv.T, m_vu @ qddot_u + m_vv @ qddot_v + non_linear_effect_v - tau_v, self._linear_solver
+        )
+
+        return q, qdot, qddot_u, lagrange_multipliers, coupling_matrix_vu
+
+    def _build_holonomic_dynamics_bundle(self) -> Function:
+        """
+        Trace the quantities of a node of the holonomic phase in a single graph, q_v being computed from q_u
+        """
+        q_u, qdot_u, tau, _, _ = self._holonomic_symbols()
+        return Function(
+            "holonomic_dynamics_bundle",
+            [q_u, qdot_u, tau],
+            list(self._holonomic_dynamics_from_q(self.compute_q(q_u), qdot_u, tau)),
+            ["q_u", "qdot_u", "tau"],
+            list(self.HOLONOMIC_DYNAMICS_BUNDLE_OUTPUTS),
+        ).expand()
+
+    def _build_holonomic_dynamics_algebraic_bundle(self) -> Function:
+        """
+        Trace the quantities of a node of the holonomic phase in a single graph, q_v being given (states)
+        """
+        q_u, qdot_u, tau, _, _ = self._holonomic_symbols()
+        q_v = MX.sym("q_v", self.nb_dependent_joints, 1)
+        return Function(
+            "holonomic_dynamics_algebraic_bundle",
+            [q_u, q_v, qdot_u, tau],
+            list(self._holonomic_dynamics_from_q(self.state_from_partition(q_u, q_v), qdot_u, tau)),
+            ["q_u", "q_v", "qdot_u", "tau"],
+            list(self.HOLONOMIC_DYNAMICS_BUNDLE_OUTPUTS),
+        ).expand()
+
+    def _bundle_function(self, name: str, build: Callable[[], Function]) -> Function:
+        """Get a bundle function, built once per joint partition and linear solver or taken from the function cache"""
+        if self._function_cache is not None:
+            return self._cached_function(name, build)
+
+        key = (name, tuple(self._independent_joint_index), tuple(self._dependent_joint_index), self._linear_solver)
+        if key not in self._holonomic_dynamics_bundle_functions:
+            self._holonomic_dynamics_bundle_functions[key] = build()
+        return self._holonomic_dynamics_bundle_functions[key]
+
+    def holonomic_dynamics_bundle(self, q_u: MX, qdot_u: MX, tau: MX) -> dict[str, MX]:
+        """
+        All the quantities of a node of the holonomic phase, evaluated from one shared graph
+
+        Parameters
+        ----------
+        q_u: MX
+            The independent generalized coordinates
+        qdot_u: MX
+            The independent generalized velocities
+        tau: MX
+            The generalized torques
+
+        Returns
+        -------
+        The full q and qdot, qddot_u, the lagrange multipliers and the coupling matrix, indexed by name
+        """
+        bundle = self._bundle_function("holonomic_dynamics_bundle", self._build_holonomic_dynamics_bundle)
+        return dict(zip(bundle.name_out(), bundle(q_u, qdot_u, tau)))
+
+    def holonomic_dynamics_algebraic_bundle(self, q_u: MX, q_v: MX, qdot_u: MX, tau: MX) -> dict[str, MX]:
+        """
+        All the quantities of a node of the holonomic phase when the dependent joints are free states,
+        the holonomic constraints must then be enforced by a path constraint
+
+        Parameters
+        ----------
+        q_u: MX
+            The independent generalized coordinates
+        q_v: MX
+            The dependent generalized coordinates
+        qdot_u: MX
+            The independent generalized velocities
+        tau: MX
+            The generalized torques
+
+        Returns
+        -------
+        The full q and qdot, qddot_u, the lagrange multipliers and the coupling matrix, indexed by name
+        """
+        bundle = self._bundle_function(
+            "holonomic_dynamics_algebraic_bundle", self._build_holonomic_dynamics_algebraic_bundle
+        )
+        return dict(zip(bundle.name_out(), bundle(q_u, q_v, qdot_u, tau)))
+
     def compute_q(self, q_u: MX, q_v_init: MX = None) -> MX:
         """
         Compute the dependent joint from the independent joint
@@ -342,7 +730,6 @@ class BiorbdModelCustomHolonomic(HolonomicBiorbdModel):
         controls = sol.decision_controls(to_merge=SolutionMerge.NODES)
 
         n = states[index_holonomic_model]["q_u"].shape[1]
-        q = np.zeros((self.nb_q, n))
         qdot = np.zeros((self.nb_q, n))
         qddot = np.zeros((self.nb_q, n))
         lambdas = np.zeros((self.nb_dependent_joints, n))
@@ -377,10 +764,8 @@ class BiorbdModelCustomHolonomic(HolonomicBiorbdModel):
             [self._compute_the_lagrangian_multipliers(q_sym, qdot_sym, qddot_sym, tau_sym)],
         )
 
+        q = self.compute_q_from_u_explicit_numeric_batch(states[index_holonomic_model]["q_u"])
         for i in range(n):
-            q_v_i = self.compute_v_from_u_explicit_numeric(states[index_holonomic_model]["q_u"][:, i]).toarray()
-            q[:, i] = self.state_from_partition(states[index_holonomic_model]["q_u"][:, i][:, np.newaxis],
-                                                q_v_i).toarray().squeeze()
             qdot[:, i] = self.compute_qdot(q[:, i], states[index_holonomic_model]["qdot_u"][:, i]).toarray().squeeze()
             qddot_u_i = (
                 partitioned_forward_dynamics_func(states[index_holonomic_model]["q_u"][:, i],
@@ -0,0 +1,196 @@
+"""
+Index of the multi-start campaigns: the save callbacks append a small summary record of each seed to an index file in
+the folder of its condition, so that the best or ranked seeds of each condition are found by reading one small file per
+condition instead of unpickling every solution.
+"""
+
+import glob
+import json
+import os
+import pickle
+import tempfile
+
+CAMPAIGN_INDEX = "campaign_index.jsonl"
+
+
+def append_index_record(
+    save_folder: str,
+    seed,
+    cost: float,
+    status: int,
+    iterations: int,
+    real_time_to_optimize: float,
+    file_path: str,
+):
+    """
+    Append the summary of a seed to the index of its save folder. The condition is the name of the save folder
+    (e.g. KTC, HTC, NTC) and the root of the campaign is its parent folder.
+
+    Parameters
+    ----------
+    save_folder: str
+        The folder where the seed was saved
+    seed:
+        The seed of the run
+    cost: float
+        The cost of the solution
+    status: int
+        The status of the solver, 0 if it converged
+    iterations: int
+        The number of iterations
+    real_time_to_optimize: float
+        The solve time
+    file_path: str
+        The path of the saved results (pickle or entry of the columnar store)
+    """
+    save_folder = os.path.normpath(save_folder)
+    record = {
+        "seed": str(seed),
+        "condition": os.path.basename(save_folder),
+        "cost": float(cost),
+        "status": int(status),
+        "iterations": int(iterations),
+        "real_time_to_optimize": float(real_time_to_optimize),
+        "file": os.path.relpath(file_path, save_folder),
+    }
+    # One json per line, appended, so that the workers of a campaign can write concurrently
+    with open(os.path.join(save_folder, CAMPAIGN_INDEX), "a") as file:
+        file.write(json.dumps(record) + "\n")
+
+
+class CampaignIndex:
+    """The summary records of the seeds of a campaign, read from the index files of its conditions"""
+
+    def __init__(self, root: str, scan_pickles: bool = False):
+        """
+        Parameters
+        ----------
+        root: str
+            The root of the campaign, the parent of the folders of its conditions
+        scan_pickles: bool
+            If the records of the conditions without an index file are read from their pickles (and their index file
+            written)
+        """
+        self.root = root
+        self.scan_pickles = scan_pickles
+        self._records = None
+
+    @classmethod
+    def from_pickles(cls, root: str) -> "CampaignIndex":
+        """
+        The index of a campaign, the conditions without an index file (saved before the index existed) being read from
+        their pickles once, their index file being written on this first read
+
+        Parameters
+        ----------
+        root: str
+            The root of the campaign
+
+        Returns
+        -------
+        The index of the campaign
+        """
+        return cls(root, scan_pickles=True)
+
+    @staticmethod
+    def _pickle_records(save_folder: str) -> list[dict]:
+        """The records of the pickles of a condition, as append_index_record would have written them"""
+        records = []
+        for file_path in sorted(glob.glob(os.path.join(save_folder, "sol_*_[CD]VG.pkl"))):
+            with open(file_path, "rb") as file:
+                data = pickle.load(file)
+            entry = os.path.basename(file_path)[: -len(".pkl")]
+            records.append(
+                {
+                    "seed": entry[len("sol_") : -len("_CVG")],
+                    "condition": os.path.basename(os.path.normpath(save_folder)),
+                    "cost": float(data["cost"]),
+                    "status": 0 if entry.endswith("_CVG") else 1,
+                    "iterations": int(data["iterations"]),
+                    "real_time_to_optimize": float(data["real_time_to_optimize"]),
+                    "file": os.path.basename(file_path),
+                }
+            )
+        return records
+
+    @staticmethod
+    def _write_index(save_folder: str, records: list[dict]):
+        """Write the index file of a condition, to a temporary file then moved in place, the move being atomic"""
+        file_descriptor, temporary_path = tempfile.mkstemp(suffix=".jsonl", dir=save_folder)
+        try:
+            with os.fdopen(file_descriptor, "w") as file:
+                file.writelines(json.dumps(record) + "\n" for record in records)
+            os.replace(temporary_path, os.path.join(save_folder, CAMPAIGN_INDEX))
+        except BaseException:
+            os.remove(temporary_path)
+            raise
+
+    def records(self) -> list[dict]:
+        """All the records of the campaign, the last record of a seed replacing the previous ones"""
+        if self._records is None:
+            records = {}
+            for save_folder in sorted(glob.glob(os.path.join(self.root, "*", ""))):
+                file_path = os.path.join(save_folder, CAMPAIGN_INDEX)
+                if os.path.exists(file_path):
+                    with open(file_path, "r") as file:
+                        condition_records = [json.loads(line) for line in file if line.strip()]
+                elif self.scan_pickles:
+                    condition_records = self._pickle_records(save_folder)
+                    if condition_records:
+                        self._write_index(save_folder, condition_records)
+                else:
+                    continue
+                for record in condition_records:
+                    records[(record["condition"], record["seed"])] = record
+            self._records = list(records.values())
+        return self._records
+
+    def conditions(self) -> list[str]:
+        """The conditions of the campaign"""
+        return sorted({record["condition"] for record in self.records()})
+
+    def ranked(self, condition: str, converged_only: bool = True) -> list[dict]:
+        """
+        The records of a condition, from the lowest cost to the highest
+
+        Parameters
+        ----------
+        condition: str
+            The condition (name of its save folder)
+        converged_only: bool
+            If only the seeds that converged are ranked
+
+        Returns
+        -------
+        The sorted records
+        """
+        records = [
+            record
+            for record in self.records()
+            if record["condition"] == condition and (record["status"] == 0 or not converged_only)
+        ]
+        return sorted(records, key=lambda record: record["cost"])
+
+    def best(self, condition: str, converged_only: bool = True) -> dict | None:
+        """The record of lowest cost of a condition, None if there is none"""
+        ranked = self.ranked(condition, converged_only)
+        return ranked[0] if ranked else None
+
+    def require_best(self, condition: str, converged_only: bool = True) -> dict:
+        """The record of lowest cost of a condition, raises a ValueError if there is none"""
+        best = self.best(condition, converged_only)
+        if best is None:
+            raise ValueError(
+                f"No {'converged ' if converged_only else ''}seed of the condition {condition} in the campaign "
+                f"{self.root}"
+            )
+        return best
+
+    def best_per_condition(self, converged_only: bool = True) -> dict[str, dict]:
+        """The record of lowest cost of each condition"""
+        best = {condition: self.best(condition, converged_only) for condition in self.conditions()}
+        return {condition: record for condition, record in best.items() if record is not None}
+
+    def path(self, record: dict) -> str:
+        """The path of the saved results of a record"""
+        return os.path.join(self.root, record["condition"], record["file"])
@@ -1,3 +1,5 @@
+import os
+
 POSE_PROPULSION_START = [-0.2343, -0.2177, -0.3274, 0.2999, 0.4935, 1.7082, -1.9999, 0.1692]
 
 POSE_TUCKING_START = [0.135, 0.455, 1.285, 0.481, 1.818, 2.6, -1.658, 0.692]
@@ -10,3 +12,41 @@ JUMP_INIT_PATH = "../results/jump_4phases_V22.pkl"
 
 PATH_MODEL = "../models/Model2D_7Dof_0C_5M_CL_V3.bioMod"
 PATH_MODEL_1_CONTACT = "../models/Model2D_7Dof_2C_5M_CL_V3.bioMod"
+
+# Folder where the casadi functions of the holonomic model are cached between runs, None to disable the cache
+HOLONOMIC_FUNCTION_CACHE_FOLDER = None
+
+# Compilation of the dynamics of the tucked phase of the HTC problem: None, "codegen" or "jit"
+HOLONOMIC_DYNAMICS_COMPILATION = None
+
+# Folder of the C code and shared libraries of the "codegen" compilation, inside the function cache if it is enabled,
+# otherwise in the results folder of the repository, whatever the folder the scripts are launched from
+RESULTS_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "results")
+HOLONOMIC_CODEGEN_FOLDER = os.path.join(HOLONOMIC_FUNCTION_CACHE_FOLDER or RESULTS_FOLDER, "holonomic_dynamics_codegen")
+
+# Folder of the converged solutions used to warm start the multi-start campaigns, None to always start cold
+WARM_START_FOLDER = None
+
+# Number of threads of each ocp of the multi-start scheduler by default, the available cores being split into blocks of
+# this size, one process per block
+MULTI_START_N_THREADS = 8
+
+# Format of the results of the multi-start campaigns: "pickle" (one pickle per seed) or "columnar" (see results_store)
+RESULTS_FORMAT = "pickle"
+
+# If the whole bioptim Solution (without its ocp) is pickled next to the results, the compact solution is always saved
+SAVE_FULL_SOLUTION = False
+
+# How the positive and negative envelopes of the actuators are combined in the torque-ratio objectives: "switch"
+# (sign of the torque, non-smooth), "tanh" or "softplus" (smooth, see objectives.actuator_torque_ratios_squared)
+ACTUATOR_ENVELOPE = "switch"
+
+# Sharpness of the smooth envelopes of the actuators [1/Nm]
+ACTUATOR_ENVELOPE_SHARPNESS = 1.0
+
+# Coarse meshes solved before the mesh of the campaign with the mesh refinement, as fractions of its shooting nodes
+MESH_REFINEMENT_FACTORS = (0.25, 0.5)
+
+# Relaxation [N] of the friction cone of the tucked phase in the HTC stages solved after the KTC solution, from the
+# most relaxed, before the actual friction cone
+FRICTION_CONE_RELAXATIONS = (10.0, 1.0)
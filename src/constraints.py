@@ -8,6 +8,7 @@ from bioptim import (
 from casadi import MX, vertcat
 import numpy as np
 from .biorbd_model_holonomic_updated import BiorbdModelCustomHolonomic
+from .holonomic_torque_derivative_dynamics import holonomic_q_v
 
 
 def CoM_over_toes(controller: PenaltyController) -> MX:
@@ -149,8 +150,11 @@ def add_constraints(constraints) -> ConstraintList:
     return constraints
 
 
-def custom_contraint_lambdas_normal(controller: PenaltyController, bio_model: BiorbdModelCustomHolonomic) -> MX:
-    """The model can only pull on the legs, not push"""
+def _tucking_lagrange_multipliers(controller: PenaltyController, bio_model: BiorbdModelCustomHolonomic) -> MX:
+    """
+    The lagrange multipliers of the current node, from the same dynamics bundle as the dynamics of the phase: computed
+    from q_u in the explicit formulation, from the states q_v in the algebraic one
+    """
     # Recuperer les q
     q_u = controller.states["q_u"].cx
     qdot_u = controller.states["qdot_u"].cx
@@ -159,51 +163,58 @@ def custom_contraint_lambdas_normal(controller: PenaltyController, bio_model: Bi
     new_tau = vertcat(pelvis_mx, tau)
 
     # Calculer lambdas
-    lambdas = bio_model.compute_the_lagrangian_multipliers(q_u, qdot_u, new_tau)
-
-    # Contrainte lagrange_0 (min_bound = -1, max_bound = 1)
-    lagrange_0 = lambdas[0]
-
-    return lagrange_0
+    if "q_v" in controller.states:
+        q_v = controller.states["q_v"].cx
+        return bio_model.holonomic_dynamics_algebraic_bundle(q_u, q_v, qdot_u, new_tau)["lagrange_multipliers"]
+    return bio_model.holonomic_dynamics_bundle(q_u, qdot_u, new_tau)["lagrange_multipliers"]
 
 
-def custom_contraint_lambdas_shear(controller: PenaltyController, bio_model: BiorbdModelCustomHolonomic) -> MX:
+def custom_contraint_lambdas_friction_cone(
+    controller: PenaltyController, bio_model: BiorbdModelCustomHolonomic
+) -> MX:
     """
-    Relaxed friction cone, the model can push a little bit
-    lagrange_1**2 < lagrange_0**2
+    Both the relaxed friction cone (lagrange_1**2 < lagrange_0**2) and the pulling only condition (lagrange_0 < 0),
+    evaluated from a single computation of the lagrange multipliers
     """
-    # Recuperer les q
-    q_u = controller.states["q_u"].cx
-    qdot_u = controller.states["qdot_u"].cx
-    tau = controller.controls["tau"].cx if "tau" in controller.controls else controller.states["tau"].cx
-    pelvis_mx = MX.zeros(3)
-    new_tau = vertcat(pelvis_mx, tau)
-
-    # Calculer lambdas
-    lambdas = bio_model.compute_the_lagrangian_multipliers(q_u, qdot_u, new_tau)
+    lambdas = _tucking_lagrange_multipliers(controller, bio_model)
     lagrange_0 = lambdas[0]
     lagrange_1 = lambdas[1]
 
-    return lagrange_0**2 - lagrange_1**2
+    return vertcat(lagrange_0**2 - lagrange_1**2, lagrange_0)
 
 
-def add_constraint_tucking_friction_cone(biomodel_holonomic, constraints):
-    # "relaxed friction cone"
+def add_constraint_tucking_friction_cone(biomodel_holonomic, constraints, relaxation: float = 0.0):
+    # "relaxed friction cone" and the model can only pull on the legs, not push
+    # relaxation [N] widens both bounds for the continuation on the friction cone, 0 is the actual constraint
     constraints.add(
-        custom_contraint_lambdas_shear,
+        custom_contraint_lambdas_friction_cone,
         node=Node.ALL_SHOOTING,
         bio_model=biomodel_holonomic,
-        max_bound=np.inf,
-        min_bound=0,
+        max_bound=np.array([np.inf, -0.1 + relaxation]),
+        min_bound=np.array([-(relaxation**2), -np.inf]),
         phase=2,
     )
-    # The model can only pull on the legs, not push
+    return constraints
+
+
+def custom_constraint_holonomic_algebraic(controller: PenaltyController) -> MX:
+    """The holonomic constraints of the tucked phase when the dependent joints are states"""
+    q_u = controller.states["q_u"].cx
+    q_v = holonomic_q_v(controller, q_u)
+    q = controller.model.state_from_partition(q_u, q_v)
+
+    return controller.model.holonomic_constraints(q)
+
+
+def add_constraint_holonomic_algebraic(biomodel_holonomic, constraints):
+    # The dependent joints are free states, they must satisfy the holonomic constraints at each node (their
+    # integration only keeps the constraints at the velocity level)
+    n_constraints = biomodel_holonomic.nb_dependent_joints
     constraints.add(
-        custom_contraint_lambdas_normal,
-        node=Node.ALL_SHOOTING,
-        bio_model=biomodel_holonomic,
-        max_bound=-0.1,
-        min_bound=-np.inf,
+        custom_constraint_holonomic_algebraic,
+        node=Node.ALL,
+        max_bound=np.zeros(n_constraints),
+        min_bound=np.zeros(n_constraints),
         phase=2,
     )
     return constraints
@@ -0,0 +1,154 @@
+"""
+On-disk cache of the casadi Functions of a holonomic model, so that the symbolic graphs of the kernels are built once
+and reloaded on the next runs of the same model.
+"""
+
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+from typing import Callable
+
+import casadi as cas
+from casadi import Function
+
+
+def holonomic_model_hash(bio_model) -> str:
+    """
+    Hash identifying the casadi Functions of a holonomic model: the content of the .bioMod file, the partition between
+    independent and dependent joints, the linear solver, the holonomic constraints and the version of casadi
+
+    Parameters
+    ----------
+    bio_model: BiorbdModelCustomHolonomic
+        The holonomic model, after its holonomic configuration was set
+
+    Returns
+    -------
+    The hexadecimal hash of the model
+    """
+    hasher = hashlib.sha256()
+    with open(bio_model.model.path().absolutePath().to_string(), "rb") as file:
+        hasher.update(file.read())
+    hasher.update(str(list(bio_model._independent_joint_index)).encode())
+    hasher.update(str(list(bio_model._dependent_joint_index)).encode())
+    hasher.update(getattr(bio_model, "linear_solver", "inv").encode())
+    for constraint in bio_model._holonomic_constraints:
+        hasher.update(constraint.serialize().encode())
+    hasher.update(cas.__version__.encode())
+    return hasher.hexdigest()[:16]
+
+
+def compile_function(func: Function, folder: str, with_derivatives: int = 1, compiler: str = None) -> Function:
+    """
+    Generate the C code of a casadi Function (and of its derivatives), compile it as a shared library with the system
+    compiler and load it back as an external Function. The library is reused if it was already compiled.
+
+    Parameters
+    ----------
+    func: Function
+        The function to compile, preferably expanded (SX)
+    folder: str
+        The folder where the C code and the shared library are written
+    with_derivatives: int
+        The order of the jacobians also generated, so that the external Function can be differentiated
+        (1 for the jacobian, 2 to also get the hessian terms needed by IPOPT)
+    compiler: str
+        The C compiler, the CC environment variable or gcc by default
+
+    Returns
+    -------
+    The external Function loaded from the shared library
+    """
+    compiler = os.environ.get("CC", "gcc") if compiler is None else compiler
+    so_file = os.path.join(folder, f"{func.name()}.so")
+
+    if not os.path.exists(so_file):
+        # Generated and compiled in a private folder, then moved in place, so that the processes building the same
+        # model at the same time never load a library that is still being written
+        build_folder = tempfile.mkdtemp(dir=folder)
+        try:
+            c_file_name = f"{func.name()}.c"
+            generator = cas.CodeGenerator(c_file_name)
+            generator.add(func)
+            derivative = func
+            for _ in range(with_derivatives):
+                generator.add(derivative.forward(1))
+                generator.add(derivative.reverse(1))
+                derivative = derivative.jacobian()
+                generator.add(derivative)
+            generator.generate(f"{build_folder}/")
+            built_so_file = os.path.join(build_folder, f"{func.name()}.so")
+            subprocess.run(
+                [compiler, "-fPIC", "-shared", "-O3", os.path.join(build_folder, c_file_name), "-o", built_so_file],
+                check=True,
+            )
+            os.replace(built_so_file, so_file)
+        finally:
+            shutil.rmtree(build_folder, ignore_errors=True)
+
+    return cas.external(func.name(), so_file)
+
+
+class HolonomicFunctionCache:
+    """
+    Store the casadi Functions of a holonomic model in a folder keyed on holonomic_model_hash, serialized and
+    optionally compiled, and reload them instead of rebuilding the symbolic graphs.
+    """
+
+    def __init__(self, bio_model, folder: str, compile_functions: bool = False):
+        """
+        Parameters
+        ----------
+        bio_model: BiorbdModelCustomHolonomic
+            The holonomic model, after its holonomic configuration was set
+        folder: str
+            The root folder of the cache
+        compile_functions: bool
+            If the functions are also generated in C, compiled and loaded as external functions.
+            External functions cannot be expanded, so the dynamics must then be declared with expand_dynamics=False.
+        """
+        self.folder = os.path.join(folder, holonomic_model_hash(bio_model))
+        self.compile_functions = compile_functions
+        self._functions = {}
+        os.makedirs(self.folder, exist_ok=True)
+
+    def get(self, name: str, build: Callable[[], Function]) -> Function:
+        """
+        Get a function from the cache, building and saving it if it was never built for this model
+
+        Parameters
+        ----------
+        name: str
+            The name of the function
+        build: Callable[[], Function]
+            The function building the casadi Function when it is not in the cache yet
+
+        Returns
+        -------
+        The casadi Function
+        """
+        if name in self._functions:
+            return self._functions[name]
+
+        file_path = os.path.join(self.folder, f"{name}.casadi")
+        if os.path.exists(file_path):
+            func = Function.load(file_path)
+        else:
+            func = build()
+            # Written to a temporary file then moved in place, the move being atomic in the same folder
+            file_descriptor, temporary_path = tempfile.mkstemp(suffix=".casadi", dir=self.folder)
+            os.close(file_descriptor)
+            try:
+                func.save(temporary_path)
+                os.replace(temporary_path, file_path)
+            except BaseException:
+                os.remove(temporary_path)
+                raise
+
+        if self.compile_functions:
+            func = compile_function(func, self.folder)
+
+        self._functions[name] = func
+        return func
@@ -11,9 +11,21 @@ from bioptim import (
 )
 from casadi import MX, vertcat, Function
 import numpy as np
+import os
 
+from .constants import HOLONOMIC_CODEGEN_FOLDER
+from .function_cache import compile_function, holonomic_model_hash
 
-def configure_holonomic_torque_derivative_driven(ocp, nlp, numerical_data_timeseries: dict[str, np.ndarray] = None):
+HOLONOMIC_DYNAMICS_COMPILATIONS = (None, "codegen", "jit")
+
+
+def configure_holonomic_torque_derivative_driven(
+    ocp,
+    nlp,
+    numerical_data_timeseries: dict[str, np.ndarray] = None,
+    dynamics_compilation: str = None,
+    codegen_folder: str = HOLONOMIC_CODEGEN_FOLDER,
+):
     """
     Tell the program which variables are states and controls.
 
@@ -23,7 +35,16 @@ def configure_holonomic_torque_derivative_driven(ocp, nlp, numerical_data_timese
         A reference to the ocp
     nlp: NonLinearProgram
         A reference to the phase
+    dynamics_compilation: str
+        None to trace the partitioned forward dynamics symbolically (default),
+        "codegen" to generate the expanded dynamics and its derivatives in C, compile them and load them as an external,
+        "jit" to just-in-time compile the expanded dynamics.
+        Compiled dynamics cannot be expanded, the phase must then be declared with expand_dynamics=False.
+    codegen_folder: str
+        The folder where the generated C code and shared libraries are stored when dynamics_compilation="codegen"
     """
+    if dynamics_compilation not in HOLONOMIC_DYNAMICS_COMPILATIONS:
+        raise ValueError(f"dynamics_compilation must be one of {HOLONOMIC_DYNAMICS_COMPILATIONS}")
 
     name = "q_u"
     names_u = [nlp.model.name_dof[i] for i in nlp.model.independent_joint_index]
@@ -63,12 +84,137 @@ def configure_holonomic_torque_derivative_driven(ocp, nlp, numerical_data_timese
     # extra plots
     ConfigureProblem.configure_qv(ocp, nlp, nlp.model.compute_q_v)
     ConfigureProblem.configure_qdotv(ocp, nlp, nlp.model._compute_qdot_v)
-    configure_lagrange_multipliers_function(ocp, nlp, nlp.model.compute_the_lagrangian_multipliers)
+    configure_lagrange_multipliers_function(
+        ocp, nlp, lambda q_u, qdot_u, tau: nlp.model.holonomic_dynamics_bundle(q_u, qdot_u, tau)["lagrange_multipliers"]
+    )
+
+    forward_dynamics = None
+    if dynamics_compilation is not None:
+        forward_dynamics = compiled_partitioned_forward_dynamics(nlp.model, dynamics_compilation, codegen_folder)
+
+    ConfigureProblem.configure_dynamics_function(
+        ocp, nlp, holonomic_torque_derivative_driven, forward_dynamics=forward_dynamics
+    )
+
+
+def configure_holonomic_torque_derivative_driven_algebraic(
+    ocp,
+    nlp,
+    numerical_data_timeseries: dict[str, np.ndarray] = None,
+):
+    """
+    Tell the program which variables are states and controls. Contrary to configure_holonomic_torque_derivative_driven,
+    the dependent joints q_v are states instead of being computed from q_u in the dynamics: they are integrated with
+    qdot_v = B_vu qdot_u, so that the closure holds at the velocity level inside each interval, and the holonomic
+    constraints must be added as a path constraint to hold at the position level
+    (see add_constraint_holonomic_algebraic).
+
+    Parameters
+    ----------
+    ocp: OptimalControlProgram
+        A reference to the ocp
+    nlp: NonLinearProgram
+        A reference to the phase
+    """
+    name = "q_u"
+    names_u = [nlp.model.name_dof[i] for i in nlp.model.independent_joint_index]
+    ConfigureProblem.configure_new_variable(name, names_u, ocp, nlp, True, False, False)
+
+    name = "qdot_u"
+    names_qdot = ConfigureProblem._get_kinematics_based_names(nlp, "qdot")
+    names_udot = [names_qdot[i] for i in nlp.model.independent_joint_index]
+    ConfigureProblem.configure_new_variable(name, names_udot, ocp, nlp, True, False, False)
+
+    name = "q_v"
+    names_v = [nlp.model.name_dof[i] for i in nlp.model.dependent_joint_index]
+    ConfigureProblem.configure_new_variable(name, names_v, ocp, nlp, True, False, False)
+
+    ConfigureProblem.configure_tau(ocp, nlp, as_states=True, as_controls=False)
+
+    ConfigureProblem.configure_taudot(ocp, nlp, as_states=False, as_controls=True)
+
+    # extra plots
+    configure_lagrange_multipliers_function(
+        ocp,
+        nlp,
+        lambda q_u, q_v, qdot_u, tau: nlp.model.holonomic_dynamics_algebraic_bundle(q_u, q_v, qdot_u, tau)[
+            "lagrange_multipliers"
+        ],
+        with_algebraic_q_v=True,
+    )
+
+    ConfigureProblem.configure_dynamics_function(ocp, nlp, holonomic_torque_derivative_driven_algebraic)
+
+
+def holonomic_q_v(controller, q_u: MX) -> MX:
+    """
+    The dependent joints of the current node of a holonomic phase: the states q_v if the phase was configured with
+    configure_holonomic_torque_derivative_driven_algebraic, computed from q_u otherwise
+
+    Parameters
+    ----------
+    controller: PenaltyController
+        The controller of the holonomic phase
+    q_u: MX
+        The independent joints of the current node
+
+    Returns
+    -------
+    The dependent joints q_v
+    """
+    if "q_v" in controller.states:
+        return controller.states["q_v"].cx
+    return controller.model.compute_v_from_u_explicit_symbolic(q_u)
+
+
+def compiled_partitioned_forward_dynamics(model, dynamics_compilation: str, codegen_folder: str) -> Function:
+    """
+    Compile the expanded (SX) partitioned forward dynamics of a holonomic model
+
+    Parameters
+    ----------
+    model: BiorbdModelCustomHolonomic
+        The holonomic model
+    dynamics_compilation: str
+        "codegen" to generate the C code and load it as an external, "jit" to just-in-time compile it
+    codegen_folder: str
+        The folder where the generated C code and shared libraries are stored
 
-    ConfigureProblem.configure_dynamics_function(ocp, nlp, holonomic_torque_derivative_driven)
+    Returns
+    -------
+    The function (q_u, qdot_u, tau) -> qddot_u
+    """
+    q_u = MX.sym("q_u", model.nb_independent_joints, 1)
+    qdot_u = MX.sym("qdot_u", model.nb_independent_joints, 1)
+    tau = MX.sym("tau", model.nb_tau, 1)
+    forward_dynamics = Function(
+        "holonomic_partitioned_forward_dynamics",
+        [q_u, qdot_u, tau],
+        [model.partitioned_forward_dynamics(q_u, qdot_u, tau)],
+        ["q_u", "qdot_u", "tau"],
+        ["qddot_u"],
+    ).expand()
 
+    if dynamics_compilation == "jit":
+        sx_in = forward_dynamics.sx_in()
+        return Function(
+            forward_dynamics.name(),
+            sx_in,
+            [forward_dynamics(*sx_in)],
+            forward_dynamics.name_in(),
+            forward_dynamics.name_out(),
+            {"jit": True, "compiler": "shell", "jit_options": {"flags": ["-O3"]}},
+        )
 
-def configure_lagrange_multipliers_function(ocp, nlp, dyn_func: Callable, **extra_params):
+    folder = os.path.join(codegen_folder, holonomic_model_hash(model))
+    os.makedirs(folder, exist_ok=True)
+    # Jacobian and hessian terms are generated as well, as IPOPT needs the second order derivatives of the dynamics
+    return compile_function(forward_dynamics, folder, with_derivatives=2)
+
+
+def configure_lagrange_multipliers_function(
+    ocp, nlp, dyn_func: Callable, with_algebraic_q_v: bool = False, **extra_params
+):
     """
     Configure the contact points
 
@@ -80,9 +226,21 @@ def configure_lagrange_multipliers_function(ocp, nlp, dyn_func: Callable, **extr
         A reference to the phase
     dyn_func: Callable[time, states, controls, param, algebraic_states, numerical_timeseries]
         The function to get the values of contact forces from the dynamics
+    with_algebraic_q_v: bool
+        If the dependent joints are states, dyn_func is then called as dyn_func(q_u, q_v, qdot_u, tau)
     """
 
     time_span_sym = vertcat(nlp.time_mx, nlp.dt_mx)
+    q_u = nlp.get_var_from_states_or_controls("q_u", nlp.states.scaled.mx_reduced, nlp.controls.scaled.mx_reduced)
+    qdot_u = nlp.get_var_from_states_or_controls(
+        "qdot_u", nlp.states.scaled.mx_reduced, nlp.controls.scaled.mx_reduced
+    )
+    tau = nlp.get_var_from_states_or_controls("tau", nlp.states.scaled.mx_reduced, nlp.controls.scaled.mx_reduced)
+    if with_algebraic_q_v:
+        q_v = nlp.get_var_from_states_or_controls("q_v", nlp.states.scaled.mx_reduced, nlp.controls.scaled.mx_reduced)
+        lagrange_multipliers = dyn_func(q_u, q_v, qdot_u, tau)
+    else:
+        lagrange_multipliers = dyn_func(q_u, qdot_u, tau)
     nlp.lagrange_multipliers_function = Function(
         "lagrange_multipliers_function",
         [
@@ -93,19 +251,7 @@ def configure_lagrange_multipliers_function(ocp, nlp, dyn_func: Callable, **extr
             nlp.algebraic_states.scaled.mx_reduced,
             nlp.numerical_timeseries.mx,
         ],
-        [
-            dyn_func(
-                nlp.get_var_from_states_or_controls(
-                    "q_u", nlp.states.scaled.mx_reduced, nlp.controls.scaled.mx_reduced
-                ),
-                nlp.get_var_from_states_or_controls(
-                    "qdot_u", nlp.states.scaled.mx_reduced, nlp.controls.scaled.mx_reduced
-                ),
-                nlp.get_var_from_states_or_controls(
-                    "tau", nlp.states.scaled.mx_reduced, nlp.controls.scaled.mx_reduced
-                ),
-            )
-        ],
+        [lagrange_multipliers],
         ["t_span", "x", "u", "p", "a", "d"],
         ["lagrange_multipliers"],
     )
@@ -147,6 +293,7 @@ def holonomic_torque_derivative_driven(
     numerical_timeseries: MX.sym,
     nlp,
     external_forces: list = None,
+    forward_dynamics: Function = None,
 ) -> DynamicsEvaluation:
     """
     The custom dynamics function that provides the derivative of the states: dxdt = f(t, x, u, p, a, d)
@@ -169,6 +316,8 @@ def holonomic_torque_derivative_driven(
         A reference to the phase
     external_forces: list[Any]
         The external forces
+    forward_dynamics: Function
+        The compiled partitioned forward dynamics (q_u, qdot_u, tau) -> qddot_u, traced from the model if None
 
     Returns
     -------
@@ -179,6 +328,63 @@ def holonomic_torque_derivative_driven(
     qdot_u = DynamicsFunctions.get(nlp.states["qdot_u"], states)
     tau = DynamicsFunctions.get(nlp.states["tau"], states)
     taudot = controls
-    qddot_u = nlp.model.partitioned_forward_dynamics(q_u, qdot_u, tau, external_forces=external_forces)
+    if forward_dynamics is None:
+        if external_forces is not None:
+            raise NotImplementedError("External forces are not implemented yet.")
+        qddot_u = nlp.model.holonomic_dynamics_bundle(q_u, qdot_u, tau)["qddot_u"]
+    else:
+        qddot_u = forward_dynamics(q_u, qdot_u, tau)
 
     return DynamicsEvaluation(dxdt=vertcat(qdot_u, qddot_u, taudot), defects=None)
+
+
+def holonomic_torque_derivative_driven_algebraic(
+    time: MX.sym,
+    states: MX.sym,
+    controls: MX.sym,
+    parameters: MX.sym,
+    algebraic_states: MX.sym,
+    numerical_timeseries: MX.sym,
+    nlp,
+    external_forces: list = None,
+) -> DynamicsEvaluation:
+    """
+    The custom dynamics function that provides the derivative of the states: dxdt = f(t, x, u, p, a, d),
+    the dependent joints q_v being states moving with the independent joints, qdot_v = B_vu qdot_u
+
+    Parameters
+    ----------
+    time: MX.sym
+        The time of the system
+    states: MX.sym
+        The state of the system
+    controls: MX.sym
+        The controls of the system
+    parameters: MX.sym
+        The parameters acting on the system
+    algebraic_states: MX.sym
+        The algebraic states of the system
+    numerical_timeseries: MX.sym
+        The numerical timeseries of the system
+    nlp: NonLinearProgram
+        A reference to the phase
+    external_forces: list[Any]
+        The external forces
+
+    Returns
+    -------
+    The derivative of the states in the tuple[MX | SX] format
+    """
+    if external_forces is not None:
+        raise NotImplementedError("External forces are not implemented yet.")
+
+    q_u = DynamicsFunctions.get(nlp.states["q_u"], states)
+    qdot_u = DynamicsFunctions.get(nlp.states["qdot_u"], states)
+    tau = DynamicsFunctions.get(nlp.states["tau"], states)
+    q_v = DynamicsFunctions.get(nlp.states["q_v"], states)
+    taudot = controls
+    bundle = nlp.model.holonomic_dynamics_algebraic_bundle(q_u, q_v, qdot_u, tau)
+    qdot_v = bundle["coupling_matrix"] @ qdot_u
+
+    # Same order as the states: q_u, qdot_u, q_v, tau
+    return DynamicsEvaluation(dxdt=vertcat(qdot_u, bundle["qddot_u"], qdot_v, taudot), defects=None)
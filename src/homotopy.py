@@ -0,0 +1,170 @@
+"""
+Continuation from the kinematic tucking constraint (KTC) to the holonomic tucking constraint (HTC): both problems only
+differ in the tucked phase, so a converged KTC solution is converted into an initial guess of the HTC problem (q and
+qdot projected on the independent joints, tau recomputed from the holonomic dynamics), then the bounds of the friction
+cone of the tucked phase are optionally tightened from relaxed bounds to the actual ones, each stage being warm started
+from the previous one.
+"""
+
+import numpy as np
+from bioptim import Solver
+from casadi import MX, Function, jacobian, vertcat
+
+from .warm_start import cold_start_solver, solution_iterates, warm_start_ocp
+
+
+def holonomic_actuator_torques(model, q_u: np.ndarray, qdot_u: np.ndarray, qddot_u: np.ndarray) -> np.ndarray:
+    """
+    The actuator torques (the root is not actuated) of each node closest to an independent joints acceleration, in the
+    least squares sense since the root accelerations cannot be set by the actuators.
+    qddot_u is affine in tau, qddot_u = A tau + b, with A and b evaluated once per node.
+
+    Parameters
+    ----------
+    model: BiorbdModelCustomHolonomic
+        The holonomic model of the tucked phase, with its holonomic configuration set
+    q_u: np.ndarray
+        The independent generalized coordinates of each node
+    qdot_u: np.ndarray
+        The independent generalized velocities of each node
+    qddot_u: np.ndarray
+        The independent generalized accelerations of each node
+
+    Returns
+    -------
+    The actuator torques of each node
+    """
+    n_root = model.nb_root
+    q_u_sym = MX.sym("q_u", model.nb_independent_joints, 1)
+    qdot_u_sym = MX.sym("qdot_u", model.nb_independent_joints, 1)
+    tau_sym = MX.sym("tau", model.nb_tau - n_root, 1)
+    qddot_u_sym = model.holonomic_dynamics_bundle(q_u_sym, qdot_u_sym, vertcat(MX.zeros(n_root), tau_sym))["qddot_u"]
+    affine_dynamics = Function(
+        "affine_dynamics",
+        [q_u_sym, qdot_u_sym, tau_sym],
+        [jacobian(qddot_u_sym, tau_sym), qddot_u_sym],
+    )
+
+    tau = np.zeros((model.nb_tau - n_root, q_u.shape[1]))
+    for node in range(q_u.shape[1]):
+        a, b = affine_dynamics(q_u[:, node], qdot_u[:, node], np.zeros(tau.shape[0]))
+        tau[:, node] = np.linalg.lstsq(np.array(a), qddot_u[:, node] - np.array(b).squeeze(), rcond=None)[0]
+    return tau
+
+
+def htc_iterates_from_ktc(ktc_data: dict, htc_ocp, holonomic_phase: int = 2) -> dict:
+    """
+    The iterates of a KTC solution converted for the HTC ocp (see warm_start_ocp with with_multipliers=False, the
+    multipliers of the KTC constraints do not match the HTC ones)
+
+    Parameters
+    ----------
+    ktc_data: dict
+        The iterates of the KTC solution, from solution_iterates
+    htc_ocp: OptimalControlProgram
+        The HTC ocp, of the same mesh as the KTC solution
+    holonomic_phase: int
+        The tucked phase, holonomic in the HTC ocp
+
+    Returns
+    -------
+    The iterates of the HTC ocp
+    """
+    nlp = htc_ocp.nlp[holonomic_phase]
+    model = nlp.model
+    states = dict(ktc_data["states"][holonomic_phase])
+    controls = dict(ktc_data["controls"][holonomic_phase])
+
+    q = states.pop("q")
+    qdot = states.pop("qdot")
+    q_u = q[model.independent_joint_index, :]
+    qdot_u = qdot[model.independent_joint_index, :]
+    time = np.linspace(0, ktc_data["phase_time"][holonomic_phase], q.shape[1])
+
+    # The KTC torques hold the tucking without the hand-knee forces, they are recomputed with the holonomic dynamics
+    tau = holonomic_actuator_torques(model, q_u, qdot_u, np.gradient(qdot_u, time, axis=1))
+    states.update({"q_u": q_u, "qdot_u": qdot_u, "tau": tau})
+    if "q_v" in nlp.states:
+        states["q_v"] = q[model.dependent_joint_index, :]
+    controls["taudot"] = np.gradient(tau, time, axis=1)[:, : controls["taudot"].shape[1]]
+
+    data = dict(ktc_data)
+    for key, values in (("states", states), ("controls", controls)):
+        data[key] = list(ktc_data[key])
+        data[key][holonomic_phase] = values
+    data["lam_g"] = None
+    data["lam_x"] = None
+    return data
+
+
+class KtcToHtcPrepareOcp:
+    """
+    prepare_ocp callback solving the KTC ocp of a run and returning the HTC ocp warm started from its solution, with
+    its optimized phase times. The friction cone can be relaxed in intermediate HTC stages solved before the returned
+    ocp. If the KTC ocp does not converge, the HTC ocp is returned with its own initial guess.
+    """
+
+    def __init__(
+        self,
+        prepare_ocp_ktc,
+        prepare_ocp_htc,
+        solver: Solver.IPOPT,
+        friction_cone_relaxations: tuple = (),
+        n_shooting_index: int = 2,
+        phase_time_index: int = 1,
+    ):
+        """
+        Parameters
+        ----------
+        prepare_ocp_ktc: Callable
+            The function building the KTC ocp from the combinatorial parameters
+        prepare_ocp_htc: Callable
+            The function building the HTC ocp from the combinatorial parameters, with a friction_cone_relaxation
+            keyword argument
+        solver: Solver.IPOPT
+            The solver of the KTC ocp and of the relaxed HTC stages
+        friction_cone_relaxations: tuple
+            The relaxation [N] of the friction cone of each intermediate HTC stage, from the most relaxed
+            (e.g. (10, 1)), () to warm start the actual HTC ocp directly from the KTC solution
+        n_shooting_index: int
+            The position of n_shooting in the combinatorial parameters of prepare_ocp
+        phase_time_index: int
+            The position of phase_time in the combinatorial parameters of prepare_ocp
+        """
+        self.prepare_ocp_ktc = prepare_ocp_ktc
+        self.prepare_ocp_htc = prepare_ocp_htc
+        self.solver = solver
+        self.friction_cone_relaxations = friction_cone_relaxations
+        self.n_shooting_index = n_shooting_index
+        self.phase_time_index = phase_time_index
+
+    def _htc_ocp(self, parameters: list, extra_parameters: dict, data: dict, relaxation: float, from_ktc: bool):
+        ocp = self.prepare_ocp_htc(*parameters, friction_cone_relaxation=relaxation, **extra_parameters)
+        if from_ktc:
+            warm_start_ocp(ocp, htc_iterates_from_ktc(data, ocp), self.solver, with_multipliers=False)
+        else:
+            # The relaxed stages have the same constraints as the actual HTC ocp, only their bounds change
+            warm_start_ocp(ocp, data, self.solver)
+        return ocp
+
+    def __call__(self, *combinatorial_parameters, **extra_parameters):
+        parameters = list(combinatorial_parameters)
+        n_shooting = parameters[self.n_shooting_index]
+
+        # The solver may still hold the warm start options of the last stage of the previous run
+        cold_start_solver(self.solver)
+        sol = self.prepare_ocp_ktc(*parameters, **extra_parameters).solve(self.solver)
+        if sol.status != 0:
+            return self.prepare_ocp_htc(*parameters, **extra_parameters)
+        data = solution_iterates(sol, n_shooting)
+        parameters[self.phase_time_index] = data["phase_time"]
+
+        from_ktc = True
+        for relaxation in self.friction_cone_relaxations:
+            sol = self._htc_ocp(parameters, extra_parameters, data, relaxation, from_ktc).solve(self.solver)
+            if sol.status == 0:
+                data = solution_iterates(sol, n_shooting)
+                parameters[self.phase_time_index] = data["phase_time"]
+                from_ktc = False
+
+        return self._htc_ocp(parameters, extra_parameters, data, 0.0, from_ktc)
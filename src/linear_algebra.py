@@ -0,0 +1,132 @@
+"""
+Dense linear solves written with casadi operations, so that they can be traced symbolically (MX, SX) or evaluated (DM).
+They replace the explicit inverses of the holonomic models by solves adapted to the structure of each matrix.
+"""
+
+from casadi import inv, solve, sqrt, vertcat, horzcat
+
+LINEAR_SOLVERS = ("inv", "symbolicqr", "structured")
+
+
+def cholesky_solve(A, b):
+    """
+    Solve A x = b with a Cholesky factorization A = L L^T, A must be symmetric positive definite (e.g. a mass matrix)
+
+    Parameters
+    ----------
+    A: MX | SX | DM
+        The symmetric positive definite matrix
+    b: MX | SX | DM
+        The right-hand side, one system per column
+
+    Returns
+    -------
+    The solution x
+    """
+    n = A.shape[0]
+    L = [[None] * n for _ in range(n)]
+    for j in range(n):
+        L[j][j] = sqrt(A[j, j] - sum(L[j][k] ** 2 for k in range(j)))
+        for i in range(j + 1, n):
+            L[i][j] = (A[i, j] - sum(L[i][k] * L[j][k] for k in range(j))) / L[j][j]
+
+    columns = []
+    for c in range(b.shape[1]):
+        y = [None] * n
+        for i in range(n):
+            y[i] = (b[i, c] - sum(L[i][k] * y[k] for k in range(i))) / L[i][i]
+        x = [None] * n
+        for i in reversed(range(n)):
+            x[i] = (y[i] - sum(L[k][i] * x[k] for k in range(i + 1, n))) / L[i][i]
+        columns.append(vertcat(*x))
+    return horzcat(*columns)
+
+
+def lu_solve(A, b):
+    """
+    Solve A x = b with a LU factorization without pivoting (Doolittle), A must have non-zero leading principal minors
+
+    Parameters
+    ----------
+    A: MX | SX | DM
+        The square matrix
+    b: MX | SX | DM
+        The right-hand side, one system per column
+
+    Returns
+    -------
+    The solution x
+    """
+    n = A.shape[0]
+    L = [[None] * n for _ in range(n)]
+    U = [[None] * n for _ in range(n)]
+    for i in range(n):
+        for k in range(i, n):
+            U[i][k] = A[i, k] - sum(L[i][j] * U[j][k] for j in range(i))
+        for k in range(i + 1, n):
+            L[k][i] = (A[k, i] - sum(L[k][j] * U[j][i] for j in range(i))) / U[i][i]
+
+    columns = []
+    for c in range(b.shape[1]):
+        y = [None] * n
+        for i in range(n):
+            y[i] = b[i, c] - sum(L[i][k] * y[k] for k in range(i))
+        x = [None] * n
+        for i in reversed(range(n)):
+            x[i] = (y[i] - sum(U[i][k] * x[k] for k in range(i + 1, n))) / U[i][i]
+        columns.append(vertcat(*x))
+    return horzcat(*columns)
+
+
+def closed_form_2x2_solve(A, b):
+    """
+    Solve A x = b for a 2x2 matrix with its closed-form inverse (adjugate over determinant)
+
+    Parameters
+    ----------
+    A: MX | SX | DM
+        The 2x2 matrix
+    b: MX | SX | DM
+        The right-hand side, one system per column
+
+    Returns
+    -------
+    The solution x
+    """
+    determinant = A[0, 0] * A[1, 1] - A[0, 1] * A[1, 0]
+    adjugate = vertcat(horzcat(A[1, 1], -A[0, 1]), horzcat(-A[1, 0], A[0, 0]))
+    return adjugate @ b / determinant
+
+
+def solve_linear_system(A, b, linear_solver: str = "inv", symmetric_positive_definite: bool = False):
+    """
+    Solve A x = b with the selected linear solver
+
+    Parameters
+    ----------
+    A: MX | SX | DM
+        The square matrix
+    b: MX | SX | DM
+        The right-hand side, one system per column
+    linear_solver: str
+        "inv" for the explicit inverse, "symbolicqr" for the casadi symbolic QR, "structured" for a Cholesky
+        factorization of symmetric positive definite matrices, a closed-form solve of 2x2 matrices and a LU
+        factorization otherwise
+    symmetric_positive_definite: bool
+        If A is known to be symmetric positive definite
+
+    Returns
+    -------
+    The solution x
+    """
+    if linear_solver == "inv":
+        return inv(A) @ b
+    if linear_solver == "symbolicqr":
+        return solve(A, b, "symbolicqr")
+    if linear_solver == "structured":
+        if symmetric_positive_definite:
+            return cholesky_solve(A, b)
+        if A.shape == (2, 2):
+            return closed_form_2x2_solve(A, b)
+        return lu_solve(A, b)
+    raise ValueError(f"linear_solver must be one of {LINEAR_SOLVERS}")
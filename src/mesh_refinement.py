@@ -0,0 +1,106 @@
+"""
+Coarse-to-fine continuation on the mesh of the ocp: the problem is first solved on coarse meshes, each solution is
+interpolated on the next mesh (all the states and controls of each phase, e.g. q_u and qdot_u of the holonomic phase,
+tau and taudot) and used as warm start, up to the fine mesh that is returned to be solved.
+"""
+
+import numpy as np
+from bioptim import Solver
+
+from .warm_start import WarmStartStore, cold_start_solver, solution_iterates, warm_start_ocp
+
+
+def coarse_meshes(n_shooting, factors: tuple) -> list[tuple]:
+    """
+    The coarse meshes solved before a fine mesh
+
+    Parameters
+    ----------
+    n_shooting:
+        The number of shooting nodes of each phase of the fine mesh
+    factors: tuple
+        The fraction of the fine mesh of each coarse mesh, from the coarsest
+
+    Returns
+    -------
+    The number of shooting nodes of each phase of each coarse mesh, at least one node per phase
+    """
+    return [tuple(max(1, int(round(n * factor))) for n in np.atleast_1d(n_shooting)) for factor in factors]
+
+
+class MeshRefinedPrepareOcp:
+    """
+    prepare_ocp callback solving the coarse meshes of a run and returning the ocp of its fine mesh warm started from
+    the last converged coarse solution, with its optimized phase times. A coarse mesh that does not converge is skipped.
+    With a store, the converged coarse solutions are recorded and the coarse meshes already converged are not solved
+    again, so that a seed interrupted during its fine solve resumes from its last coarse solution.
+    """
+
+    def __init__(
+        self,
+        prepare_ocp,
+        solver: Solver.IPOPT,
+        factors: tuple,
+        n_shooting_index: int = 2,
+        phase_time_index: int = 1,
+        store: WarmStartStore = None,
+    ):
+        """
+        Parameters
+        ----------
+        prepare_ocp: Callable
+            The function building the ocp from the combinatorial parameters
+        solver: Solver.IPOPT
+            The solver of the coarse meshes
+        factors: tuple
+            The fraction of the fine mesh of each coarse mesh, from the coarsest (e.g. (0.25, 0.5))
+        n_shooting_index: int
+            The position of n_shooting in the combinatorial parameters of prepare_ocp
+        phase_time_index: int
+            The position of phase_time in the combinatorial parameters of prepare_ocp
+        store: WarmStartStore
+            If given, the converged coarse solutions of each seed are recorded in the store and reused
+        """
+        self.prepare_ocp = prepare_ocp
+        self.solver = solver
+        self.factors = factors
+        self.n_shooting_index = n_shooting_index
+        self.phase_time_index = phase_time_index
+        self.store = store
+
+    def __call__(self, *combinatorial_parameters, **extra_parameters):
+        parameters = list(combinatorial_parameters)
+        fine_mesh = parameters[self.n_shooting_index]
+
+        data = None
+        for mesh in coarse_meshes(fine_mesh, self.factors):
+            # The coarse solutions are stored under the combinatorial parameters of the run, not the optimized times
+            store_parameters = list(combinatorial_parameters)
+            store_parameters[self.n_shooting_index] = mesh
+            stored = None if self.store is None else self.store.load(*store_parameters)
+            if stored is not None:
+                data = stored
+                parameters[self.phase_time_index] = data["phase_time"]
+                continue
+
+            parameters[self.n_shooting_index] = mesh
+            ocp = self.prepare_ocp(*parameters, **extra_parameters)
+            if data is None:
+                # The solver may still hold the warm start options of the fine mesh of the previous run
+                cold_start_solver(self.solver)
+            else:
+                warm_start_ocp(ocp, data, self.solver)
+            sol = ocp.solve(self.solver)
+            if sol.status == 0:
+                data = solution_iterates(sol, mesh)
+                parameters[self.phase_time_index] = data["phase_time"]
+                if self.store is not None:
+                    self.store.record(sol, *store_parameters)
+
+        parameters[self.n_shooting_index] = fine_mesh
+        ocp = self.prepare_ocp(*parameters, **extra_parameters)
+        if data is None:
+            cold_start_solver(self.solver)
+        else:
+            warm_start_ocp(ocp, data, self.solver)
+        return ocp
@@ -1,5 +1,23 @@
+import itertools
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from functools import partial
+from typing import Callable, Iterator
+
 from bioptim import Solver, MultiStart
 
+from .constants import MULTI_START_N_THREADS
+from .results_store import STORE_FOLDER
+from .seed_pruning import SeedPruning, install_pruning_callback
+from .warm_start import WarmStartStore, WarmStartedPrepareOcp, WarmStartRecordingSaveResults
+
+CAMPAIGN_MANIFEST = "campaign_manifest.jsonl"
+THREAD_VARIABLES = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
+
 
 def prepare_multi_start(
     prepare_ocp,
@@ -8,10 +26,29 @@ def prepare_multi_start(
     save_folder: str = None,
     n_pools: int = 10,
     solver: Solver = None,
+    warm_start_store: WarmStartStore = None,
+    pruning: SeedPruning = None,
 ):
     """
     The initialization of the multi-start
+
+    Parameters
+    ----------
+    warm_start_store: WarmStartStore
+        If given, the converged solutions are recorded in the store and each seed that already converged starts from
+        its solution (with the IPOPT warm start options), instead of the initial guess of prepare_ocp
+    pruning: SeedPruning
+        If given, the seeds that cannot beat the best converged seed of the campaign are aborted (requires save_folder)
     """
+    if warm_start_store is not None:
+        if solver is None:
+            solver = Solver.IPOPT()
+        prepare_ocp = WarmStartedPrepareOcp(prepare_ocp, warm_start_store, solver)
+        save_results = WarmStartRecordingSaveResults(save_results, warm_start_store)
+    if pruning is not None:
+        prepare_ocp = PrunedPrepareOcp(prepare_ocp, pruning, save_folder)
+    if save_folder is not None:
+        save_results = CampaignRecordingSaveResults(save_results)
 
     return MultiStart(
         combinatorial_parameters=combinatorial_parameters,
@@ -23,5 +60,302 @@ def prepare_multi_start(
     )
 
 
+def available_cores() -> list[int]:
+    """The cores this process is allowed to run on"""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count()))
+
+
+def _pin_worker(cores_queue):
+    """Initializer of the workers of the pool: pin the worker on its own block of cores"""
+    cores = cores_queue.get()
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+
+
+@contextmanager
+def _thread_environment(n_threads: int):
+    """
+    Set the number of threads of the BLAS and OpenMP libraries in the environment inherited by the spawned workers,
+    these libraries read it once when they are loaded, before any initializer of the pool runs
+    """
+    previous = {variable: os.environ.get(variable) for variable in THREAD_VARIABLES}
+    os.environ.update({variable: str(n_threads) for variable in THREAD_VARIABLES})
+    try:
+        yield
+    finally:
+        for variable, value in previous.items():
+            if value is None:
+                os.environ.pop(variable, None)
+            else:
+                os.environ[variable] = value
+
+
+def _solve_one(
+    prepare_ocp: Callable,
+    save_results: Callable,
+    solver: Solver,
+    save_folder: str,
+    n_threads: int,
+    combinatorial_parameters: tuple,
+) -> dict:
+    """Solve and save one run of the multi-start in a worker, only a summary is sent back to the scheduler"""
+    tic = time.perf_counter()
+    if not should_solve(*combinatorial_parameters, save_folder=save_folder):
+        return {"combinatorial_parameters": combinatorial_parameters, "solved": False}
+
+    sol = prepare_ocp(*combinatorial_parameters, n_threads=n_threads).solve(solver)
+    summary = {
+        "combinatorial_parameters": combinatorial_parameters,
+        "solved": True,
+        "status": sol.status,
+        "cost": float(sol.cost),
+        "iterations": sol.iterations,
+        "solve_time": sol.real_time_to_optimize,
+    }
+    save_results(sol, *combinatorial_parameters, save_folder=save_folder)
+    summary["wall_time"] = time.perf_counter() - tic
+    return summary
+
+
+class MultiStartScheduler:
+    """
+    Process pool running the multi-start runs in parallel. The available cores are divided between the processes,
+    each process is pinned on its own block of cores and gives it to the n_threads of its ocp, so that prepare_ocp must
+    accept a n_threads keyword argument. The workers are spawned, prepare_ocp and save_results must be importable.
+    The results are streamed as the runs finish.
+    """
+
+    def __init__(
+        self,
+        prepare_ocp: Callable,
+        save_results: Callable,
+        combinatorial_parameters: dict,
+        save_folder: str = None,
+        n_pools: int = None,
+        n_cores: int = None,
+        solver: Solver = None,
+        warm_start_store: WarmStartStore = None,
+        pruning: SeedPruning = None,
+    ):
+        """
+        Parameters
+        ----------
+        prepare_ocp: Callable
+            The function building the ocp from the combinatorial parameters and n_threads
+        save_results: Callable
+            The function saving a solution, called in the workers
+        combinatorial_parameters: dict
+            The lists of values of each parameter of prepare_ocp, all their combinations are solved
+        save_folder: str
+            The folder where the solutions are saved
+        n_pools: int
+            The number of processes, one per block of MULTI_START_N_THREADS cores (or per run if fewer) by default
+        n_cores: int
+            The number of cores used, all the available cores by default
+        solver: Solver
+            The solver of the ocp
+        warm_start_store: WarmStartStore
+            If given, the runs are warm started from the store (see prepare_multi_start)
+        pruning: SeedPruning
+            If given, the hopeless seeds are aborted (see prepare_multi_start)
+        """
+        if solver is None:
+            solver = Solver.IPOPT()
+        if warm_start_store is not None:
+            prepare_ocp = WarmStartedPrepareOcp(prepare_ocp, warm_start_store, solver)
+            save_results = WarmStartRecordingSaveResults(save_results, warm_start_store)
+        if pruning is not None:
+            prepare_ocp = PrunedPrepareOcp(prepare_ocp, pruning, save_folder)
+        if save_folder is not None:
+            save_results = CampaignRecordingSaveResults(save_results)
+
+        self.prepare_ocp = prepare_ocp
+        self.save_results = save_results
+        self.runs = list(itertools.product(*combinatorial_parameters.values()))
+        self.save_folder = save_folder
+        self.solver = solver
+
+        cores = available_cores()
+        if n_cores is not None:
+            cores = cores[:n_cores]
+        if n_pools is None:
+            n_pools = min(len(self.runs), max(1, len(cores) // MULTI_START_N_THREADS))
+        self.n_pools = n_pools
+        self.n_threads = max(1, len(cores) // self.n_pools)
+        self.core_blocks = [
+            cores[i * self.n_threads : (i + 1) * self.n_threads] or cores for i in range(self.n_pools)
+        ]
+
+    def solve(self) -> Iterator[dict]:
+        """
+        Solve all the runs
+
+        Returns
+        -------
+        The summaries of the runs (combinatorial parameters, status, cost, iterations and times), as they finish
+        """
+        context = multiprocessing.get_context("spawn")
+        cores_queue = context.Queue()
+        for cores in self.core_blocks:
+            cores_queue.put(cores)
+
+        with _thread_environment(self.n_threads), ProcessPoolExecutor(
+            max_workers=self.n_pools,
+            mp_context=context,
+            initializer=_pin_worker,
+            initargs=(cores_queue,),
+        ) as executor:
+            futures = [
+                executor.submit(
+                    _solve_one,
+                    self.prepare_ocp,
+                    self.save_results,
+                    self.solver,
+                    self.save_folder,
+                    self.n_threads,
+                    run,
+                )
+                for run in self.runs
+            ]
+            for future in as_completed(futures):
+                yield future.result()
+
+
+def format_run_summary(summary: dict) -> str:
+    """The summary of a run of the scheduler (see MultiStartScheduler.solve) as one line"""
+    seed = summary["combinatorial_parameters"][-1]
+    if not summary["solved"]:
+        return f"Seed {seed}: already saved, skipped"
+    return (
+        f"Seed {seed}: {'CVG' if summary['status'] == 0 else 'DVG'}, cost {summary['cost']:.6g}, "
+        f"{summary['iterations']} iterations, solve {summary['solve_time']:.1f} s, wall {summary['wall_time']:.1f} s"
+    )
+
+
+def saved_solution_path(save_folder: str, seed) -> str | None:
+    """
+    The file of the solution of a seed saved by the save_results functions (pickle or entry of the columnar store),
+    None if it was not saved yet
+    """
+    for suffix in ("_CVG", "_DVG"):
+        file_path = f"{save_folder}/sol_{seed}{suffix}.pkl"
+        if os.path.exists(file_path):
+            return file_path
+        entry_path = os.path.join(save_folder, STORE_FOLDER, f"sol_{seed}{suffix}")
+        if os.path.exists(os.path.join(entry_path, "metadata.json")):
+            return entry_path
+    return None
+
+
+def _append_to_manifest(save_folder: str, event: dict):
+    """Append an event to the manifest of the campaign, one json per line so that the workers can append concurrently"""
+    if not os.path.exists(save_folder):
+        os.makedirs(save_folder, exist_ok=True)
+    with open(os.path.join(save_folder, CAMPAIGN_MANIFEST), "a") as file:
+        file.write(json.dumps(event) + "\n")
+
+
+def read_campaign_manifest(save_folder: str) -> dict[str, dict]:
+    """
+    The state of each seed of a campaign, from the events of its manifest
+
+    Parameters
+    ----------
+    save_folder: str
+        The folder of the campaign
+
+    Returns
+    -------
+    For each seed, the time it was last started, the number of times it was started, and once it is finished,
+    its status ("CVG" or "DVG"), its cost, its number of iterations, its solve time and its wall time (from the start
+    of the run to the end of the save)
+    """
+    seeds = {}
+    file_path = os.path.join(save_folder, CAMPAIGN_MANIFEST)
+    if not os.path.exists(file_path):
+        return seeds
+
+    with open(file_path, "r") as file:
+        for line in file:
+            if not line.strip():
+                continue
+            event = json.loads(line)
+            seed = seeds.setdefault(event["seed"], {"n_starts": 0})
+            if event["event"] == "started":
+                seed["n_starts"] += 1
+                seed["started_at"] = event["time"]
+            else:
+                seed.update({key: value for key, value in event.items() if key not in ("seed", "event")})
+    return seeds
+
+
+def campaign_best_cost(save_folder: str) -> float | None:
+    """The best cost of the converged seeds of a campaign, None if no seed converged yet"""
+    costs = [
+        seed["cost"] for seed in read_campaign_manifest(save_folder).values() if seed.get("status") == "CVG"
+    ]
+    return min(costs) if costs else None
+
+
+class PrunedPrepareOcp:
+    """prepare_ocp callback of the multi-start installing the iteration callback aborting the hopeless seeds"""
+
+    def __init__(self, prepare_ocp, pruning: SeedPruning, save_folder: str):
+        if save_folder is None:
+            raise ValueError("The pruning of the seeds needs a save_folder to know the best cost of the campaign")
+        self.prepare_ocp = prepare_ocp
+        self.pruning = pruning
+        self.save_folder = save_folder
+
+    def __call__(self, *combinatorial_parameters, **extra_parameters):
+        ocp = self.prepare_ocp(*combinatorial_parameters, **extra_parameters)
+        install_pruning_callback(ocp, self.pruning, partial(campaign_best_cost, self.save_folder))
+        return ocp
+
+
+class CampaignRecordingSaveResults:
+    """post_optimization callback of the multi-start recording the end of each run in the manifest of the campaign"""
+
+    def __init__(self, save_results):
+        self.save_results = save_results
+
+    def __call__(self, sol, *combinatorial_parameters, **extra_parameters):
+        save_folder = extra_parameters["save_folder"]
+        seed = str(combinatorial_parameters[-1])
+        event = {
+            "seed": seed,
+            "event": "finished",
+            "status": "CVG" if sol.status == 0 else "DVG",
+            "cost": float(sol.cost),
+            "iterations": sol.iterations,
+            "solve_time": sol.real_time_to_optimize,
+        }
+        result = self.save_results(sol, *combinatorial_parameters, **extra_parameters)
+
+        started_at = read_campaign_manifest(save_folder).get(seed, {}).get("started_at")
+        event["time"] = time.time()
+        event["wall_time"] = None if started_at is None else event["time"] - started_at
+        _append_to_manifest(save_folder, event)
+        return result
+
+
 def should_solve(*combinatorial_parameters, **extra_parameters):
+    """
+    Skip the seeds already saved in the save folder (_CVG or _DVG), so that an interrupted campaign only solves the
+    seeds that were not saved. A seed that was started but not saved is solved again from the start of its prepare_ocp:
+    its own initial guess, or its last converged coarse mesh if the mesh refinement records them in a WarmStartStore
+    (see MeshRefinedPrepareOcp). The intermediate iterates of an interrupted solve are not kept. The start of each run
+    is recorded in the manifest of the campaign.
+    """
+    save_folder = extra_parameters["save_folder"]
+    if save_folder is None:
+        return True
+
+    seed = combinatorial_parameters[-1]
+    if saved_solution_path(save_folder, seed) is not None:
+        return False
+
+    _append_to_manifest(save_folder, {"seed": str(seed), "event": "started", "time": time.time()})
     return True
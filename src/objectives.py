@@ -6,10 +6,65 @@ from bioptim import (
 )
 import casadi as cas
 
-from .actuators import actuator_function
-
-
-def minimize_actuator_torques(controller: PenaltyController, actuators) -> cas.MX:
+from .actuators import ActuatorTable
+from .holonomic_torque_derivative_dynamics import holonomic_q_v
+
+
+ACTUATOR_ENVELOPES = ("switch", "tanh", "softplus")
+
+
+def actuator_torque_ratios_squared(
+    q_joints: cas.MX, tau: cas.MX, actuators, envelope: str = "switch", sharpness: float = 1.0
+) -> cas.MX:
+    """
+    The sum of the squared ratios between the torques and the maximal torques of the actuators, computed for all the
+    joints in a single element-wise expression
+
+    Parameters
+    ----------
+    q_joints: MX
+        The generalized coordinates of the actuated joints
+    tau: MX
+        The torques of the actuated joints
+    actuators: dict[str, Joint] | ActuatorTable
+        The actuators of the joints, in the same order
+    envelope: str
+        How the positive and negative envelopes are combined:
+        "switch" selects the envelope with the sign of the torque (if_else, non-smooth at tau = 0),
+        "tanh" blends the envelopes with 0.5 * (1 + tanh(sharpness * tau)),
+        "softplus" splits the torque in smooth positive and negative parts (softplus(sharpness * tau) / sharpness and
+        -softplus(-sharpness * tau) / sharpness, which sum to tau), each divided by its own envelope
+    sharpness: float
+        The sharpness of the smooth envelopes [1/Nm], the larger the closer to the switch
+
+    Returns
+    -------
+    The sum of the squared torque ratios
+    """
+    if envelope not in ACTUATOR_ENVELOPES:
+        raise ValueError(f"envelope must be one of {ACTUATOR_ENVELOPES}")
+
+    table = actuators if isinstance(actuators, ActuatorTable) else ActuatorTable(actuators)
+    if envelope == "switch":
+        return cas.sum1((tau / table.max_torque(q_joints, tau)) ** 2)
+
+    max_tau_plus = table.max_torque(q_joints, 1)
+    max_tau_minus = table.max_torque(q_joints, -1)
+    if envelope == "tanh":
+        positive_weight = 0.5 * (1 + cas.tanh(sharpness * tau))
+        max_tau = positive_weight * max_tau_plus + (1 - positive_weight) * max_tau_minus
+        return cas.sum1((tau / max_tau) ** 2)
+
+    # softplus(x) = max(x, 0) + log(1 + exp(-|x|)), the exponential never overflows, neither in the derivatives
+    x = sharpness * tau
+    tau_plus = (cas.fmax(x, 0) + cas.log1p(cas.exp(-cas.fabs(x)))) / sharpness
+    tau_minus = tau - tau_plus
+    return cas.sum1((tau_plus / max_tau_plus) ** 2 + (tau_minus / max_tau_minus) ** 2)
+
+
+def minimize_actuator_torques(
+    controller: PenaltyController, actuators, envelope: str = "switch", sharpness: float = 1.0
+) -> cas.MX:
     q = controller.states["q"].cx_start
 
     if "tau" in controller.states:
@@ -17,26 +72,17 @@ def minimize_actuator_torques(controller: PenaltyController, actuators) -> cas.M
     else:
         tau = controller.controls["tau"].cx_start
 
-    out = 0
-    for i, key in enumerate(actuators.keys()):
-        current_max_tau = cas.if_else(
-            tau[i] > 0,
-            actuator_function(
-                actuators[key].tau_max_plus, actuators[key].theta_opt_plus, actuators[key].r_plus, q[i + 3]
-            ),
-            actuator_function(
-                actuators[key].tau_max_minus, actuators[key].theta_opt_minus, actuators[key].r_minus, q[i + 3]
-            ),
-        )
-        out += (tau[i] / current_max_tau) ** 2
-    return cas.sum1(out)
+    n_actuators = len(actuators)
+    return actuator_torque_ratios_squared(q[3 : 3 + n_actuators], tau[:n_actuators], actuators, envelope, sharpness)
 
 
-def minimize_actuator_torques_CL(controller: PenaltyController, actuators) -> cas.MX:
+def minimize_actuator_torques_CL(
+    controller: PenaltyController, actuators, envelope: str = "switch", sharpness: float = 1.0
+) -> cas.MX:
 
     nb_independent = controller.model.nb_independent_joints
     u = controller.states.cx[:nb_independent]
-    v = controller.model.compute_v_from_u_explicit_symbolic(u)
+    v = holonomic_q_v(controller, u)
     q = controller.model.state_from_partition(u, v)
 
     if "tau" in controller.states:
@@ -44,19 +90,8 @@ def minimize_actuator_torques_CL(controller: PenaltyController, actuators) -> ca
     else:
         tau = controller.controls["tau"].cx_start
 
-    out = 0
-    for i, key in enumerate(actuators.keys()):
-        current_max_tau = cas.if_else(
-            tau[i] > 0,
-            actuator_function(
-                actuators[key].tau_max_plus, actuators[key].theta_opt_plus, actuators[key].r_plus, q[i + 3]
-            ),
-            actuator_function(
-                actuators[key].tau_max_minus, actuators[key].theta_opt_minus, actuators[key].r_minus, q[i + 3]
-            ),
-        )
-        out += (tau[i] / current_max_tau) ** 2
-    return cas.sum1(out)
+    n_actuators = len(actuators)
+    return actuator_torque_ratios_squared(q[3 : 3 + n_actuators], tau[:n_actuators], actuators, envelope, sharpness)
 
 
 WEIGHTS = {
@@ -80,7 +115,9 @@ WEIGHTS = {
 }
 
 
-def add_objectives(objective_functions, actuators, weights: dict = None):
+def add_objectives(
+    objective_functions, actuators, weights: dict = None, envelope: str = "switch", envelope_sharpness: float = 1.0
+):
 
     if weights is None:
         weights = WEIGHTS
@@ -96,6 +133,8 @@ def add_objectives(objective_functions, actuators, weights: dict = None):
         minimize_actuator_torques,
         custom_type=ObjectiveFcn.Lagrange,
         actuators=actuators,
+        envelope=envelope,
+        sharpness=envelope_sharpness,
         quadratic=True,
         weight=weights["0_TORQUE_RATIO"],
         phase=0,
@@ -125,6 +164,8 @@ def add_objectives(objective_functions, actuators, weights: dict = None):
         minimize_actuator_torques,
         custom_type=ObjectiveFcn.Lagrange,
         actuators=actuators,
+        envelope=envelope,
+        sharpness=envelope_sharpness,
         quadratic=True,
         weight=weights["1_TORQUE_RATIO"],
         phase=1,
@@ -143,6 +184,8 @@ def add_objectives(objective_functions, actuators, weights: dict = None):
         minimize_actuator_torques,
         custom_type=ObjectiveFcn.Lagrange,
         actuators=actuators,
+        envelope=envelope,
+        sharpness=envelope_sharpness,
         quadratic=True,
         weight=weights["3_TORQUE_RATIO"],
         phase=3,
@@ -162,6 +205,8 @@ def add_objectives(objective_functions, actuators, weights: dict = None):
         minimize_actuator_torques,
         custom_type=ObjectiveFcn.Lagrange,
         actuators=actuators,
+        envelope=envelope,
+        sharpness=envelope_sharpness,
         quadratic=True,
         weight=weights["4_TORQUE_RATIO"],
         phase=4,
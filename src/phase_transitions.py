@@ -2,6 +2,8 @@ from bioptim import PenaltyController
 from casadi import MX, vertcat
 from warnings import warn
 
+from .holonomic_torque_derivative_dynamics import holonomic_q_v
+
 
 def custom_phase_transition_pre(controllers: list[PenaltyController, PenaltyController]) -> MX:
     """
@@ -25,7 +27,7 @@ def custom_phase_transition_pre(controllers: list[PenaltyController, PenaltyCont
     udot_post = controllers[1].states.cx[nb_independent : nb_independent * 2]
 
     # Take the q of the independent joint and calculate the q of dependent joint
-    v_post = controllers[1].model.compute_v_from_u_explicit_symbolic(u_post)
+    v_post = holonomic_q_v(controllers[1], u_post)
     q_post = controllers[1].model.state_from_partition(u_post, v_post)
 
     Bvu = controllers[1].model.coupling_matrix(q_post)
@@ -57,7 +59,7 @@ def custom_phase_transition_post(controllers: list[PenaltyController, PenaltyCon
     udot_pre = controllers[0].states.cx[nb_independent : nb_independent * 2]
 
     # Take the q of the indepente joint and calculate the q of dependent joint
-    v_pre = controllers[0].model.compute_v_from_u_explicit_symbolic(u_pre)
+    v_pre = holonomic_q_v(controllers[0], u_pre)
     q_pre = controllers[0].model.state_from_partition(u_pre, v_pre)
     Bvu = controllers[0].model.coupling_matrix(q_pre)
     vdot_pre = Bvu @ udot_pre
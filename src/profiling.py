@@ -0,0 +1,99 @@
+"""
+Wall-clock profiling of the runs: the sections of prepare_ocp (model_loading, declaration of the objectives, dynamics
+and constraints, bounds_and_initial_guess and nlp_assembly by bioptim), the time IPOPT spent in the function
+evaluations of CasADi versus its own linear algebra (from the statistics of the CasADi solver) and the time of the save
+callback, written to the results of each seed.
+The dynamics and the penalties declared in prepare_ocp are configured and built by bioptim when the NLP is assembled,
+the CasADi graph building is therefore measured by the nlp_assembly section, the declaration section is only the
+filling of the lists of bioptim.
+"""
+
+import time
+
+# The functions of the NLP evaluated by IPOPT, as named in the statistics of the CasADi solver
+NLP_FUNCTIONS = ("nlp_f", "nlp_g", "nlp_grad", "nlp_grad_f", "nlp_jac_g", "nlp_hess_l")
+
+
+class Profiler:
+    """The accumulated wall-clock time of the named sections of a run, measured lap after lap"""
+
+    def __init__(self):
+        self.timings = {}
+        self._tic = time.perf_counter()
+
+    def lap(self, name: str) -> float:
+        """
+        Record the time elapsed since the previous lap (or the creation of the profiler) under a section
+
+        Parameters
+        ----------
+        name: str
+            The section, the time is added to the previous laps of the same section
+
+        Returns
+        -------
+        The time of the lap
+        """
+        toc = time.perf_counter()
+        elapsed = toc - self._tic
+        self.timings[name] = self.timings.get(name, 0.0) + elapsed
+        self._tic = toc
+        return elapsed
+
+
+def ipopt_statistics(sol) -> dict:
+    """
+    The statistics of the CasADi IPOPT solver of a solution, must be called before its ocp is deleted
+
+    Parameters
+    ----------
+    sol: Solution
+        The solution of the ocp
+
+    Returns
+    -------
+    The wall time and number of calls of each function of the NLP, the total wall time of IPOPT, the time spent in the
+    function evaluations and the remaining time spent in IPOPT itself (mostly the linear solver), empty if the solver
+    is not available
+    """
+    interface = getattr(sol.ocp, "ocp_solver", None)
+    nlpsol = getattr(interface, "ocp_solver", None)
+    if nlpsol is None or not hasattr(nlpsol, "stats"):
+        return {}
+
+    stats = nlpsol.stats()
+    statistics = {}
+    for function in NLP_FUNCTIONS:
+        if f"t_wall_{function}" in stats:
+            statistics[f"t_wall_{function}"] = float(stats[f"t_wall_{function}"])
+            statistics[f"n_call_{function}"] = int(stats.get(f"n_call_{function}", 0))
+    statistics["t_wall_total"] = float(stats.get("t_wall_total", float("nan")))
+    statistics["t_wall_function_evaluations"] = sum(
+        statistics[f"t_wall_{function}"] for function in NLP_FUNCTIONS if f"t_wall_{function}" in statistics
+    )
+    statistics["t_wall_ipopt"] = statistics["t_wall_total"] - statistics["t_wall_function_evaluations"]
+    statistics["iter_count"] = int(stats.get("iter_count", sol.iterations))
+    return statistics
+
+
+def profiling_record(sol, save_time: float = None) -> dict:
+    """
+    The profiling of a run, stored under the "profiling" key of its results
+
+    Parameters
+    ----------
+    sol: Solution
+        The solution of the ocp, its ocp must still be attached
+    save_time: float
+        The time spent in the save callback before the results were written
+
+    Returns
+    -------
+    The sections of prepare_ocp (if it was profiled), the solve time, the statistics of IPOPT and the save time
+    """
+    profiler = getattr(sol.ocp, "profiler", None)
+    return {
+        "prepare_ocp": {} if profiler is None else dict(profiler.timings),
+        "solve": {"real_time_to_optimize": float(sol.real_time_to_optimize)} | ipopt_statistics(sol),
+        "save": save_time,
+    }
@@ -0,0 +1,217 @@
+"""
+Columnar store of the results of a multi-start campaign: one .npy file per array of each seed, read back memory-mapped,
+and a per-campaign index of the scalar results (cost, status, iterations, time), instead of one pickle per seed.
+"""
+
+import glob
+import json
+import os
+import pickle
+
+import numpy as np
+
+STORE_FOLDER = "columns"
+INDEX_FILE = "index.npz"
+INDEX_FIELDS = ("cost", "status", "iterations", "real_time_to_optimize", "time_total")
+
+
+def _to_array(value) -> np.ndarray | None:
+    """The value as an array if it is an array (numpy or casadi DM) of more than one element"""
+    if isinstance(value, np.ndarray):
+        return value
+    if hasattr(value, "full") and hasattr(value, "numel"):
+        return value.full() if value.numel() > 1 else None
+    return None
+
+
+def _to_metadata(value):
+    """The value as a json compatible value, None if it cannot be stored as metadata"""
+    if hasattr(value, "full") and hasattr(value, "numel") and value.numel() == 1:
+        return float(value)
+    if isinstance(value, (np.integer, np.floating, np.bool_)):
+        return value.item()
+    if isinstance(value, (int, float, str, bool)) or value is None:
+        return value
+    if isinstance(value, (list, tuple)):
+        values = [_to_metadata(v) for v in value]
+        return values if all(v is not None or w is None for v, w in zip(values, value)) else None
+    if isinstance(value, dict):
+        values = {str(k): _to_metadata(v) for k, v in value.items()}
+        return values if all(values[str(k)] is not None or v is None for k, v in value.items()) else None
+    return None
+
+
+def save_columnar(data: dict, save_folder: str, seed, converged: bool, status: int = None) -> str:
+    """
+    Write the results of a seed in the columnar store of its campaign: each array (or each phase of a list of arrays)
+    in its own .npy file and the scalars in a metadata.json file
+
+    Parameters
+    ----------
+    data: dict
+        The results of the seed, as built by the save_results functions
+    save_folder: str
+        The folder of the campaign
+    seed:
+        The seed of the run
+    converged: bool
+        If the solution converged, the entry is suffixed by _CVG or _DVG like the pickles
+    status: int
+        The status of the solver, 0 if it converged, 1 otherwise by default. The save_results functions replace the
+        status of the results by a message, which is kept as status_message
+
+    Returns
+    -------
+    The folder of the seed in the store
+    """
+    seed_folder = os.path.join(save_folder, STORE_FOLDER, f"sol_{seed}_{'CVG' if converged else 'DVG'}")
+    if not os.path.exists(seed_folder):
+        os.makedirs(seed_folder)
+
+    metadata = {"seed": str(seed), "converged": converged, "phases": {}}
+    for key, value in data.items():
+        array = _to_array(value)
+        if array is not None:
+            np.save(os.path.join(seed_folder, f"{key}.npy"), array)
+            continue
+
+        if isinstance(value, list) and value and all(_to_array(v) is not None or v is None for v in value):
+            metadata["phases"][key] = len(value)
+            for phase, phase_value in enumerate(value):
+                if phase_value is not None:
+                    np.save(os.path.join(seed_folder, f"{key}__phase{phase}.npy"), _to_array(phase_value))
+            continue
+
+        metadata_value = _to_metadata(value)
+        if metadata_value is not None:
+            metadata[key] = metadata_value
+
+    if isinstance(metadata.get("status"), str):
+        metadata["status_message"] = metadata.pop("status")
+    if status is not None:
+        metadata["status"] = int(status)
+    elif not isinstance(metadata.get("status"), int):
+        metadata["status"] = 0 if converged else 1
+
+    # Written last, a seed without metadata is a partially written seed
+    with open(os.path.join(seed_folder, "metadata.json"), "w") as file:
+        json.dump(metadata, file)
+    return seed_folder
+
+
+class ResultsStore:
+    """
+    The columnar results of a campaign. The arrays are loaded memory-mapped, so only the data actually used is read,
+    and the scalar results of all the seeds are gathered in an index cached in index.npz.
+    """
+
+    def __init__(self, save_folder: str):
+        """
+        Parameters
+        ----------
+        save_folder: str
+            The folder of the campaign (the save_folder of the multi-start)
+        """
+        self.save_folder = save_folder
+        self.folder = os.path.join(save_folder, STORE_FOLDER)
+
+    @classmethod
+    def from_pickles(cls, save_folder: str) -> "ResultsStore":
+        """
+        The store of a campaign saved as pickles (sol_*_CVG.pkl, sol_*_DVG.pkl), written on the first call
+
+        Parameters
+        ----------
+        save_folder: str
+            The folder of the campaign
+
+        Returns
+        -------
+        The store of the campaign
+        """
+        store = cls(save_folder)
+        for file_path in sorted(glob.glob(os.path.join(save_folder, "sol_*_[CD]VG.pkl"))):
+            entry = os.path.basename(file_path)[: -len(".pkl")]
+            if os.path.exists(os.path.join(store.folder, entry, "metadata.json")):
+                continue
+            with open(file_path, "rb") as file:
+                data = pickle.load(file)
+            seed = entry[len("sol_") : -len("_CVG")]
+            save_columnar(data, save_folder, seed, converged=entry.endswith("_CVG"))
+        return store
+
+    def entries(self) -> list[str]:
+        """The completely written entries of the store (sol_<seed>_CVG or sol_<seed>_DVG)"""
+        if not os.path.exists(self.folder):
+            return []
+        return sorted(
+            entry
+            for entry in os.listdir(self.folder)
+            if os.path.exists(os.path.join(self.folder, entry, "metadata.json"))
+        )
+
+    def metadata(self, entry: str) -> dict:
+        """The scalar results of an entry"""
+        with open(os.path.join(self.folder, entry, "metadata.json"), "r") as file:
+            return json.load(file)
+
+    def array(self, entry: str, name: str, mmap: bool = True) -> np.ndarray:
+        """
+        An array of an entry, e.g. q_all, qdot_all, tau_all or lambda
+
+        Parameters
+        ----------
+        entry: str
+            The entry (sol_<seed>_CVG or sol_<seed>_DVG)
+        name: str
+            The name of the array in the results
+        mmap: bool
+            If the array is memory-mapped (read-only) instead of loaded in memory
+
+        Returns
+        -------
+        The array
+        """
+        return np.load(os.path.join(self.folder, entry, f"{name}.npy"), mmap_mode="r" if mmap else None)
+
+    def phases(self, entry: str, name: str, mmap: bool = True) -> list[np.ndarray | None]:
+        """The arrays of each phase of a list of arrays of the results, e.g. q or time"""
+        n_phases = self.metadata(entry)["phases"][name]
+        arrays = []
+        for phase in range(n_phases):
+            file_path = os.path.join(self.folder, entry, f"{name}__phase{phase}.npy")
+            arrays.append(np.load(file_path, mmap_mode="r" if mmap else None) if os.path.exists(file_path) else None)
+        return arrays
+
+    def index(self) -> dict[str, np.ndarray]:
+        """
+        The scalar results of all the entries of the campaign, one column per field, cached in index.npz and rebuilt
+        when entries were added, removed or rewritten since (the modification times of their metadata are kept in the
+        cache)
+
+        Returns
+        -------
+        The columns entry, seed, converged and INDEX_FIELDS, with one row per entry
+        """
+        entries = self.entries()
+        mtimes = [os.stat(os.path.join(self.folder, entry, "metadata.json")).st_mtime_ns for entry in entries]
+        index_path = os.path.join(self.folder, INDEX_FILE)
+        if os.path.exists(index_path):
+            with np.load(index_path) as index:
+                if list(index["entry"]) == entries and list(index.get("metadata_mtime", [])) == mtimes:
+                    return {key: index[key] for key in index.files if key != "metadata_mtime"}
+
+        columns = {"entry": [], "seed": [], "converged": []} | {field: [] for field in INDEX_FIELDS}
+        for entry in entries:
+            metadata = self.metadata(entry)
+            columns["entry"].append(entry)
+            columns["seed"].append(metadata["seed"])
+            columns["converged"].append(metadata["converged"])
+            for field in INDEX_FIELDS:
+                value = metadata.get(field)
+                columns[field].append(np.nan if not isinstance(value, (int, float)) else value)
+
+        index = {key: np.array(value) for key, value in columns.items()}
+        if entries:
+            np.savez(index_path, metadata_mtime=np.array(mtimes, dtype=np.int64), **index)
+        return index
@@ -1,5 +1,7 @@
 import pickle
 
+import numpy as np
+
 
 def save_results(sol, name_pickle_file):
     """
@@ -121,4 +123,43 @@ def get_created_data_from_pickle(file: str):
             except:
                 break
 
-    return data_tmp
\ No newline at end of file
+    return data_tmp
+
+
+def resample_nodes(values: np.ndarray, n_columns: int) -> np.ndarray:
+    """Linear interpolation of a (n_elements, n_nodes) array on n_columns equally spaced nodes"""
+    if values.shape[1] == n_columns:
+        return values
+    old_nodes = np.linspace(0, 1, values.shape[1])
+    new_nodes = np.linspace(0, 1, n_columns)
+    return np.array([np.interp(new_nodes, old_nodes, row) for row in values])
+
+
+# The phases of the jump used as initial guess of the phases of the somersault (jump phase: somersault phase)
+JUMP_TO_SOMERSAULT_PHASES = {0: 0, 1: 1, 3: 4}
+
+
+def get_jump_initial_guess(file: str, n_shooting: tuple) -> dict:
+    """
+    The jump used as initial guess of the somersault, resampled on the mesh of the somersault
+
+    Parameters
+    ----------
+    file: str
+        The path of the pickle of the jump
+    n_shooting: tuple
+        The number of shooting nodes of each phase of the somersault
+
+    Returns
+    -------
+    The data of the jump, with q and qdot on n_shooting + 1 nodes and tau on n_shooting nodes for the phases of the
+    jump used by the somersault (JUMP_TO_SOMERSAULT_PHASES)
+    """
+    data = get_created_data_from_pickle(file)
+    for key, n_extra_nodes in (("q", 1), ("qdot", 1), ("tau", 0)):
+        data[key] = list(data[key])
+        for jump_phase, somersault_phase in JUMP_TO_SOMERSAULT_PHASES.items():
+            data[key][jump_phase] = resample_nodes(
+                np.asarray(data[key][jump_phase]), n_shooting[somersault_phase] + n_extra_nodes
+            )
+    return data
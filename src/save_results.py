@@ -4,6 +4,13 @@ from casadi import MX, Function, vertcat
 import numpy as np
 import pickle
 import os
+from time import perf_counter
+
+from .campaign_index import append_index_record
+from .constants import RESULTS_FORMAT, SAVE_FULL_SOLUTION
+from .profiling import profiling_record
+from .results_store import save_columnar
+from .slim_solution import save_slim_solution, print_detailed_cost
 
 
 # --- Save results --- #
@@ -21,6 +28,7 @@ def save_results_holonomic(
     c3d_file_path: str
         The path to the c3d file of the task
     """
+    started_at = perf_counter()
     biorbd_model_path, phase_time, n_shooting, WITH_MULTI_START, seed = combinatorial_parameters
     index_holo = 2
     biomedel_holo = sol.ocp.nlp[index_holo].model
@@ -89,17 +97,13 @@ def save_results_holonomic(
                 tau_this_time = controls[index_holo]["tau"]
                 tau_this_time = np.vstack((np.zeros((3, tau_this_time.shape[1])), tau_this_time))
 
-                q_holo = np.zeros((8, q_u.shape[1]))
-                qdot_holo = np.zeros((8, qdot_u.shape[1]))
-                for i_node in range(q_u.shape[1]):
-                    q_holo[:, i_node] = np.reshape(q_holo_func(q_u[:, i_node]), (8,))
-                    qdot_holo[:, i_node] = np.reshape(qdot_holo_func(q_u[:, i_node], qdot_u[:, i_node]), (8,))
-
-                lambdas = np.zeros((2, tau_this_time.shape[1]))
-                for i_node in range(tau_this_time.shape[1]):
-                    lambdas[:, i_node] = np.reshape(
-                        lagrangian_multipliers_func(q_u[:, i_node], qdot_u[:, i_node], tau_this_time[:, i_node]), (2,)
-                    )
+                q_holo = evaluate_on_trajectory(q_holo_func, q_u)
+                qdot_holo = evaluate_on_trajectory(qdot_holo_func, q_u, qdot_u)
+                # One lambda per node of tau, which is a control without value at the last node
+                n_tau = tau_this_time.shape[1]
+                lambdas = evaluate_on_trajectory(
+                    lagrangian_multipliers_func, q_u[:, :n_tau], qdot_u[:, :n_tau], tau_this_time
+                )
 
                 q.append(q_holo)
                 qdot.append(qdot_holo)
@@ -184,14 +188,7 @@ def save_results_holonomic(
     else:
         data["status"] = "Restoration Failed !"
 
-    with open(file_path, "wb") as file:
-        pickle.dump(data, file)
-
-    sol.print_cost()
-    file_path_sol = file_path.replace(".pkl", f"_sol.pkl")
-    with open(file_path_sol, "wb") as file:
-        del sol.ocp
-        pickle.dump(sol, file)
+    write_results(sol, data, file_path, save_folder, seed, started_at)
 
 
 def save_results_taudot(
@@ -200,6 +197,7 @@ def save_results_taudot(
     **extra_parameters,
 ):
 
+    started_at = perf_counter()
     biorbd_model_path, phase_time, n_shooting, WITH_MULTI_START, seed = combinatorial_parameters
 
     save_folder = extra_parameters["save_folder"]
@@ -303,14 +301,7 @@ def save_results_taudot(
     else:
         data["status"] = "Restoration Failed !"
 
-    with open(file_path, "wb") as file:
-        pickle.dump(data, file)
-
-    sol.print_cost()
-    file_path_sol = file_path.replace(".pkl", f"_sol.pkl")
-    with open(file_path_sol, "wb") as file:
-        del sol.ocp
-        pickle.dump(sol, file)
+    write_results(sol, data, file_path, save_folder, seed, started_at)
 
 
 # tau, no taudot, no close loop
@@ -319,6 +310,7 @@ def save_results(
     *combinatorial_parameters,
     **extra_parameters,
 ):
+    started_at = perf_counter()
     biorbd_model_path, phase_time, n_shooting, WITH_MULTI_START, seed = combinatorial_parameters
 
     save_folder = extra_parameters["save_folder"]
@@ -414,14 +406,7 @@ def save_results(
     else:
         data["status"] = "Restoration Failed !"
 
-    with open(file_path, "wb") as file:
-        pickle.dump(data, file)
-
-    sol.print_cost()
-    file_path_sol = file_path.replace(".pkl", f"_sol.pkl")
-    with open(file_path_sol, "wb") as file:
-        del sol.ocp
-        pickle.dump(sol, file)
+    write_results(sol, data, file_path, save_folder, seed, started_at)
 
 
 def save_results_holonomic_taudot(
@@ -438,6 +423,7 @@ def save_results_holonomic_taudot(
     c3d_file_path: str
         The path to the c3d file of the task
     """
+    started_at = perf_counter()
     biorbd_model_path, phase_time, n_shooting, WITH_MULTI_START, seed = combinatorial_parameters
     index_holo = 2
     biomedel_holo = sol.ocp.nlp[index_holo].model
@@ -509,17 +495,9 @@ def save_results_holonomic_taudot(
                 tau_this_time = states[index_holo]["tau"]
                 tau_this_time = np.vstack((np.zeros((3, tau_this_time.shape[1])), tau_this_time))
 
-                q_holo = np.zeros((8, q_u.shape[1]))
-                qdot_holo = np.zeros((8, qdot_u.shape[1]))
-                for i_node in range(q_u.shape[1]):
-                    q_holo[:, i_node] = np.reshape(q_holo_func(q_u[:, i_node]), (8,))
-                    qdot_holo[:, i_node] = np.reshape(qdot_holo_func(q_u[:, i_node], qdot_u[:, i_node]), (8,))
-
-                lambdas = np.zeros((2, tau_this_time.shape[1]))
-                for i_node in range(tau_this_time.shape[1]):
-                    lambdas[:, i_node] = np.reshape(
-                        lagrangian_multipliers_func(q_u[:, i_node], qdot_u[:, i_node], tau_this_time[:, i_node]), (2,)
-                    )
+                q_holo = evaluate_on_trajectory(q_holo_func, q_u)
+                qdot_holo = evaluate_on_trajectory(qdot_holo_func, q_u, qdot_u)
+                lambdas = evaluate_on_trajectory(lagrangian_multipliers_func, q_u, qdot_u, tau_this_time)
 
                 q.append(q_holo)
                 qdot.append(qdot_holo)
@@ -609,10 +587,53 @@ def save_results_holonomic_taudot(
     data["qdot_u"] = qdot_u
     data["lambda"] = lambdas
 
-    with open(file_path, "wb") as file:
-        pickle.dump(data, file)
+    write_results(sol, data, file_path, save_folder, seed, started_at)
+
+
+def write_results(sol, data: dict, file_path: str, save_folder: str, seed, started_at: float = None):
+    """
+    Write the results of a seed in the format selected by RESULTS_FORMAT (a pickle of the results or the columnar store
+    of the campaign) with the compact solution (_slim.pkl), the whole Solution (_sol.pkl) only if SAVE_FULL_SOLUTION,
+    and append its summary to the index of the campaign. The profiling of the run is added to the results.
+
+    Parameters
+    ----------
+    sol: Solution
+        The solution to the ocp at the current pool, its ocp is deleted
+    data: dict
+        The results of the seed
+    file_path: str
+        The path of the pickle of the results (sol_<seed>_CVG.pkl or sol_<seed>_DVG.pkl)
+    save_folder: str
+        The folder of the campaign
+    seed:
+        The seed of the run
+    started_at: float
+        The perf_counter() at the start of the save callback, for the profiling of the run
+    """
+    data["profiling"] = profiling_record(sol, None if started_at is None else perf_counter() - started_at)
+    if RESULTS_FORMAT == "columnar":
+        saved_path = save_columnar(data, save_folder, seed, converged=file_path.endswith("_CVG.pkl"), status=sol.status)
+    else:
+        saved_path = file_path
+        with open(file_path, "wb") as file:
+            pickle.dump(data, file)
+    append_index_record(
+        save_folder,
+        seed,
+        cost=sol.cost,
+        status=sol.status,
+        iterations=sol.iterations,
+        real_time_to_optimize=sol.real_time_to_optimize,
+        file_path=saved_path,
+    )
+
+    # The compact solution also keeps the detailed cost, computed once while the ocp is still attached
+    slim = save_slim_solution(sol, file_path.replace(".pkl", "_slim.pkl"))
+    print_detailed_cost(slim)
+    if RESULTS_FORMAT == "columnar" or not SAVE_FULL_SOLUTION:
+        return
 
-    sol.print_cost()
     file_path_sol = file_path.replace(".pkl", f"_sol.pkl")
     with open(file_path_sol, "wb") as file:
         del sol.ocp
@@ -649,8 +670,34 @@ def contact_force_recomputations(biomodel, q, qdot, tau):
         "contact_forces_func", [q_mx, qdot_mx, tau_mx], [contact_force_sym], ["q", "qdot", "tau"], ["contact_forces"]
     )
 
-    contact_forces = np.zeros((biomodel.nb_contacts, nb_frames))
-    for i, (qi, qdoti, taui) in enumerate(zip(q.T, qdot.T, tau.T)):
-        contact_forces[:, i] = contact_forces_func(qi, qdoti, taui).full().T
+    return evaluate_on_trajectory(contact_forces_func, q[:, :nb_frames], qdot[:, :nb_frames], tau[:, :nb_frames])
 
-    return contact_forces
+
+def evaluate_on_trajectory(func: Function, *trajectories: np.ndarray, n_threads: int = None) -> np.ndarray:
+    """
+    Evaluate a per-node casadi Function on whole phase matrices in one call, the nodes being dispatched on threads
+
+    Parameters
+    ----------
+    func: Function
+        The function to evaluate, taking one column of each trajectory and returning one column
+    trajectories: np.ndarray
+        The inputs of the function, one column per node, all with the same number of nodes
+    n_threads: int
+        The number of threads used to evaluate the nodes, by default the cores this process is allowed to run on (its
+        own block of cores in a worker of the multi-start scheduler)
+
+    Returns
+    -------
+    np.ndarray
+        The output of the function, one column per node
+    """
+    n_nodes = {trajectory.shape[1] for trajectory in trajectories}
+    if len(n_nodes) != 1:
+        raise ValueError(f"The trajectories must have the same number of nodes, got {sorted(n_nodes)}")
+    n_nodes = n_nodes.pop()
+
+    if n_threads is None:
+        n_threads = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    mapped_func = func.map(n_nodes, "thread", n_threads)
+    return mapped_func(*trajectories).full()
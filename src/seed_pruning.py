@@ -0,0 +1,153 @@
+"""
+Early abort of the multi-start seeds that cannot beat the best converged seed of their campaign: an IPOPT iteration
+callback monitors the objective and the infeasibility and stops the seed, freeing the worker for the next one.
+"""
+
+import numpy as np
+from bioptim.interfaces.ipopt_interface import IpoptInterface
+from casadi import Callback, Sparsity, nlpsol_n_out, nlpsol_out
+
+
+class SeedPruning:
+    """
+    The rule deciding if a seed is hopeless. After min_iterations, a seed is aborted when it is feasible
+    (infeasibility below feasibility_tolerance) with an objective worse than the best converged seed by more than
+    relative_margin, as the objective of a feasible iterate seldom decreases much more. It is also aborted if it is
+    still infeasible after max_infeasible_iterations.
+    """
+
+    def __init__(
+        self,
+        min_iterations: int = 200,
+        relative_margin: float = 0.1,
+        feasibility_tolerance: float = 1e-4,
+        max_infeasible_iterations: int = None,
+        refresh_every: int = 25,
+    ):
+        """
+        Parameters
+        ----------
+        min_iterations: int
+            The number of iterations before a seed can be aborted
+        relative_margin: float
+            How much worse than the best cost (relative to its absolute value) the objective must be to abort
+        feasibility_tolerance: float
+            The maximal constraint violation for an iterate to be considered feasible
+        max_infeasible_iterations: int
+            The number of iterations after which a seed that is still infeasible is aborted, None to never abort them
+        refresh_every: int
+            The number of iterations between two reads of the best cost of the campaign
+        """
+        self.min_iterations = min_iterations
+        self.relative_margin = relative_margin
+        self.feasibility_tolerance = feasibility_tolerance
+        self.max_infeasible_iterations = max_infeasible_iterations
+        self.refresh_every = refresh_every
+
+    def is_hopeless(self, iteration: int, objective: float, infeasibility: float, best_cost: float | None) -> bool:
+        """
+        Parameters
+        ----------
+        iteration: int
+            The current iteration of the seed
+        objective: float
+            The objective of the current iterate
+        infeasibility: float
+            The maximal constraint violation of the current iterate
+        best_cost: float | None
+            The best cost of the converged seeds of the campaign, None if no seed converged yet
+
+        Returns
+        -------
+        If the seed should be aborted
+        """
+        if iteration < self.min_iterations:
+            return False
+        if infeasibility > self.feasibility_tolerance:
+            return self.max_infeasible_iterations is not None and iteration >= self.max_infeasible_iterations
+        if best_cost is None:
+            return False
+        return objective > best_cost + self.relative_margin * abs(best_cost)
+
+
+class PruningCallback(Callback):
+    """IPOPT iteration callback stopping the solve (non-zero return) when the seed is hopeless"""
+
+    def __init__(self, ocp, pruning: SeedPruning, best_cost, opts: dict = None):
+        """
+        Parameters
+        ----------
+        ocp: OptimalControlProgram
+            The ocp of the seed
+        pruning: SeedPruning
+            The rule deciding if the seed is hopeless
+        best_cost: Callable[[], float | None]
+            The function giving the current best cost of the campaign
+        """
+        Callback.__init__(self)
+        self.pruning = pruning
+        self.best_cost = best_cost
+        self.iteration = 0
+        self.current_best_cost = None
+
+        self.nx = ocp.variables_vector.shape[0]
+        all_g, all_g_bounds = IpoptInterface(ocp).dispatch_bounds()
+        self.ng = all_g.shape[0]
+        self.lbg = np.array(all_g_bounds.min)[:, 0]
+        self.ubg = np.array(all_g_bounds.max)[:, 0]
+
+        self.construct("PruningCallback", {} if opts is None else opts)
+
+    def get_n_in(self):
+        return nlpsol_n_out()
+
+    def get_n_out(self):
+        return 1
+
+    def get_name_in(self, i):
+        return nlpsol_out(i)
+
+    def get_name_out(self, _):
+        return "ret"
+
+    def get_sparsity_in(self, i):
+        n = nlpsol_out(i)
+        if n == "f":
+            return Sparsity.scalar()
+        elif n in ("x", "lam_x"):
+            return Sparsity.dense(self.nx)
+        elif n in ("g", "lam_g"):
+            return Sparsity.dense(self.ng)
+        else:
+            return Sparsity(0, 0)
+
+    def eval(self, arg):
+        if self.iteration % self.pruning.refresh_every == 0:
+            self.current_best_cost = self.best_cost()
+
+        objective = float(arg[1])
+        g = np.array(arg[2]).squeeze(axis=1) if self.ng else np.zeros(0)
+        infeasibility = float(np.max(np.maximum(self.lbg - g, g - self.ubg), initial=0))
+        hopeless = self.pruning.is_hopeless(self.iteration, objective, infeasibility, self.current_best_cost)
+
+        self.iteration += 1
+        return [1 if hopeless else 0]
+
+
+def install_pruning_callback(ocp, pruning: SeedPruning, best_cost):
+    """
+    Give the pruning callback to IPOPT as its iteration callback, the solve of the ocp then stops with
+    User_Requested_Stop (saved as _DVG) if the seed is hopeless
+
+    Parameters
+    ----------
+    ocp: OptimalControlProgram
+        The ocp of the seed, not solved yet
+    pruning: SeedPruning
+        The rule deciding if the seed is hopeless
+    best_cost: Callable[[], float | None]
+        The function giving the current best cost of the campaign
+    """
+    if ocp.ocp_solver is None:
+        ocp.ocp_solver = IpoptInterface(ocp)
+    ocp.ocp_solver.options_common["iteration_callback"] = PruningCallback(ocp, pruning, best_cost)
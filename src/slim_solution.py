@@ -0,0 +1,85 @@
+"""
+Compact serialization of a bioptim Solution: the decision vector, the phase times and the breakdown of the objectives
+and constraints computed at save time, so that the detailed costs are reported without rebuilding the ocp.
+"""
+
+import io
+import pickle
+from contextlib import redirect_stdout
+
+import numpy as np
+from bioptim import SolutionMerge
+
+
+def slim_solution(sol) -> dict:
+    """
+    The compact representation of a solution, must be called before its ocp is deleted
+
+    Parameters
+    ----------
+    sol: Solution
+        The solution of the ocp
+
+    Returns
+    -------
+    The decision vector, the lagrange multipliers, the phase times, the value of each objective and the constraints
+    """
+    times = sol.decision_time(to_merge=SolutionMerge.NODES)
+    times = times if isinstance(times, list) else [times]
+
+    printed_cost = io.StringIO()
+    with redirect_stdout(printed_cost):
+        sol.print_cost()
+
+    return {
+        "vector": np.array(sol.vector),
+        "lam_g": np.array(sol.lam_g),
+        "lam_x": np.array(sol.lam_x),
+        "phase_times": [float(time[-1] - time[0]) for time in times],
+        "cost": float(sol.cost),
+        "status": sol.status,
+        "iterations": sol.iterations,
+        "real_time_to_optimize": sol.real_time_to_optimize,
+        "detailed_cost": [
+            {
+                "name": str(penalty["name"]),
+                "cost_value": float(penalty["cost_value"]),
+                "cost_value_weighted": float(penalty["cost_value_weighted"]),
+            }
+            for penalty in sol.detailed_cost
+        ],
+        "constraints": np.array(sol.constraints),
+        "printed_cost": printed_cost.getvalue(),
+    }
+
+
+def save_slim_solution(sol, file_path: str) -> dict:
+    """
+    Save the compact representation of a solution
+
+    Parameters
+    ----------
+    sol: Solution
+        The solution of the ocp, its ocp must still be attached
+    file_path: str
+        The pickle file
+
+    Returns
+    -------
+    The compact representation of the solution
+    """
+    slim = slim_solution(sol)
+    with open(file_path, "wb") as file:
+        pickle.dump(slim, file)
+    return slim
+
+
+def load_slim_solution(file_path: str) -> dict:
+    """The compact representation of a solution saved by save_slim_solution"""
+    with open(file_path, "rb") as file:
+        return pickle.load(file)
+
+
+def print_detailed_cost(slim: dict):
+    """Print the detailed cost of a solution as sol.print_cost() did at save time"""
+    print(slim["printed_cost"], end="")
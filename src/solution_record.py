@@ -0,0 +1,168 @@
+"""
+Lazy access to the saved results of a seed: the fields are read on first access and the derived quantities
+(full floating base, inertia, angular momentum, power, energy) are computed on demand and memoized.
+"""
+
+import json
+import os
+import pickle
+from functools import cached_property
+
+import biorbd
+import numpy as np
+
+from .constants import PATH_MODEL_1_CONTACT
+
+# The model with the full floating base (3 translations and 3 rotations) used for the angular momentum
+PATH_MODEL_FULL_FLOATING_BASE = "../models/Model2D_7Dof_3C_5M_CL_V3_V3D.bioMod"
+
+
+def adjust_q_with_full_floating_base(q: np.ndarray) -> np.ndarray:
+    """
+    Adjust the q vector to take into account the full floating base
+
+    Parameters
+    ----------
+    q: np.ndarray
+        The q vector to adjust
+
+    Returns
+    -------
+    The adjusted q vector
+    """
+    q_adjusted = np.zeros((q.shape[0] + 3, q.shape[1]))
+    q_adjusted[1:4, :] = q[0:3, :]
+    q_adjusted[6:, :] = q[3:, :]
+    return q_adjusted
+
+
+class SolutionRecord:
+    """
+    The results of a seed, saved as a pickle (sol_<seed>_CVG.pkl) or as an entry of the columnar store
+    (columns/sol_<seed>_CVG). It can be indexed like the dict of the results, e.g. record["q_all"].
+    The entries of the columnar store are read field by field (memory-mapped copy-on-write, so that the arrays can be
+    modified in memory without writing to the store), a pickle is read once on the first access.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        model_path: str = PATH_MODEL_1_CONTACT,
+        full_floating_base_model_path: str = PATH_MODEL_FULL_FLOATING_BASE,
+    ):
+        """
+        Parameters
+        ----------
+        path: str
+            The pickle of the results or the folder of the entry of the columnar store
+        model_path: str
+            The model used for the inertia
+        full_floating_base_model_path: str
+            The model with the full floating base used for the angular momentum
+        """
+        self.path = path
+        self.model_path = model_path
+        self.full_floating_base_model_path = full_floating_base_model_path
+        self.is_columnar = os.path.isdir(path)
+        self._fields = {}
+
+    @cached_property
+    def _data(self) -> dict:
+        """All the fields of a pickle, read on the first access"""
+        with open(self.path, "rb") as file:
+            return pickle.load(file)
+
+    @cached_property
+    def _metadata(self) -> dict:
+        with open(os.path.join(self.path, "metadata.json"), "r") as file:
+            return json.load(file)
+
+    def _load_columnar(self, key: str):
+        array_path = os.path.join(self.path, f"{key}.npy")
+        if os.path.exists(array_path):
+            return np.load(array_path, mmap_mode="c")
+        if key in self._metadata.get("phases", {}):
+            phases = []
+            for phase in range(self._metadata["phases"][key]):
+                phase_path = os.path.join(self.path, f"{key}__phase{phase}.npy")
+                phases.append(np.load(phase_path, mmap_mode="c") if os.path.exists(phase_path) else None)
+            return phases
+        if key in self._metadata:
+            return self._metadata[key]
+        raise KeyError(key)
+
+    def __getitem__(self, key: str):
+        if not self.is_columnar:
+            return self._data[key]
+        if key not in self._fields:
+            self._fields[key] = self._load_columnar(key)
+        return self._fields[key]
+
+    def __contains__(self, key: str) -> bool:
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def keys(self) -> list[str]:
+        """The fields of the results"""
+        if not self.is_columnar:
+            return list(self._data.keys())
+        keys = [
+            name[: -len(".npy")] for name in os.listdir(self.path) if name.endswith(".npy") and "__phase" not in name
+        ]
+        return keys + list(self._metadata["phases"].keys()) + [key for key in self._metadata if key != "phases"]
+
+    @cached_property
+    def model(self) -> biorbd.Model:
+        return biorbd.Model(self.model_path)
+
+    @cached_property
+    def full_floating_base_model(self) -> biorbd.Model:
+        return biorbd.Model(self.full_floating_base_model_path)
+
+    @cached_property
+    def time_vector(self) -> np.ndarray:
+        """The time of each node, phase after phase"""
+        return np.vstack(self["time"]).reshape(-1)
+
+    @cached_property
+    def q_full_floating_base(self) -> np.ndarray:
+        """The generalized coordinates of the full floating base model"""
+        return adjust_q_with_full_floating_base(np.asarray(self["q_all"]))
+
+    @cached_property
+    def qdot_full_floating_base(self) -> np.ndarray:
+        """The generalized velocities of the full floating base model"""
+        return adjust_q_with_full_floating_base(np.asarray(self["qdot_all"]))
+
+    @cached_property
+    def inertia(self) -> np.ndarray:
+        """The diagonal of the inertia of the body at each node, (n_nodes, 3)"""
+        q = np.asarray(self["q_all"])
+        return np.array([np.diagonal(self.model.bodyInertia(q[:, i]).to_array()) for i in range(q.shape[1])])
+
+    @cached_property
+    def angular_momentum(self) -> np.ndarray:
+        """The angular momentum of the body at each node, (n_nodes, 3)"""
+        q = self.q_full_floating_base
+        qdot = self.qdot_full_floating_base
+        return np.array(
+            [
+                self.full_floating_base_model.angularMomentum(q[:, i], qdot[:, i], True).to_array()
+                for i in range(q.shape[1])
+            ]
+        )
+
+    @cached_property
+    def power(self) -> np.ndarray:
+        """The absolute power of each actuated joint at each node, (n_tau, n_nodes)"""
+        tau = np.asarray(self["tau_all"])
+        qdot = np.asarray(self["qdot_all"])
+        return np.abs(tau * qdot[-tau.shape[0] :, :])
+
+    @cached_property
+    def energy(self) -> float:
+        """The energy expenditure of the joints over the movement"""
+        return float(np.trapezoid(np.sum(self.power, axis=0), self.time_vector))
@@ -0,0 +1,292 @@
+"""
+Store of converged solutions of the multi-start campaigns (decision variables and lagrange multipliers), so that new
+runs of the same condition and seed start from their previously converged solution instead of a cold start.
+"""
+
+import hashlib
+import os
+import pickle
+
+import numpy as np
+from bioptim import InitialGuessList, InterpolationType, SolutionMerge, Solver
+from bioptim.interfaces.ipopt_interface import IpoptInterface
+
+from .save_load_helpers import resample_nodes
+
+
+def _as_phase_list(values) -> list:
+    """The decision variables of a single phase solution are returned as a dict instead of a list of dicts"""
+    return values if isinstance(values, list) else [values]
+
+
+def solution_iterates(sol, n_shooting, seed=None) -> dict:
+    """
+    The iterates of a solution used to warm start another ocp (see warm_start_ocp)
+
+    Parameters
+    ----------
+    sol: Solution
+        The solution of the ocp, before its ocp is deleted by the save functions
+    n_shooting:
+        The number of shooting nodes of each phase of the ocp
+    seed:
+        The seed of the run
+
+    Returns
+    -------
+    The mesh, the cost, the decision vector, the lagrange multipliers, the optimized phase times and the states,
+    controls and algebraic states of each phase
+    """
+    times = _as_phase_list(sol.decision_time(to_merge=SolutionMerge.NODES))
+    return {
+        "n_shooting": list(np.atleast_1d(n_shooting)),
+        "seed": seed,
+        "cost": float(sol.cost),
+        "vector": np.array(sol.vector),
+        "lam_g": np.array(sol.lam_g),
+        "lam_x": np.array(sol.lam_x),
+        "phase_time": tuple(float(time[-1] - time[0]) for time in times),
+        "states": _as_phase_list(sol.decision_states(to_merge=SolutionMerge.NODES)),
+        "controls": _as_phase_list(sol.decision_controls(to_merge=SolutionMerge.NODES)),
+        "algebraic_states": _as_phase_list(sol.decision_algebraic_states(to_merge=SolutionMerge.NODES)),
+    }
+
+
+class WarmStartStore:
+    """
+    Converged iterates of the multi-start campaigns, one pickle file per condition, mesh and seed.
+    A condition is the combinatorial parameters of prepare_ocp without the seed and the number of shooting nodes,
+    the global weights of the objectives are not part of it, so that a campaign re-run after a weight tweak
+    starts from the previous optimum.
+    """
+
+    def __init__(self, folder: str, n_shooting_index: int = 2, seed_index: int = 4, phase_time_index: int = 1):
+        """
+        Parameters
+        ----------
+        folder: str
+            The root folder of the store
+        n_shooting_index: int
+            The position of n_shooting in the combinatorial parameters of prepare_ocp
+        seed_index: int
+            The position of the seed in the combinatorial parameters of prepare_ocp
+        phase_time_index: int
+            The position of phase_time in the combinatorial parameters of prepare_ocp. The optimized phase times of the
+            warm start replace it, as they are decision variables that cannot be set with the initial guesses.
+            None to keep the phase times of the combinatorial parameters.
+        """
+        self.folder = folder
+        self.n_shooting_index = n_shooting_index
+        self.seed_index = seed_index
+        self.phase_time_index = phase_time_index
+        if not os.path.exists(self.folder):
+            os.makedirs(self.folder)
+
+    def condition(self, *combinatorial_parameters) -> str:
+        """The hash identifying the condition of a run"""
+        condition = [
+            str(parameter)
+            for i, parameter in enumerate(combinatorial_parameters)
+            if i not in (self.n_shooting_index, self.seed_index)
+        ]
+        return hashlib.sha256(repr(condition).encode()).hexdigest()[:16]
+
+    def _file_path(self, *combinatorial_parameters) -> str:
+        n_shooting = combinatorial_parameters[self.n_shooting_index]
+        seed = combinatorial_parameters[self.seed_index]
+        mesh = "_".join(str(n) for n in np.atleast_1d(n_shooting))
+        return os.path.join(self.folder, self.condition(*combinatorial_parameters), f"n{mesh}_seed{seed}.pkl")
+
+    def record(self, sol, *combinatorial_parameters):
+        """
+        Store the iterates of a converged solution, the solutions that did not converge are ignored
+
+        Parameters
+        ----------
+        sol: Solution
+            The solution of the ocp, before its ocp is deleted by the save functions
+        combinatorial_parameters:
+            The combinatorial parameters of prepare_ocp of this run
+        """
+        if sol.status != 0:
+            return
+
+        data = solution_iterates(
+            sol, combinatorial_parameters[self.n_shooting_index], combinatorial_parameters[self.seed_index]
+        )
+
+        file_path = self._file_path(*combinatorial_parameters)
+        if not os.path.exists(os.path.dirname(file_path)):
+            os.makedirs(os.path.dirname(file_path))
+        with open(file_path, "wb") as file:
+            pickle.dump(data, file)
+
+    def load(self, *combinatorial_parameters) -> dict | None:
+        """The converged solution of the same condition, mesh and seed, None if there is none"""
+        file_path = self._file_path(*combinatorial_parameters)
+        if not os.path.exists(file_path):
+            return None
+        with open(file_path, "rb") as file:
+            return pickle.load(file)
+
+    def nearest(self, *combinatorial_parameters) -> dict | None:
+        """
+        The nearest converged solution of the same condition and seed: on the same mesh if it converged, otherwise on
+        the closest mesh. The solutions of the other seeds are never used, so that each seed keeps its own start
+        (the noise of its initial guess) until it converged once.
+
+        Parameters
+        ----------
+        combinatorial_parameters:
+            The combinatorial parameters of prepare_ocp of the new run
+
+        Returns
+        -------
+        The stored iterates, None if the seed never converged in this condition
+        """
+        condition_folder = os.path.join(self.folder, self.condition(*combinatorial_parameters))
+        if not os.path.exists(condition_folder):
+            return None
+
+        same_mesh = self.load(*combinatorial_parameters)
+        if same_mesh is not None:
+            return same_mesh
+
+        n_shooting = np.atleast_1d(combinatorial_parameters[self.n_shooting_index])
+        seed_suffix = f"_seed{combinatorial_parameters[self.seed_index]}.pkl"
+        best, best_key = None, None
+        for file_name in sorted(os.listdir(condition_folder)):
+            if not file_name.endswith(seed_suffix):
+                continue
+            with open(os.path.join(condition_folder, file_name), "rb") as file:
+                data = pickle.load(file)
+            if len(data["n_shooting"]) != len(n_shooting):
+                continue
+            key = np.sum(np.abs(np.array(data["n_shooting"]) - n_shooting))
+            if best_key is None or key < best_key:
+                best, best_key = data, key
+        return best
+
+    def warm_start_parameters(self, data: dict, *combinatorial_parameters) -> tuple:
+        """The combinatorial parameters of prepare_ocp with the optimized phase times of the warm start"""
+        if self.phase_time_index is None:
+            return combinatorial_parameters
+        parameters = list(combinatorial_parameters)
+        parameters[self.phase_time_index] = data["phase_time"]
+        return tuple(parameters)
+
+
+# The options of Solver.IPOPT changed by set_warm_start_options
+WARM_START_OPTIONS = (
+    "_warm_start_init_point",
+    "_mu_init",
+    "_warm_start_mult_bound_push",
+    "_warm_start_slack_bound_push",
+    "_warm_start_bound_push",
+    "_warm_start_slack_bound_frac",
+    "_warm_start_bound_frac",
+)
+
+
+def cold_start_solver(solver: Solver.IPOPT):
+    """
+    Restore the options of a solver changed by the warm start of a previous ocp (see warm_start_ocp), before solving an
+    ocp from its initial guess only. The solver is shared by the runs of a campaign, so that without it the next cold
+    runs would start in warm start mode, with the barrier parameter of a converged solution and no multipliers.
+
+    Parameters
+    ----------
+    solver: Solver.IPOPT
+        The solver of the ocp
+    """
+    for name, value in getattr(solver, "_cold_start_options", {}).items():
+        setattr(solver, name, value)
+    solver.set_warm_start_init_point("no")
+
+
+def warm_start_ocp(
+    ocp, data: dict, solver: Solver.IPOPT, warm_start_push: float = 1e-10, with_multipliers: bool = True
+):
+    """
+    Set the initial guess of an ocp from stored iterates (resampled if the mesh differs), and the lagrange
+    multipliers and the IPOPT warm start options if the mesh is the same
+
+    Parameters
+    ----------
+    ocp: OptimalControlProgram
+        The ocp to warm start
+    data: dict
+        The stored iterates, from WarmStartStore.nearest
+    solver: Solver.IPOPT
+        The solver of the ocp
+    warm_start_push: float
+        The bound push and bound fraction of the primal and dual iterates at the warm start
+    with_multipliers: bool
+        If the lagrange multipliers are used, False if the iterates come from an ocp with other constraints
+    """
+    x_init = InitialGuessList()
+    u_init = InitialGuessList()
+    a_init = InitialGuessList()
+    for phase, nlp in enumerate(ocp.nlp):
+        n_shooting_difference = nlp.ns - data["n_shooting"][phase]
+        for init, values in (
+            (x_init, data["states"][phase]),
+            (u_init, data["controls"][phase]),
+            (a_init, data["algebraic_states"][phase]),
+        ):
+            for key, value in values.items():
+                init.add(
+                    key,
+                    resample_nodes(value, value.shape[1] + n_shooting_difference),
+                    interpolation=InterpolationType.EACH_FRAME,
+                    phase=phase,
+                )
+    ocp.update_initial_guess(x_init=x_init, u_init=u_init, a_init=a_init)
+
+    if not with_multipliers or [nlp.ns for nlp in ocp.nlp] != list(data["n_shooting"]):
+        # The multipliers only make sense for the same constraints
+        cold_start_solver(solver)
+        return
+
+    if ocp.ocp_solver is None:
+        ocp.ocp_solver = IpoptInterface(ocp)
+    ocp.ocp_solver.lam_g = data["lam_g"]
+    ocp.ocp_solver.lam_x = data["lam_x"]
+    if not hasattr(solver, "_cold_start_options"):
+        # Kept on the solver to be restored by cold_start_solver
+        solver._cold_start_options = {name: getattr(solver, name) for name in WARM_START_OPTIONS}
+    solver.set_warm_start_options(warm_start_push)
+
+
+class WarmStartedPrepareOcp:
+    """
+    prepare_ocp callback of the multi-start building the ocp from the nearest converged solution of the store,
+    picklable so that it can be sent to the processes of the pool
+    """
+
+    def __init__(self, prepare_ocp, store: WarmStartStore, solver: Solver.IPOPT):
+        self.prepare_ocp = prepare_ocp
+        self.store = store
+        self.solver = solver
+
+    def __call__(self, *combinatorial_parameters, **extra_parameters):
+        data = self.store.nearest(*combinatorial_parameters)
+        if data is None:
+            cold_start_solver(self.solver)
+            return self.prepare_ocp(*combinatorial_parameters, **extra_parameters)
+
+        ocp = self.prepare_ocp(*self.store.warm_start_parameters(data, *combinatorial_parameters), **extra_parameters)
+        warm_start_ocp(ocp, data, self.solver)
+        return ocp
+
+
+class WarmStartRecordingSaveResults:
+    """post_optimization callback of the multi-start recording the converged iterates before saving the results"""
+
+    def __init__(self, save_results, store: WarmStartStore):
+        self.save_results = save_results
+        self.store = store
+
+    def __call__(self, sol, *combinatorial_parameters, **extra_parameters):
+        self.store.record(sol, *combinatorial_parameters)
+        return self.save_results(sol, *combinatorial_parameters, **extra_parameters)
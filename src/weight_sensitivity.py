@@ -0,0 +1,250 @@
+"""
+Sensitivity of the solutions to the weights of the objectives: a grid or a latin hypercube of overrides of WEIGHTS
+(scale factors of the nominal weights) is solved in a pool of processes, each run warm started from the solution of the
+nominal weights, and the outcome of each run is reduced to one row of a table (cost breakdown, energy of the actuators,
+peak lagrange multipliers of the tucked phase and residual contact forces at takeoff).
+"""
+
+import csv
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from bioptim import SolutionMerge, Solver
+from casadi import MX, Function, vertcat
+
+from .objectives import WEIGHTS
+from .save_results import contact_force_recomputations, evaluate_on_trajectory
+from .warm_start import _as_phase_list, solution_iterates, warm_start_ocp
+
+
+def weight_grid(factors: dict, nominal: dict = None) -> list[dict]:
+    """
+    The weight overrides of a full grid
+
+    Parameters
+    ----------
+    factors: dict
+        The scale factors of the nominal weight of each swept objective, e.g. {"TAUDOT": (0.1, 1, 10)}
+    nominal: dict
+        The nominal weights, WEIGHTS by default
+
+    Returns
+    -------
+    The overridden weights of each point of the grid
+    """
+    nominal = WEIGHTS if nominal is None else nominal
+    return [
+        {key: nominal[key] * factor for key, factor in zip(factors, point)}
+        for point in itertools.product(*factors.values())
+    ]
+
+
+def weight_latin_hypercube(factor_bounds: dict, n_samples: int, seed: int = 0, nominal: dict = None) -> list[dict]:
+    """
+    The weight overrides of a latin hypercube, the scale factors being sampled uniformly in log space since the
+    weights span several orders of magnitude
+
+    Parameters
+    ----------
+    factor_bounds: dict
+        The lower and upper scale factors (strictly positive) of the nominal weight of each swept objective,
+        e.g. {"TAUDOT": (0.1, 10)}
+    n_samples: int
+        The number of samples, each factor range is cut in n_samples strata sampled once
+    seed: int
+        The seed of the sampling
+    nominal: dict
+        The nominal weights, WEIGHTS by default
+
+    Returns
+    -------
+    The overridden weights of each sample
+    """
+    nominal = WEIGHTS if nominal is None else nominal
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for key, (low, high) in factor_bounds.items():
+        strata = (rng.permutation(n_samples) + rng.random(n_samples)) / n_samples
+        columns[key] = nominal[key] * low * (high / low) ** strata
+    return [{key: float(values[sample]) for key, values in columns.items()} for sample in range(n_samples)]
+
+
+def _holonomic_trajectory(model, states: dict) -> tuple[np.ndarray, np.ndarray]:
+    """The full qdot and the lagrange multipliers of each node of the holonomic phase"""
+    n_root = model.nb_root
+    q_u = MX.sym("q_u", model.nb_independent_joints, 1)
+    qdot_u = MX.sym("qdot_u", model.nb_independent_joints, 1)
+    tau = MX.sym("tau", model.nb_tau - n_root, 1)
+    new_tau = vertcat(MX.zeros(n_root), tau)
+    if "q_v" in states:
+        q_v = MX.sym("q_v", model.nb_dependent_joints, 1)
+        inputs = [q_u, q_v, qdot_u, tau]
+        bundle = model.holonomic_dynamics_algebraic_bundle(q_u, q_v, qdot_u, new_tau)
+        trajectories = [states["q_u"], states["q_v"], states["qdot_u"], states["tau"]]
+    else:
+        inputs = [q_u, qdot_u, tau]
+        bundle = model.holonomic_dynamics_bundle(q_u, qdot_u, new_tau)
+        trajectories = [states["q_u"], states["qdot_u"], states["tau"]]
+
+    func = Function("holonomic_trajectory", inputs, [vertcat(bundle["qdot"], bundle["lagrange_multipliers"])])
+    outputs = evaluate_on_trajectory(func, *trajectories)
+    return outputs[: model.nb_q, :], outputs[model.nb_q :, :]
+
+
+def sweep_metrics(sol, takeoff_phase: int = 0) -> dict:
+    """
+    The outcome of a run of the sweep, must be called before the ocp of the solution is deleted
+
+    Parameters
+    ----------
+    sol: Solution
+        The solution of the ocp
+    takeoff_phase: int
+        The propulsion phase, whose contact forces at its last node are the residual forces at takeoff
+
+    Returns
+    -------
+    The status, cost, weighted cost of each objective (summed over the phases), energy of the actuators (integral of
+    the absolute power), peak absolute lagrange multipliers of the holonomic phase and contact forces at takeoff
+    """
+    states = _as_phase_list(sol.decision_states(to_merge=SolutionMerge.NODES))
+    times = _as_phase_list(sol.decision_time(to_merge=SolutionMerge.NODES))
+
+    metrics = {
+        "status": sol.status,
+        "converged": sol.status == 0,
+        "cost": float(sol.cost),
+        "iterations": sol.iterations,
+        "solve_time": sol.real_time_to_optimize,
+    }
+    for penalty in sol.detailed_cost:
+        key = f"cost_{penalty['name']}"
+        metrics[key] = metrics.get(key, 0.0) + float(penalty["cost_value_weighted"])
+
+    energy = 0.0
+    for nlp, phase_states, time in zip(sol.ocp.nlp, states, times):
+        tau = phase_states["tau"]
+        if "q_u" in phase_states:
+            qdot, lambdas = _holonomic_trajectory(nlp.model, phase_states)
+            for i, peak in enumerate(np.max(np.abs(lambdas), axis=1)):
+                metrics[f"peak_lambda_{i}"] = float(peak)
+        else:
+            qdot = phase_states["qdot"]
+        power = np.sum(np.abs(tau * qdot[-tau.shape[0] :, : tau.shape[1]]), axis=0)
+        energy += float(np.trapezoid(power, np.array(time).squeeze()[: tau.shape[1]]))
+    metrics["energy"] = energy
+
+    takeoff_states = states[takeoff_phase]
+    contact_forces = contact_force_recomputations(
+        sol.ocp.nlp[takeoff_phase].model, takeoff_states["q"], takeoff_states["qdot"], takeoff_states["tau"]
+    )
+    for i, force in enumerate(contact_forces[:, -1]):
+        metrics[f"takeoff_force_{i}"] = float(force)
+    return metrics
+
+
+def solve_weights(
+    prepare_ocp,
+    combinatorial_parameters: tuple,
+    weights: dict,
+    solver: Solver.IPOPT,
+    data: dict = None,
+    **extra_parameters,
+) -> dict:
+    """
+    Solve the ocp with the given weights, warm started from stored iterates of the same mesh and constraints
+
+    Parameters
+    ----------
+    prepare_ocp: Callable
+        The function building the ocp from the combinatorial parameters, with a weights keyword argument
+    combinatorial_parameters: tuple
+        The combinatorial parameters of prepare_ocp
+    weights: dict
+        The weights of all the objectives
+    solver: Solver.IPOPT
+        The solver of the ocp
+    data: dict
+        The iterates of the warm start, from solution_iterates, None for the initial guess of prepare_ocp
+    extra_parameters:
+        The other keyword arguments of prepare_ocp
+
+    Returns
+    -------
+    The metrics of the run, see sweep_metrics
+    """
+    ocp = prepare_ocp(*combinatorial_parameters, weights=weights, **extra_parameters)
+    if data is not None:
+        warm_start_ocp(ocp, data, solver)
+    return sweep_metrics(ocp.solve(solver))
+
+
+def weight_sweep(
+    prepare_ocp,
+    combinatorial_parameters: tuple,
+    overrides: list[dict],
+    solver: Solver.IPOPT,
+    n_workers: int = 1,
+    n_shooting_index: int = 2,
+    phase_time_index: int = 1,
+    **extra_parameters,
+) -> list[dict]:
+    """
+    Solve the nominal weights, then each override in a pool of processes warm started from the nominal solution
+    (with its optimized phase times and lagrange multipliers, the constraints being the same)
+
+    Parameters
+    ----------
+    prepare_ocp: Callable
+        The function building the ocp from the combinatorial parameters, with a weights keyword argument, importable
+        so that it can be sent to the processes of the pool
+    combinatorial_parameters: tuple
+        The combinatorial parameters of prepare_ocp
+    overrides: list[dict]
+        The overridden weights of each sample, from weight_grid or weight_latin_hypercube
+    solver: Solver.IPOPT
+        The solver of the ocp
+    n_workers: int
+        The number of processes solving the samples
+    n_shooting_index: int
+        The position of n_shooting in the combinatorial parameters of prepare_ocp
+    phase_time_index: int
+        The position of phase_time in the combinatorial parameters of prepare_ocp
+    extra_parameters:
+        The other keyword arguments of prepare_ocp
+
+    Returns
+    -------
+    One row per sample (the nominal first, sample -1) with the overridden weights (w_ prefix) and the metrics
+    """
+    parameters = list(combinatorial_parameters)
+    ocp = prepare_ocp(*parameters, weights=WEIGHTS, **extra_parameters)
+    sol = ocp.solve(solver)
+    rows = [{"sample": -1} | sweep_metrics(sol)]
+
+    data = None
+    if sol.status == 0:
+        data = solution_iterates(sol, parameters[n_shooting_index])
+        parameters[phase_time_index] = data["phase_time"]
+
+    with ProcessPoolExecutor(max_workers=n_workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        futures = [
+            executor.submit(
+                solve_weights, prepare_ocp, tuple(parameters), WEIGHTS | override, solver, data, **extra_parameters
+            )
+            for override in overrides
+        ]
+        for sample, (override, future) in enumerate(zip(overrides, futures)):
+            rows.append({"sample": sample} | {f"w_{key}": value for key, value in override.items()} | future.result())
+    return rows
+
+
+def write_table(rows: list[dict], file_path: str):
+    """Write the rows of sweeps as a csv table, the columns being the union of the keys of the rows"""
+    columns = list(dict.fromkeys(key for row in rows for key in row))
+    with open(file_path, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)